@@ -30,6 +30,10 @@ when you run the assistant many times in a row. The cache is valid for 12 hours
 after which Finalynx will fetch the data again from Finary. To force a refresh
 before the 12 hours, set the `clear_cache` option to True. This will not clear
 the cookies so you don't need to login again.
+
+Cache files are saved in your user cache directory (e.g. ~/.cache/finalynx), use
+the `cache_dir` option or the FINALYNX_CACHE_DIR environment variable to choose
+another folder. Set `cache_format="gzip"` to compress large cache files.
 """
 
 
@@ -9,10 +9,17 @@ You can always get the latest version of this module on
 """
 # flake8: noqa
 # noreorder
+from typing import Any
+
 from .__meta__ import __author__  # noqa: F401
 from .__meta__ import __copyright__  # noqa: F401
 from .__meta__ import __version__  # noqa: F401
 
+# Record the import time of each module with --import-profile, must be enabled before importing anything else
+from .import_profile import enable_import_profile
+
+enable_import_profile()
+
 # Portfolio
 from .portfolio import TargetRange, TargetMin, TargetMax, TargetRatio, TargetGlobalRatio
 from .portfolio import Line, LinePerf, Sidecar, Folder, Bucket, SharedFolder, Portfolio, FolderDisplay
@@ -25,9 +32,6 @@ from .fetch import Fetch, SourceBase
 # Advisor
 from .copilot import Copilot
 
-# Dashboard
-from .dashboard import Dashboard
-
 # Simulator
 from .simulator import Simulation, Timeline
 from .simulator import Action, AddLineAmount, SetLineAmount
@@ -47,3 +51,12 @@ from rich.tree import Tree
 
 traceback.install()
 pretty.install()
+
+
+# Lazily exported names, only imported when used: Dashboard (loading nicegui takes a while)
+def __getattr__(name: str) -> Any:
+    if name == "Dashboard":
+        from .dashboard import Dashboard
+
+        return Dashboard
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
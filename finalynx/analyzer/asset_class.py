@@ -1,14 +1,14 @@
 from typing import Any
 from typing import Dict
+from typing import Optional
 
 import numpy as np
 
-from ..portfolio import AssetClass
-from ..portfolio import AssetSubclass
-from ..portfolio import Folder
-from ..portfolio import Line
 from ..portfolio import Node
 from .analyzer import Analyzer
+from .snapshot import ASSET_CLASSES
+from .snapshot import ASSET_SUBCLASSES
+from .snapshot import PortfolioSnapshot
 
 
 class AnalyzeAssetClasses(Analyzer):
@@ -67,61 +67,33 @@ class AnalyzeAssetClasses(Analyzer):
         "Diversifié": "#b54093",
     }
 
+    def __init__(self, node: Node, snapshot: Optional[PortfolioSnapshot] = None):
+        """:param snapshot: Optional snapshot containing `node` to reuse between analyses,
+        it must be up to date with the tree (see `PortfolioSnapshot.refresh`)."""
+        super().__init__(node)
+        self.snapshot = snapshot if snapshot else PortfolioSnapshot(node)
+
     def analyze(self) -> Dict[str, Any]:
         """:returns: A dictionary with keys as the asset class names and values as the
         sum of investments corresponding to each class. Two-layer dictionary with classes and subclasses."""
-        return self._recursive_merge(self.node)
-
-    def analyze_flat(self) -> Dict[str, float]:
-        """:returns: A dictionary with keys as the asset class names and values as the
-        sum of investments corresponding to each class."""
-        return self._recursive_merge_flat(self.node)
-
-    def _recursive_merge_flat(self, node: Node) -> Dict[str, Any]:
-        """Internal method for recursive searching."""
-        total = {c.value: 0.0 for c in AssetClass}
-
-        # Lines simply return their own amount
-        if isinstance(node, Line):
-            total[node.asset_class.value] = node.get_amount()
-            return total
-
-        # Folders merge what the children return
-        elif isinstance(node, Folder):
-            for child in node.children:
-                for key, value in self._recursive_merge_flat(child).items():
-                    total[key] += value
-            return total
+        snapshot, n_subclasses = self.snapshot, len(ASSET_SUBCLASSES)
 
-        # Safeguard for future versions
-        else:
-            raise ValueError(f"Unknown node type '{type(node)}'.")
+        # Each (class, subclass) pair is a single code to sum all amounts at once
+        totals = snapshot.sum_by(snapshot.asset_classes, len(ASSET_CLASSES), self.node).tolist()
+        pairs = snapshot.asset_classes * n_subclasses + snapshot.asset_subclasses
+        subtotals = snapshot.sum_by(pairs, len(ASSET_CLASSES) * n_subclasses, self.node)
+        subclass_names = [s.value for s in ASSET_SUBCLASSES]
 
-    def _recursive_merge(self, node: Node) -> Dict[str, Any]:
-        """Internal method for recursive searching."""
-        result: Dict[str, Any] = {
-            c.value: {"total": 0.0, "subclasses": {s.value: 0.0 for s in AssetSubclass}} for c in AssetClass
+        return {
+            c.value: {"total": total, "subclasses": dict(zip(subclass_names, subtotals.tolist()))}
+            for c, total, subtotals in zip(ASSET_CLASSES, totals, subtotals.reshape(-1, n_subclasses))
         }
 
-        # Lines simply return their own amount
-        if isinstance(node, Line):
-            result[node.asset_class.value]["total"] = node.get_amount()
-            result[node.asset_class.value]["subclasses"][node.asset_subclass.value] = node.get_amount()
-            return result
-
-        # Folders merge what the children return
-        elif isinstance(node, Folder):
-            for child in node.children:
-                for key, subdict in self._recursive_merge(child).items():
-                    result[key]["total"] += subdict["total"]
-
-                    for subkey, subvalue in subdict["subclasses"].items():
-                        result[key]["subclasses"][subkey] += subvalue
-            return result
-
-        # Safeguard for future versions
-        else:
-            raise ValueError(f"Unknown node type '{type(node)}'.")
+    def analyze_flat(self) -> Dict[str, float]:
+        """:returns: A dictionary with keys as the asset class names and values as the
+        sum of investments corresponding to each class."""
+        totals = self.snapshot.sum_by(self.snapshot.asset_classes, len(ASSET_CLASSES), self.node)
+        return dict(zip([c.value for c in ASSET_CLASSES], totals.tolist()))
 
     def chart(self, color_map: str = "finary") -> Dict[str, Any]:
         """:returns: A Highcharts configuration with the data to be displayed."""
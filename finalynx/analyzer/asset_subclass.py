@@ -1,12 +1,12 @@
 from typing import Any
 from typing import Dict
+from typing import Optional
 
-from ..portfolio import AssetClass
-from ..portfolio import AssetSubclass
-from ..portfolio import Folder
-from ..portfolio import Line
 from ..portfolio import Node
 from .analyzer import Analyzer
+from .asset_class import AnalyzeAssetClasses
+from .snapshot import ASSET_SUBCLASSES
+from .snapshot import PortfolioSnapshot
 
 
 class AnalyzeAssetSubclasses(Analyzer):
@@ -100,63 +100,19 @@ class AnalyzeAssetSubclasses(Analyzer):
         "Unknown": "#b54053",
     }
 
+    def __init__(self, node: Node, snapshot: Optional[PortfolioSnapshot] = None):
+        """:param snapshot: Optional snapshot containing `node` to reuse between analyses,
+        it must be up to date with the tree (see `PortfolioSnapshot.refresh`)."""
+        super().__init__(node)
+        self.snapshot = snapshot if snapshot else PortfolioSnapshot(node)
+
     def analyze(self) -> Dict[str, Any]:
         """:returns: A dictionary with keys as the asset class names and values as the sum of
         investments corresponding to each class. Two-layer dictionary with classes and subclasses."""
-        return self._recursive_merge(self.node)
+        return AnalyzeAssetClasses(self.node, self.snapshot).analyze()
 
     def analyze_flat(self) -> Dict[str, float]:
         """:returns: A dictionary with keys as the Sub asset class names and values as the
-        sum of investments corresponding to each subclass."""
-        return self._recursive_merge_flat(self.node)
-
-    def _recursive_merge_flat(self, node: Node) -> Dict[str, Any]:
-        """Internal method for recursive searching."""
-        total = {}
-
-        # Lines simply return their own amount
-        if isinstance(node, Line):
-            total[node.asset_subclass.value] = node.get_amount()
-            return total
-
-        # Folders merge what the children return
-        elif isinstance(node, Folder):
-            for child in node.children:
-                for key, value in self._recursive_merge_flat(child).items():
-                    if key in total.keys():
-                        total[key] += value
-                    else:
-                        total[key] = value
-                    # for subkey, subvalue in value["subclasses"].items():
-                    #     total[subkey] += subvalue
-            return total
-
-        # Safeguard for future versions
-        else:
-            raise ValueError(f"Unknown node type '{type(node)}'.")
-
-    def _recursive_merge(self, node: Node) -> Dict[str, Any]:
-        """Internal method for recursive searching."""
-        result: Dict[str, Any] = {
-            c.value: {"total": 0.0, "subclasses": {s.value: 0.0 for s in AssetSubclass}} for c in AssetClass
-        }
-
-        # Lines simply return their own amount
-        if isinstance(node, Line):
-            result[node.asset_class.value]["total"] = node.get_amount()
-            result[node.asset_class.value]["subclasses"][node.asset_subclass.value] = node.get_amount()
-            return result
-
-        # Folders merge what the children return
-        elif isinstance(node, Folder):
-            for child in node.children:
-                for key, subdict in self._recursive_merge(child).items():
-                    result[key]["total"] += subdict["total"]
-
-                    for subkey, subvalue in subdict["subclasses"].items():
-                        result[key]["subclasses"][subkey] += subvalue
-            return result
-
-        # Safeguard for future versions
-        else:
-            raise ValueError(f"Unknown node type '{type(node)}'.")
+        sum of investments corresponding to each subclass, in order of first appearance in the tree."""
+        codes, totals = self.snapshot.sum_in_order(self.snapshot.asset_subclasses, self.node)
+        return {ASSET_SUBCLASSES[code].value: total for code, total in zip(codes.tolist(), totals.tolist())}
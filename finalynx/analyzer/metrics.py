@@ -0,0 +1,48 @@
+from datetime import date
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import numpy as np
+
+from ..portfolio import Node
+from .analyzer import Analyzer
+from .snapshot import ASSET_CLASSES
+from .snapshot import ASSET_SUBCLASSES
+from .snapshot import ENVELOPE_STATES
+from .snapshot import PortfolioSnapshot
+
+
+class AnalyzeMetrics(Analyzer):
+    """Aims to compute the aggregates of `AnalyzeInvestmentStates`, `AnalyzeEnvelopes`,
+    `AnalyzeAssetClasses` (flat), `AnalyzeAssetSubclasses` (flat) and `AnalyzeLines` together.
+    :returns: a dictionary with the analysis names as keys and the same dictionaries as
+    the corresponding analyzers as values.
+    """
+
+    def __init__(self, node: Node, snapshot: Optional[PortfolioSnapshot] = None):
+        """:param snapshot: Optional snapshot containing `node` to reuse between analyses (e.g. during a
+        simulation), it must be up to date with the tree (see `PortfolioSnapshot.refresh`)."""
+        super().__init__(node)
+        self.snapshot = snapshot if snapshot else PortfolioSnapshot(node)
+
+    def analyze(self, target_date: date) -> Dict[str, Dict[str, float]]:
+        """:returns: A dictionary with keys `investment_states`, `envelopes`, `asset_classes`,
+        `asset_subclasses` and `lines`, computed with one grouped sum over the tree's lines for each key."""
+        snapshot = self.snapshot
+        states = snapshot.sum_by(snapshot.get_envelope_states(target_date), len(ENVELOPE_STATES), self.node)
+        asset_classes = snapshot.sum_by(snapshot.asset_classes, len(ASSET_CLASSES), self.node)
+
+        return {
+            "investment_states": dict(zip([s.value for s in ENVELOPE_STATES], states.tolist())),
+            "envelopes": self._sum_in_order(snapshot.envelope_name_ids, snapshot.envelope_names),
+            "asset_classes": dict(zip([c.value for c in ASSET_CLASSES], asset_classes.tolist())),
+            "asset_subclasses": self._sum_in_order(snapshot.asset_subclasses, [s.value for s in ASSET_SUBCLASSES]),
+            "lines": self._sum_in_order(snapshot.line_name_ids, snapshot.line_names),
+        }
+
+    def _sum_in_order(self, codes: np.ndarray, names: List[Any]) -> Dict[str, float]:
+        """Internal method to sum the amounts for each key, in the order of first appearance."""
+        order, totals = self.snapshot.sum_in_order(codes, self.node)
+        return {names[code]: total for code, total in zip(order.tolist(), totals.tolist())}
@@ -0,0 +1,175 @@
+"""
+Flat view of a portfolio tree to compute aggregates without walking the tree again.
+
+A `PortfolioSnapshot` lists the nodes in pre-order (each folder is followed by all of its descendants),
+so the descendants of a node are always a contiguous range of nodes and lines (Euler tour). The lines'
+attributes are stored in NumPy arrays of the same length, with enums and envelopes stored as integer
+codes. Any aggregation then becomes a single `np.bincount` over a range of lines, e.g.:
+
+```python
+snapshot = PortfolioSnapshot(portfolio)
+amounts = snapshot.sum_by(snapshot.asset_classes, len(AssetClass))  # Total amount of each asset class
+```
+
+The snapshot does not follow the tree: call `refresh` after changing the portfolio (amounts or structure).
+"""
+from datetime import date
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+
+from ..portfolio import Folder
+from ..portfolio import Line
+from ..portfolio import Node
+from ..portfolio.constants import AssetClass
+from ..portfolio.constants import AssetSubclass
+from ..portfolio.envelope import EnvelopeState
+
+# Enum members in declaration order, the index of each member is its code in the snapshot arrays
+ASSET_CLASSES = list(AssetClass)
+ASSET_SUBCLASSES = list(AssetSubclass)
+ENVELOPE_STATES = list(EnvelopeState)
+
+
+class PortfolioSnapshot:
+    """Structure-of-arrays copy of a portfolio tree, see the module description."""
+
+    def __init__(self, node: Node) -> None:
+        """:param node: Root of the tree to copy, usually a `Portfolio` (any folder or line works)."""
+        self.node = node
+        self._build()
+
+    def _build(self) -> None:
+        """Internal method to walk the tree once and fill all arrays."""
+        self.nodes: List[Node] = []
+        self.lines: List[Line] = []
+        parents: List[int] = []
+        line_starts: List[int] = []
+        self._layout: List[Tuple[Folder, List[Node]]] = []  # Children of each folder, to detect changes
+
+        # Pre-order walk, nodes are numbered in the order they are visited
+        stack: List[Tuple[Node, int]] = [(self.node, -1)]
+        while stack:
+            current, parent = stack.pop()
+            index = len(self.nodes)
+            self.nodes.append(current)
+            parents.append(parent)
+            line_starts.append(len(self.lines))
+            if isinstance(current, Line):
+                self.lines.append(current)
+            elif isinstance(current, Folder):
+                self._layout.append((current, list(current.children)))
+                stack.extend((child, index) for child in reversed(current.children))
+            else:
+                raise ValueError(f"Unknown node type '{type(current)}'.")
+
+        # Index of each node's parent (-1 for the root)
+        self.parents = np.array(parents, dtype=int)
+        self._indices = {id(node): i for i, node in enumerate(self.nodes)}
+
+        # The descendants of node `i` are the nodes `i + 1` to `node_ends[i] - 1`, and its lines are
+        # the lines `line_starts[i]` to `line_ends[i] - 1` (a subtree ends where the next sibling starts)
+        sizes = [1] * len(self.nodes)
+        for i in range(len(self.nodes) - 1, 0, -1):
+            sizes[parents[i]] += sizes[i]
+        self.node_ends = np.arange(len(self.nodes)) + np.array(sizes, dtype=int)
+        self.line_starts = np.array(line_starts, dtype=int)
+        self.line_ends = np.append(self.line_starts, len(self.lines))[self.node_ends]
+
+        # Codes of the lines' attributes, enums are numbered in declaration order and other
+        # values (envelopes, names, currencies) in order of first appearance in the tree
+        class_codes = {c: i for i, c in enumerate(ASSET_CLASSES)}
+        subclass_codes = {s: i for i, s in enumerate(ASSET_SUBCLASSES)}
+        self.asset_classes = np.array([class_codes[line.asset_class] for line in self.lines], dtype=int)
+        self.asset_subclasses = np.array([subclass_codes[line.asset_subclass] for line in self.lines], dtype=int)
+        self.envelopes, self.envelope_ids = self._encode([line.envelope for line in self.lines], skip=None)
+        self.currency_names, self.currency_ids = self._encode([line.get_currency() for line in self.lines])
+
+        # Lines and envelopes are also grouped by name ("Unknown" if not set) as several may have the same name
+        self.line_names, self.line_name_ids = self._encode([line.name or "Unknown" for line in self.lines])
+        self.envelope_names, self.envelope_name_ids = self._encode(
+            [line.envelope.name if line.envelope else "Unknown" for line in self.lines]
+        )
+
+        # Expected yearly performance and current amount of each line
+        self.perfs = np.array([line.get_perf().expected for line in self.lines], dtype=float)
+        self.amounts = np.zeros(len(self.lines))
+        self.update_amounts()
+
+    @staticmethod
+    def _encode(values: List[Any], skip: Any = ...) -> Tuple[List[Any], np.ndarray]:
+        """Internal method to number distinct values in order of first appearance.
+        :param skip: Value coded as -1 instead of being numbered (e.g. lines without envelope).
+        :returns: The distinct values and the code of each value."""
+        codes: Dict[Any, int] = {}
+        for value in values:
+            if value is not skip and value not in codes:
+                codes[value] = len(codes)
+        return list(codes), np.array([-1 if v is skip else codes[v] for v in values], dtype=int)
+
+    def is_outdated(self) -> bool:
+        """:returns: True if a folder's children were added, removed or replaced since the snapshot was built."""
+        return any(folder.children != children for folder, children in self._layout)
+
+    def refresh(self) -> None:
+        """Update the snapshot after the portfolio changed: rebuild everything if the tree structure
+        changed, otherwise only read the line amounts again (much faster)."""
+        if self.is_outdated():
+            self._build()
+        else:
+            self.update_amounts()
+
+    def update_amounts(self) -> None:
+        """Read the current amount of each line, assuming the tree structure did not change."""
+        self.amounts[:] = [line.get_amount() for line in self.lines]
+
+    def index(self, node: Node) -> int:
+        """:returns: The position of a node in `self.nodes`."""
+        if id(node) not in self._indices:
+            raise ValueError(f"Node '{node.name}' is not in the snapshot.")
+        return self._indices[id(node)]
+
+    def get_line_range(self, node: Optional[Node] = None) -> slice:
+        """:returns: The slice of the line arrays with all lines below `node` (all lines by default)."""
+        if node is None:
+            return slice(0, len(self.lines))
+        i = self.index(node)
+        return slice(int(self.line_starts[i]), int(self.line_ends[i]))
+
+    def sum_by(self, codes: np.ndarray, n_codes: int, node: Optional[Node] = None) -> np.ndarray:
+        """Sum the line amounts with the same code.
+        :param codes: One of the code arrays of the snapshot (e.g. `asset_classes`), negative codes are ignored.
+        :param n_codes: Length of the result, at least the number of possible codes.
+        :param node: Only sum the lines below this node, defaults to the snapshot's root.
+        :returns: The total amount of each code, lines are added in tree order."""
+        lines = self.get_line_range(node)
+        codes, amounts = codes[lines], self.amounts[lines]
+        valid = codes >= 0
+        return np.bincount(codes[valid], weights=amounts[valid], minlength=n_codes)[:n_codes]
+
+    def get_folder_amounts(self) -> np.ndarray:
+        """:returns: The total amount below each node of `self.nodes` (a line's own amount)."""
+        totals = np.concatenate([[0.0], np.cumsum(self.amounts)])
+        result: np.ndarray = totals[self.line_ends] - totals[self.line_starts]
+        return result
+
+    def get_envelope_states(self, target_date: date) -> np.ndarray:
+        """:returns: The code of each line's envelope state at this date (`Unknown` for lines without envelope)."""
+        codes = {s: i for i, s in enumerate(ENVELOPE_STATES)}
+        states = [codes[e.get_state(target_date)] for e in self.envelopes] + [codes[EnvelopeState.UNKNOWN]]
+        result: np.ndarray = np.array(states, dtype=int)[self.envelope_ids]  # -1 is the last state (unknown)
+        return result
+
+    def sum_in_order(self, codes: np.ndarray, node: Optional[Node] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Sum the line amounts with the same code, keeping only the codes used below `node`.
+        :param codes: One of the code arrays of the snapshot (e.g. `line_name_ids`), codes must not be negative.
+        :param node: Only sum the lines below this node, defaults to the snapshot's root.
+        :returns: The codes in order of first appearance in the tree, and the total amount of each code."""
+        used = codes[self.get_line_range(node)]
+        unique, first = np.unique(used, return_index=True)
+        order: np.ndarray = unique[np.argsort(first)]
+        return order, self.sum_by(codes, int(unique[-1]) + 1 if len(unique) else 0, node)[order]
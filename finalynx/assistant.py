@@ -6,24 +6,26 @@ from typing import Dict
 from typing import List
 from typing import Optional
 from typing import Tuple
+from typing import TYPE_CHECKING
 
 import finalynx.theme
 from docopt import docopt  # type: ignore[import]
-from finalynx import Dashboard
 from finalynx import Fetch
 from finalynx import Portfolio
-from finalynx.budget.budget import Budget
 from finalynx.config import get_active_theme as TH
 from finalynx.config import set_active_theme
+from finalynx.config import set_cache_dir
+from finalynx.config import set_cache_format
 from finalynx.copilot.recommendations import render_recommendations
+from finalynx.fetch.cache import CACHE_FORMATS
 from finalynx.fetch.source_base_line import SourceBaseLine
-from finalynx.fetch.source_finary import SourceFinary
 from finalynx.portfolio.bucket import Bucket
 from finalynx.portfolio.envelope import Envelope
 from finalynx.portfolio.folder import Sidecar
+from finalynx.simulator.montecarlo import MonteCarloTimeline
 from finalynx.simulator.timeline import Simulation
 from finalynx.simulator.timeline import Timeline
-from html2image import Html2Image  # type: ignore[import]
+from finalynx.simulator.vectorized import VectorizedTimeline
 from rich import inspect  # noqa F401
 from rich import pretty
 from rich import print  # noqa F401
@@ -37,8 +39,14 @@ from rich.tree import Tree
 
 from .__meta__ import __version__
 from .console import console
+from .import_profile import get_import_profiler
+from .profiler import profiler
 from .usage import __doc__
 
+# Dashboard, budget, image export and fetch sources are imported only when used, see `--import-profile`
+if TYPE_CHECKING:
+    from finalynx.budget.budget import Budget
+
 # Enable rich's features
 
 traceback.install()
@@ -60,6 +68,16 @@ class Assistant:
     :param force_signin: Sign in to Finary even if there is an existing cookies file, defaults to False.
     :param hide_amount: Display your portfolio with dots instead of the real values (easier to share), defaults to False.
     :param hide_root: Display your portfolio without the root (cosmetic preference), defaults to False.
+    :param parallel_fetch: Fetch from all sources at the same time instead of one after the other, defaults to False.
+    :param cache_dir: Folder where the fetched data is cached, defaults to the user cache directory.
+    :param cache_format: Format of the cache files, "json" (compact) or "gzip", defaults to "json".
+    :param background_refresh: Use outdated cached data immediately and fetch fresh data in the background, the
+    portfolio is updated when it arrives (see `refresh`). Sources that would need to sign in interactively
+    (e.g. Finary without a saved session) keep the outdated data instead, defaults to False.
+    :param budget: Custom `Budget` instance, e.g. to store the expenses in a local `SQLiteStore`.
+    :param profile: Measure the time spent in each step of `run` and print it at the end, defaults to False.
+    :param profile_trace: Optional path to save the measured steps as a Chrome trace (also readable by
+    speedscope), enables `profile`.
     """
 
     def __init__(
@@ -80,12 +98,19 @@ class Assistant:
         enable_export: bool = True,
         export_dir: str = "logs",
         active_sources: Optional[List[str]] = None,
+        parallel_fetch: bool = False,
+        cache_dir: Optional[str] = None,
+        cache_format: str = "json",
+        background_refresh: bool = False,
+        profile: bool = False,
+        profile_trace: Optional[str] = None,
         theme: Optional[finalynx.theme.Theme] = None,
         sidecars: Optional[List[Sidecar]] = None,
         ignore_argv: bool = False,
         # Budget options
         check_budget: bool = False,
         interactive: bool = False,
+        budget: Optional["Budget"] = None,
         # Simulation options
         simulation: Optional[Simulation] = None,
     ):
@@ -105,6 +130,12 @@ class Assistant:
         self.enable_export = enable_export
         self.export_dir = export_dir
         self.active_sources = active_sources if active_sources else ["finary"]
+        self.parallel_fetch = parallel_fetch
+        self.cache_dir = cache_dir
+        self.cache_format = cache_format
+        self.background_refresh = background_refresh
+        self.profile = profile
+        self.profile_trace = profile_trace
         self.sidecars = sidecars if sidecars else []
         self.check_budget = check_budget
         self.interactive = interactive
@@ -118,16 +149,44 @@ class Assistant:
         if not ignore_argv:
             self._parse_args()
 
+        # Set where and how the fetched data is cached
+        if self.cache_format not in CACHE_FORMATS:
+            raise ValueError("Cache format options: " + ", ".join(CACHE_FORMATS))
+        set_cache_dir(self.cache_dir)
+        set_cache_format(self.cache_format)
+
+        # Start measuring each step if enabled, see `finalynx.profiler`
+        if self.profile or self.profile_trace:
+            profiler.enable()
+
         # Create the fetching manager instance
-        self._fetch = Fetch(self.portfolio, self.clear_cache, self.ignore_orphans)
-        self.budget = Budget()
+        self._fetch = Fetch(
+            self.portfolio,
+            self.clear_cache,
+            self.ignore_orphans,
+            parallel=self.parallel_fetch,
+            revalidate=self.background_refresh,
+        )
+        self._budget = budget
 
         # Initialize the simulation timeline with the initial user events
-        self._timeline = Timeline(simulation, self.portfolio, self.buckets) if simulation else None
+        self._timeline: Optional[Timeline] = None
+        if simulation:
+            engine = VectorizedTimeline if simulation.vectorized else Timeline
+            self._timeline = engine(simulation, self.portfolio, self.buckets)
 
         # Store the portfolio renders for each simulation date (if enabled)
         self._timeline_renders: List[Any] = []
 
+    @property
+    def budget(self) -> "Budget":
+        """Budget instance, created when first used so that its dependencies are only imported if needed."""
+        if self._budget is None:
+            from finalynx.budget.budget import Budget
+
+            self._budget = Budget()
+        return self._budget
+
     def add_source(self, source: SourceBaseLine) -> None:
         """Register a source, either defined in your own config or from the available Finalynx sources
         using `from finalynx.fetch.source_any import SourceAny`."""
@@ -191,6 +250,18 @@ class Assistant:
             self.export_dir = args["--export-dir"]
         if args["--sources"]:
             self.active_sources = str(args["--sources"]).split(",")
+        if args["--parallel-fetch"]:
+            self.parallel_fetch = True
+        if args["--cache-dir"]:
+            self.cache_dir = args["--cache-dir"]
+        if args["--cache-format"]:
+            self.cache_format = str(args["--cache-format"])
+        if args["--background-refresh"]:
+            self.background_refresh = True
+        if args["--profile"]:
+            self.profile = True
+        if args["--profile-trace"]:
+            self.profile_trace = str(args["--profile-trace"])
         if args["--future"] and self.simulation:
             self.simulation.print_final = True
         if args["--each-step"] and self.simulation:
@@ -213,24 +284,30 @@ class Assistant:
         run your simulation, generate recommendations, and format the output nicely to the console.
         """
 
-        # Fetch from the online sources and process the portfolio
+        # Fetch from the online sources and process the portfolio, only list what was fetched if it will be shown
+        self._fetch.build_tree = self.show_data
         fetched_tree = self.initialize()
 
         # Fetch the budget from N26 if enabled
         if self.check_budget:
-            fetched_tree.add(self.budget.fetch(self.clear_cache, self.force_signin))
+            with profiler.span("budget"):
+                fetched_tree.add(self.budget.fetch(self.clear_cache, self.force_signin))
             console.log("[bold]Tip:[/] run again with -I or --interactive review the expenses 👀")
 
         # Render the console elements
-        main_frame = self.render_mainframe()
-        dict_panels, render_panels = self.render_panels()
+        with profiler.span("render"):
+            main_frame = self.render_mainframe()
+        with profiler.span("panels"):
+            dict_panels, render_panels = self.render_panels()
         renders: List[Any] = [main_frame, render_panels]
         if self.check_budget:
-            renders.append(self.budget.render_expenses())
+            with profiler.span("budget"):
+                renders.append(self.budget.render_expenses())
 
         # Save the current portfolio to a file. Useful for statistics later
         if self.enable_export:
-            self.export_json(self.export_dir)
+            with profiler.span("export"):
+                self.export_json(self.export_dir)
 
         # Show the data fetched from Finary if specified
         if self.show_data:
@@ -239,7 +316,8 @@ class Assistant:
         # Run the simulation if there are events defined
         if self.simulation:
             # Add the simulation summary to the performance panel in the console
-            dict_panels["performance"].add(self.simulate())
+            with profiler.span("simulation"):
+                dict_panels["performance"].add(self.simulate())
 
             # If enabled by the user, print the portfolio at each simulation date
             if self.simulation.print_each_step:
@@ -255,9 +333,19 @@ class Assistant:
                 console.log(f"    [bold]Tip:[/] Use --future to display the final portfolio in {end_year}.\n")
 
         # Display the entire portfolio and associated recommendations
-        for render in renders:
-            console.print("\n\n", render)
-        console.print("\n")
+        with profiler.span("print"):
+            for render in renders:
+                console.print("\n\n", render)
+            console.print("\n")
+
+        # Show where the time went if enabled with --profile
+        if self.profile or self.profile_trace:
+            self.show_profile()
+
+        # Show how long each module took to import if enabled with --import-profile
+        import_profiler = get_import_profiler()
+        if import_profiler:
+            console.print(import_profiler.render(), "\n")
 
         # Interactive review of the budget expenses if enabled
         if self.check_budget and self.interactive:
@@ -267,19 +355,29 @@ class Assistant:
         if self.launch_dashboard:
             self.dashboard()
 
+        # Let the background refresh finish so that the fresh data is saved for the next run
+        elif self._fetch.is_refreshing:
+            console.log("Waiting for the background refresh to finish...")
+            if self.refresh(wait=True):
+                console.log("[bold]Tip:[/] run again to display the refreshed data.")
+
     def initialize(self) -> Tree:
         """Fetch investments online from all sources and process the portfolio internally.
         Call this method first if you're not using run()."""
 
         # Add default sources based on user input
         if "finary" in self.active_sources:
+            from finalynx.fetch.source_finary import SourceFinary
+
             self._fetch.add_source(SourceFinary(self.force_signin))
 
         # Launch the fetching process and fill tree with current valuations fetched from Finary
-        fetched_tree = self._fetch.fetch_from(self.active_sources)
+        with profiler.span("fetch"):
+            fetched_tree = self._fetch.fetch_from(self.active_sources)
 
         # Mandatory step after fetching to process some targets and buckets
-        self.portfolio.process()
+        with profiler.span("process"):
+            self.portfolio.process()
 
         # Validate processing results
         for _ in [b for b in self.buckets if b.get_used_amount() != b.get_max_amount()]:
@@ -287,6 +385,20 @@ class Assistant:
 
         return fetched_tree
 
+    def refresh(self, wait: bool = False) -> bool:
+        """Update and process the portfolio again with the fresh data fetched in the background
+        when `background_refresh` is enabled. Call `initialize()` first.
+        :param wait: Wait for the background refresh to finish instead of returning immediately.
+        :returns: True if the portfolio has been updated, False if there was nothing new yet.
+        """
+        if not self._fetch.apply_refresh(wait):
+            return False
+
+        for bucket in self.buckets:
+            bucket.reset()
+        self.portfolio.process()
+        return True
+
     def simulate(self) -> Tree:
         """Simulate your portfolio's future with the `Simulation` configuration
         passed in the `Assistant` constructor.
@@ -298,9 +410,18 @@ class Assistant:
         console.log("Launching simulation...")
         tree = Tree("\n[bold]Worth", guide_style=TH().TREE_BRANCH)
 
+        # Optionally simulate random paths alongside, created now to start from the current amounts
+        monte_carlo = None
+        if self.simulation.monte_carlo:
+            monte_carlo = MonteCarloTimeline(self.simulation, self.portfolio, self.buckets)
+
         # Utility function to append a new formatted line to the tree
         def append_worth(year: int, amount: float) -> None:
-            tree.add(f"[{TH().TEXT}]{year}:       [{TH().ACCENT}][bold]{round(amount / 1000):>4}[/] k€")
+            line = f"[{TH().TEXT}]{year}:       [{TH().ACCENT}][bold]{round(amount / 1000):>4}[/] k€"
+            if monte_carlo:
+                bands = zip(monte_carlo.PERCENTILES, monte_carlo.get_current_percentiles())
+                line += f"[{TH().HINT}]  " + " ".join(f"P{p} {round(v / 1000)} k€" for p, v in bands) + "[/]"
+            tree.add(line)
 
         # Run the simulation and append the results to the tree every `step_years`
         append_worth(date.today().year, self.portfolio.get_amount())
@@ -308,6 +429,8 @@ class Assistant:
             range(date.today().year + 1, self._timeline.end_date.year),
             description=f"Simulating until [{TH().ACCENT} bold]{self._timeline.end_date}[/]...",
         ):
+            if monte_carlo:
+                monte_carlo.goto(date(year, 12, 31))
             self._timeline.goto(date(year, 12, 31))
 
             if (year - date.today().year) % self.simulation.step_years == 0:
@@ -320,6 +443,8 @@ class Assistant:
                     self._timeline_renders.append(Panel(self.render_mainframe(), title=title))
 
         # Run until the end date and append the final result
+        if monte_carlo:
+            monte_carlo.run()
         self._timeline.run()
         append_worth(self._timeline.current_date.year, self.portfolio.get_amount())
         console.log(
@@ -378,10 +503,24 @@ class Assistant:
             node.add(f"[{TH().TEXT}]Inflation:  [bold][gold1]{self.simulation.inflation:.2f} %[/] / year")
         return tree
 
+    def show_profile(self) -> None:
+        """Print the time spent in each step and the counters recorded so far, and save them
+        as a trace if `profile_trace` is set. Only available with `profile` or `profile_trace`."""
+        console.print(profiler.render(), "\n")
+        if self.profile_trace:
+            try:
+                profiler.save_trace(self.profile_trace)
+                console.log(f"Saved profile trace to '{self.profile_trace}'")
+            except OSError as e:
+                console.log(f"[yellow][bold]Warning:[/] Couldn't save the profile trace ({e})")
+
     def dashboard(self) -> None:
         """Launch an interactive web dashboard! Call either run() or initialize() first."""
+        from finalynx.dashboard import Dashboard
+
         console.log("Launching dashboard.")
-        Dashboard(hide_amounts=self.hide_amounts).run(self.portfolio, self._timeline)
+        refresh = self.refresh if self.background_refresh else None
+        Dashboard(hide_amounts=self.hide_amounts).run(self.portfolio, self._timeline, refresh)
 
     def export_json(self, dirpath: str) -> None:
         """Save everything in a JSON file. Can be used for data analysis in future
@@ -438,6 +577,8 @@ class Assistant:
 
         # Convert the HTML to PNG
         try:
+            from html2image import Html2Image  # type: ignore[import]
+
             Html2Image(output_path=full_path).screenshot(html_str=output_html, save_as=file_name, size=size)
             console.print(f"Saved portfolio PNG to '{full_path + file_name}'")
         except Exception as e:
@@ -0,0 +1,23 @@
+"""
+Benchmarks measuring how Finalynx scales with the size of the portfolio.
+
+Synthetic portfolios are generated with configurable depth, fan-out, number of lines, shared folders, buckets,
+envelopes and simulation events (see `generator`). The suites measure rendering, processing, simulation, matching
+fetched lines and exporting (see `suites`), and the results can be saved to JSON files to compare commits:
+
+```sh
+python -m finalynx.bench --size=medium --output=bench/before.json
+python -m finalynx.bench --size=medium --compare=bench/before.json
+```
+"""
+# flake8: noqa
+from .generator import generate_portfolio
+from .generator import SIZES
+from .generator import SyntheticConfig
+from .generator import SyntheticPortfolio
+from .runner import Benchmark
+from .runner import load_results
+from .runner import render_results
+from .runner import run_benchmarks
+from .runner import save_results
+from .suites import get_benchmarks
@@ -0,0 +1,47 @@
+"""
+Run the Finalynx benchmarks with {code}`python -m finalynx.bench [options]`, see `finalynx.bench`.
+"""
+from docopt import docopt  # type: ignore[import]
+from rich.markup import escape
+
+from ..__meta__ import __version__
+from ..console import console
+from .runner import load_results
+from .runner import render_results
+from .runner import run_benchmarks
+from .runner import save_results
+from .suites import get_benchmarks
+
+__doc__ = f"""
+Finalynx benchmarks v{__version__}
+Usage:
+  finalynx.bench [--size=string]... [--filter=string] [--rounds=int] [--output=path] [--compare=path]
+  finalynx.bench (-h | --help)
+
+Options:
+  -h --help            Show this help message and exit
+
+  --size=string        Size of the synthetic portfolios: small, medium or large (can be repeated), defaults to medium
+  --filter=string      Only run the benchmarks whose name contains this string
+  --rounds=int         Number of measured calls of each benchmark, defaults to 5
+  --output=path        Save the results to a JSON file
+  --compare=path       Compare the results with a JSON file saved by a previous run (e.g. on another commit)
+"""
+
+if __name__ == "__main__":
+    args = docopt(__doc__, version=__version__)
+
+    benchmarks = [b for size in args["--size"] or ["medium"] for b in get_benchmarks(size)]
+    if args["--filter"]:
+        benchmarks = [b for b in benchmarks if args["--filter"] in b.name]
+
+    results = run_benchmarks(
+        benchmarks,
+        rounds=int(args["--rounds"] or 5),
+        on_result=lambda r: console.log(f"{escape(r['name'])}: {r['stats']['mean'] * 1000:.2f} ms"),
+    )
+    if args["--output"]:
+        save_results(results, args["--output"])
+        console.log(f"Saved benchmark results to '{args['--output']}'")
+
+    console.print(render_results(results, load_results(args["--compare"]) if args["--compare"] else None))
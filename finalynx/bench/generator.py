@@ -0,0 +1,191 @@
+"""
+Generate synthetic portfolios of any size to measure how Finalynx scales (see `finalynx.bench`).
+
+The generated portfolios use the same building blocks as a real configuration: nested folders with targets,
+lines with envelopes and performances, shared folders fed by buckets, and simulation events. The result only
+depends on the settings and the seed, so the same portfolio is generated on each run to compare commits.
+"""
+import random
+from dataclasses import dataclass
+from datetime import date
+from datetime import timedelta
+from typing import List
+from typing import Optional
+
+from ..portfolio.bucket import Bucket
+from ..portfolio.constants import AssetClass
+from ..portfolio.constants import AssetSubclass
+from ..portfolio.constants import LinePerf
+from ..portfolio.envelope import AV
+from ..portfolio.envelope import Envelope
+from ..portfolio.envelope import PEA
+from ..portfolio.folder import Folder
+from ..portfolio.folder import Portfolio
+from ..portfolio.folder import SharedFolder
+from ..portfolio.line import Line
+from ..portfolio.node import Node
+from ..portfolio.targets import TargetMin
+from ..portfolio.targets import TargetRange
+from ..portfolio.targets import TargetRatio
+from ..simulator.actions import AddLineAmount
+from ..simulator.events import Event
+from ..simulator.events import Salary
+from ..simulator.recurrence import MonthlyRecurrence
+from ..simulator.timeline import Simulation
+
+
+@dataclass
+class SyntheticConfig:
+    """Settings of a synthetic portfolio."""
+
+    # Number of folder levels below the root
+    depth: int = 3
+
+    # Number of subfolders in each folder (except the last level, which only holds lines)
+    fanout: int = 4
+
+    # Total number of lines, spread evenly over the folders of the last level
+    n_lines: int = 200
+
+    # Number of buckets, each bucket holds `bucket_lines` lines outside of the tree
+    n_buckets: int = 1
+    bucket_lines: int = 3
+
+    # Number of shared folders, each one fed by one of the buckets
+    n_shared_folders: int = 2
+
+    # Number of envelopes, each line has an envelope with a probability of `envelope_ratio`
+    n_envelopes: int = 4
+    envelope_ratio: float = 0.5
+
+    # Number of additional recurring events in the simulation (one salary is always added)
+    n_events: int = 5
+
+    # Number of simulated years
+    years: int = 20
+
+    # Seed of the random generator, the same seed always generates the same portfolio
+    seed: int = 0
+
+
+@dataclass
+class SyntheticPortfolio:
+    """Configuration generated by `generate_portfolio`, ready to be used with an `Assistant` or a `Timeline`."""
+
+    portfolio: Portfolio
+    buckets: List[Bucket]
+    envelopes: List[Envelope]
+    simulation: Simulation
+
+    def get_lines(self) -> List[Line]:
+        """:returns: All lines in the portfolio tree (not including the bucket lines)."""
+        lines: List[Line] = []
+        stack: List[Node] = [self.portfolio]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, SharedFolder):
+                continue
+            if isinstance(node, Folder):
+                stack.extend(reversed(node.children))
+            elif isinstance(node, Line):
+                lines.append(node)
+        return lines
+
+
+# Sizes used by the benchmark suites, from a small personal portfolio to a very large one
+SIZES = {
+    "small": SyntheticConfig(depth=2, fanout=3, n_lines=30, n_events=2, years=10),
+    "medium": SyntheticConfig(),
+    "large": SyntheticConfig(depth=4, fanout=5, n_lines=2000, n_buckets=3, n_shared_folders=6, n_events=20),
+}
+
+
+def generate_portfolio(config: Optional[SyntheticConfig] = None) -> SyntheticPortfolio:
+    """Generate a portfolio with random names, amounts, targets, envelopes and events.
+    :param config: Settings of the portfolio, defaults to the "medium" size.
+    :returns: The portfolio with its buckets, envelopes and simulation configuration.
+    """
+    config = config if config else SyntheticConfig()
+    rng = random.Random(config.seed)
+    today = date.today()
+
+    def _random_envelope() -> Optional[Envelope]:
+        if not envelopes or rng.random() >= config.envelope_ratio:
+            return None
+        return rng.choice(envelopes)
+
+    def _random_line(name: str) -> Line:
+        return Line(
+            name,
+            asset_class=rng.choice(list(AssetClass)),
+            asset_subclass=rng.choice(list(AssetSubclass)),
+            target=rng.choice([None, TargetRatio(rng.randint(5, 50)), TargetMin(rng.randint(100, 5000))]),
+            amount=round(rng.uniform(0, 20000), 2),
+            perf=LinePerf(rng.uniform(-1, 8), pessimistic=rng.uniform(-10, 0), optimistic=rng.uniform(5, 15)),
+            envelope=_random_envelope(),
+        )
+
+    # Envelopes of various types and ages
+    envelope_types = [Envelope, PEA, AV]
+    envelopes: List[Envelope] = [
+        envelope_types[i % len(envelope_types)](
+            f"Envelope {i}", f"E{i:02d}", today - timedelta(days=rng.randint(0, 10 * 365))  # type: ignore
+        )
+        for i in range(config.n_envelopes)
+    ]
+
+    # Buckets with their own lines, used by the shared folders
+    buckets = [
+        Bucket(f"Bucket {i}", [_random_line(f"Bucket {i} line {j}") for j in range(config.bucket_lines)])
+        for i in range(config.n_buckets)
+    ]
+
+    # Nested folders, the lines are spread over the folders of the last level (or the root if depth is 0)
+    leaves: List[Folder] = []
+
+    def _random_folder(name: str, level: int) -> Folder:
+        n_children = config.fanout if level < config.depth else 0
+        folder = Folder(
+            name,
+            target=rng.choice([None, TargetRatio(rng.randint(5, 50)), TargetRange(1000, rng.randint(2000, 50000))]),
+            children=[_random_folder(f"{name}.{i}", level + 1) for i in range(n_children)],
+        )
+        if level == config.depth:
+            leaves.append(folder)
+        return folder
+
+    n_children = config.fanout if config.depth > 0 else 0
+    portfolio = Portfolio(children=[_random_folder(f"Folder {i}", 1) for i in range(n_children)])
+    leaves = leaves if leaves else [portfolio]
+    for i in range(config.n_lines):
+        leaves[i % len(leaves)].add_child(_random_line(f"Line {i}"))
+
+    # Shared folders are added to random folders of the last level
+    for i in range(config.n_shared_folders if buckets else 0):
+        bucket, target_amount = buckets[i % len(buckets)], rng.randint(1, 20) * 1000
+        shared_folder = SharedFolder(f"Shared folder {i}", bucket, target_amount=target_amount)
+        rng.choice(leaves).add_child(shared_folder)
+
+    # Scale the random ratios so that the ratio targets of each folder's children sum to 100
+    folders: List[Folder] = [portfolio]
+    while folders:
+        folder = folders.pop()
+        folders.extend(c for c in folder.children if isinstance(c, Folder) and not isinstance(c, SharedFolder))
+        children = [(c, c.target.target_ratio) for c in folder.children if isinstance(c.target, TargetRatio)]
+        total = sum(ratio for _, ratio in children)
+        ratios = [int(ratio * 100 // total) for _, ratio in children]
+        for (child, _), ratio in zip(children, ratios[:-1] + [100 - sum(ratios[:-1])]):
+            child.target = TargetRatio(ratio)
+
+    # A salary and some recurring investments on random lines
+    lines = SyntheticPortfolio(portfolio, buckets, envelopes, Simulation()).get_lines()
+    events: List[Event] = []
+    if lines:
+        events.append(Salary(rng.choice(lines), income=3000, expenses=2000))
+        for i in range(config.n_events):
+            day = rng.randint(1, 28)
+            action = AddLineAmount(rng.choice(lines), round(rng.uniform(50, 500), 2))
+            events.append(Event(action, MonthlyRecurrence(day).next(today), MonthlyRecurrence(day), f"Event {i}"))
+    simulation = Simulation(events=events, end_date=today + timedelta(days=365 * config.years))
+
+    return SyntheticPortfolio(portfolio, buckets, envelopes, simulation)
@@ -0,0 +1,173 @@
+"""
+Minimal benchmark runner. Results are saved in the same JSON structure as `pytest-benchmark`
+(machine and commit information, then the statistics of each benchmark) to compare runs across commits.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from rich.markup import escape
+from rich.table import Table
+
+from ..__meta__ import __version__
+from ..config import get_active_theme as TH
+from ..console import console
+
+
+@dataclass
+class Benchmark:
+    """A function to measure. `setup` is called before each round (not measured) and its
+    result is passed to `func`, e.g. to run each round on a new portfolio."""
+
+    name: str
+    group: str
+    func: Callable[[Any], Any]
+    setup: Optional[Callable[[], Any]] = None
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    def run(self, rounds: int = 5, warmup: int = 1) -> Dict[str, Any]:
+        """Call the function `warmup` times without measuring it, then `rounds` times.
+        :returns: The benchmark information and timing statistics in seconds."""
+        times: List[float] = []
+        for i in range(warmup + rounds):
+            arg = self.setup() if self.setup else None
+            start = time.perf_counter()
+            self.func(arg)
+            if i >= warmup:
+                times.append(time.perf_counter() - start)
+
+        mean = statistics.mean(times)
+        return {
+            "name": self.name,
+            "group": self.group,
+            "params": self.params,
+            "stats": {
+                "min": min(times),
+                "max": max(times),
+                "mean": mean,
+                "stddev": statistics.stdev(times) if len(times) > 1 else 0.0,
+                "median": statistics.median(times),
+                "rounds": len(times),
+                "total": sum(times),
+                "ops": 1 / mean if mean else 0.0,
+                "data": times,
+            },
+        }
+
+
+def run_benchmarks(
+    benchmarks: List[Benchmark],
+    rounds: int = 5,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Run all benchmarks one after the other.
+    :param rounds: Number of measured calls of each benchmark.
+    :param on_result: Optional function called with the result of each benchmark once finished.
+    :returns: The results with the machine and commit information, see `save_results`."""
+    results = []
+    for benchmark in benchmarks:
+        # Mute the console logs of the measured methods (e.g. "Saved current portfolio to ...")
+        console.quiet = True
+        try:
+            results.append(benchmark.run(rounds))
+        finally:
+            console.quiet = False
+        if on_result:
+            on_result(results[-1])
+
+    return {
+        "machine_info": {
+            "node": platform.node(),
+            "processor": platform.processor(),
+            "machine": platform.machine(),
+            "python_implementation": platform.python_implementation(),
+            "python_version": platform.python_version(),
+            "system": platform.system(),
+            "release": platform.release(),
+        },
+        "commit_info": _get_commit_info(),
+        "finalynx_version": __version__,
+        "datetime": datetime.now().isoformat(),
+        "benchmarks": results,
+    }
+
+
+def _get_commit_info() -> Dict[str, Any]:
+    """Internal function to get the current git commit, if Finalynx is installed from a git repository."""
+    folder = os.path.dirname(os.path.abspath(__file__))
+
+    def _git(*args: str) -> str:
+        return subprocess.run(["git", *args], cwd=folder, capture_output=True, text=True, check=True).stdout.strip()
+
+    try:
+        return {
+            "id": _git("rev-parse", "HEAD"),
+            "branch": _git("rev-parse", "--abbrev-ref", "HEAD"),
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        }
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+
+
+def save_results(results: Dict[str, Any], path: str) -> None:
+    """Save the results returned by `run_benchmarks` to a JSON file."""
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=4)
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    """:returns: The results saved by `save_results`."""
+    with open(path) as f:
+        results: Dict[str, Any] = json.load(f)
+    return results
+
+
+def render_results(results: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> Table:
+    """Render the results in a table, optionally compared to the results of a previous run.
+    :param baseline: Results of a previous run, benchmarks are matched by name.
+    :returns: A `rich` table with the timing statistics in milliseconds."""
+    commit = results["commit_info"].get("id", "unknown commit")[:8]
+    table = Table(title=f"Finalynx v{results['finalynx_version']} ({commit})")
+    table.add_column("Benchmark")
+    table.add_column("Min", justify="right")
+    table.add_column("Mean", justify="right")
+    table.add_column("Stddev", justify="right")
+    table.add_column("Rounds", justify="right")
+
+    previous: Dict[str, Dict[str, Any]] = {}
+    if baseline:
+        previous = {b["name"]: b["stats"] for b in baseline["benchmarks"]}
+        table.add_column(f"vs {baseline['commit_info'].get('id', 'baseline')[:8]}", justify="right")
+
+    for benchmark in results["benchmarks"]:
+        stats = benchmark["stats"]
+        row = [
+            escape(benchmark["name"]),
+            f"{stats['min'] * 1000:.2f} ms",
+            f"{stats['mean'] * 1000:.2f} ms",
+            f"{stats['stddev'] * 1000:.2f} ms",
+            str(stats["rounds"]),
+        ]
+        if baseline:
+            if benchmark["name"] in previous:
+                change = (stats["mean"] / previous[benchmark["name"]]["mean"] - 1) * 100
+                color = TH().DELTA_NEG if change > 5 else TH().DELTA_POS if change < -5 else TH().TEXT
+                row.append(f"[{color}]{change:+.1f} %")
+            else:
+                row.append("-")
+        table.add_row(*row)
+    return table
@@ -0,0 +1,91 @@
+"""
+Benchmark suites measuring the main steps of a Finalynx run on synthetic portfolios: rendering,
+processing, simulation, matching fetched lines and exporting the portfolio.
+"""
+import tempfile
+from typing import Any
+from typing import List
+from typing import Optional
+
+from ..assistant import Assistant
+from ..fetch.fetch_line import FetchLine
+from ..fetch.line_matcher import LineMatcher
+from ..portfolio.folder import Sidecar
+from ..simulator.timeline import Timeline
+from ..simulator.vectorized import VectorizedTimeline
+from .generator import generate_portfolio
+from .generator import SIZES
+from .generator import SyntheticPortfolio
+from .runner import Benchmark
+
+
+def get_benchmarks(size: str = "medium") -> List[Benchmark]:
+    """Create all benchmarks for one of the synthetic portfolio sizes.
+    :param size: One of the sizes defined in `finalynx.bench.generator.SIZES`.
+    :returns: The benchmarks, named after the measured method and the size (e.g. `Portfolio.tree[medium]`).
+    """
+    if size not in SIZES:
+        raise ValueError("Size options: " + ", ".join(SIZES.keys()))
+    config = SIZES[size]
+
+    def _generate(process: bool = True) -> SyntheticPortfolio:
+        synthetic = generate_portfolio(config)
+        if process:
+            synthetic.portfolio.process()
+        return synthetic
+
+    # Portfolio reused by the benchmarks that don't modify it
+    shared = _generate()
+    export_dir = tempfile.TemporaryDirectory(prefix="finalynx_bench_")  # Deleted with the benchmarks
+
+    def _process(synthetic: SyntheticPortfolio) -> None:
+        synthetic.portfolio.process()
+
+    def _timeline_run(timeline: Timeline) -> None:
+        timeline.run()
+
+    def _record_metrics(timeline: Timeline) -> None:
+        timeline._record_metrics()
+
+    def _match_lines(fetch_lines: List[FetchLine]) -> None:
+        matcher = LineMatcher(shared.portfolio)
+        for fetch_line in fetch_lines:
+            matcher.match_lines(fetch_line)
+
+    def _export_json(assistant: Assistant) -> None:
+        assistant.export_json(export_dir.name)
+
+    def _get_fetch_lines() -> List[FetchLine]:
+        return [
+            FetchLine(
+                name=line.name,
+                id=line.key,
+                account=line.envelope.name if line.envelope else None,
+                amount=line.amount,
+                currency=line.currency,
+            )
+            for line in shared.get_lines()
+        ]
+
+    def _new_timeline(engine: Any, synthetic: Optional[SyntheticPortfolio] = None) -> Timeline:
+        """Create a timeline with one of the simulation engines, on a new portfolio by default."""
+        synthetic = synthetic if synthetic else _generate()
+        timeline: Timeline = engine(synthetic.simulation, synthetic.portfolio, synthetic.buckets)
+        return timeline
+
+    def _get_assistant() -> Assistant:
+        return Assistant(shared.portfolio, shared.buckets, shared.envelopes, ignore_argv=True)
+
+    def _benchmark(name: str, group: str, func: Any, setup: Any = None) -> Benchmark:
+        return Benchmark(f"{name}[{size}]", group, func, setup, params={"size": size, **config.__dict__})
+
+    return [
+        _benchmark("Portfolio.tree", "render", lambda _: shared.portfolio.tree()),
+        _benchmark("Portfolio.render_sidecar", "render", lambda _: shared.portfolio.render_sidecar(Sidecar())),
+        _benchmark("Folder.process", "process", _process, lambda: _generate(process=False)),
+        _benchmark("Timeline.run", "simulation", _timeline_run, lambda: _new_timeline(Timeline)),
+        _benchmark("VectorizedTimeline.run", "simulation", _timeline_run, lambda: _new_timeline(VectorizedTimeline)),
+        _benchmark("Timeline._record_metrics", "simulation", _record_metrics, lambda: _new_timeline(Timeline, shared)),
+        _benchmark("LineMatcher.match_lines", "fetch", _match_lines, _get_fetch_lines),
+        _benchmark("Assistant.export_json", "export", _export_json, _get_assistant),
+    ]
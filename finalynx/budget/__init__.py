@@ -1,6 +1,10 @@
 # flake8: noqa
 from .budget import Budget
+from .cube import ExpenseCube
 from .expense import Constraint
 from .expense import Expense
 from .expense import Period
 from .expense import Status
+from .storage import ExpenseStore
+from .storage import SheetsStore
+from .storage import SQLiteStore
@@ -2,36 +2,47 @@ from datetime import datetime
 from pathlib import Path
 from typing import List
 from typing import Optional
-from typing import TYPE_CHECKING
 from typing import Union
 
-import gspread
 from rich.prompt import Confirm
 from rich.table import Table
 from rich.tree import Tree
 
 from ..config import get_active_theme as TH
 from ..console import console
+from .cube import ExpenseCube
 from .expense import Constraint
 from .expense import Expense
 from .expense import Period
 from .expense import Status
-from .source_n26 import SourceN26
+from .storage import ExpenseStore
+from .storage import SheetsStore
 
 # noreorder
 from ._render import _render_expenses_table
 from ._review import _i_paid, _payback, _constraint, _period, _comment, _status  # noqa: F401
 
-if TYPE_CHECKING:
-    from gspread.worksheet import Worksheet
-
 
 class Budget:
     MAX_DISPLAY_ROWS = 10
 
-    def __init__(self, service_account_path: Union[str, Path, None] = None) -> None:
-        # Google Sheet that serves as the database of expenses, will be connected later
-        self._sheet: Optional[Worksheet] = None
+    def __init__(
+        self,
+        service_account_path: Union[str, Path, None] = None,
+        store: Optional[ExpenseStore] = None,
+        sync: Optional[ExpenseStore] = None,
+    ) -> None:
+        """Manage the expenses fetched from N26 and their review.
+        :param service_account_path: Path to the Google Sheets token file, defaults to the OS's default directory.
+        :param store: Database of expenses, defaults to a Google Sheet (`SheetsStore`). Use a `SQLiteStore`
+        to review and summarize expenses locally and offline.
+        :param sync: Optional second store updated with all expenses after each change, e.g. a `SheetsStore`
+        to keep a copy in Google Sheets while working with a `SQLiteStore`. If the main store is empty,
+        it is first filled with the expenses of the sync store.
+        """
+        # Database of expenses, will be connected later
+        self.store = store if store else SheetsStore(service_account_path)
+        self.sync = sync
 
         # Initialize the list of expenses, will be fetched later
         self.expenses: List[Expense] = []
@@ -41,65 +52,58 @@ class Budget:
         # Private copy that only includes expenses that need user review (calculated only once)
         self._pending_expenses: List[Expense] = []
 
-        # Path to the Google Sheets token file, defaults to the OS's default directory
-        self._gspread_token_path = (
-            Path(service_account_path) if service_account_path else gspread.auth.DEFAULT_SERVICE_ACCOUNT_FILENAME
-        )
-
     def set_gspread_token_path(self, path: Union[str, Path]) -> None:
         """Set the path to the Google Sheets token file, defaults to the OS's default directory."""
-        self._gspread_token_path = Path(path)
+        for store in [self.store, self.sync]:
+            if isinstance(store, SheetsStore):
+                store.service_account_path = Path(path)
 
     def fetch(self, clear_cache: bool, force_signin: bool = False) -> Tree:
         """Get expenses from all sources and return a rich tree to summarize the results.
-        This method also updates the google sheets table with the newly found expenses and
+        This method also updates the store with the newly found expenses and
         prepares the list of "pending" expenses that need user reviews."""
 
-        # Connect to the Google Sheet that serves as the database of expenses
-        with console.status(f"[bold {TH().ACCENT}]Connecting to Google Sheets...", spinner_style=TH().ACCENT):
-            try:
-                gs = gspread.service_account(filename=self._gspread_token_path)
-                sh = gs.open("Finalynx Expenses")
-                self._sheet = sh.worksheet("Sheet1")
-            except Exception as e:  # noqa
-                console.log(
-                    "[red][bold]Error:[/] Couldn't connect to GSheets, have you placed your "
-                    "personal service_account.json token file in your OS's default directory?"
-                )
-
-        # Make sure we are already connected to the source and the sheet
-        assert self._sheet is not None, "Something went wrong with the connection to GSheets"
-
-        # Fetch the latest values from the the sheet
-        sheet_values = self._sheet.get_all_values()
+        # Connect to the database of expenses, and to the sync target if any
+        for store in [self.store, self.sync] if self.sync else [self.store]:
+            with console.status(f"[bold {TH().ACCENT}]Connecting to {store.name}...", spinner_style=TH().ACCENT):
+                try:
+                    store.connect()
+                except Exception as e:
+                    console.log(f"[red][bold]Error:[/] Couldn't connect to {store.name} ({e})")
+                    if isinstance(store, SheetsStore):
+                        console.log(
+                            "[red][bold]Error:[/] Have you placed your personal service_account.json "
+                            "token file in your OS's default directory?"
+                        )
+                    raise
+
+        # Start from the expenses of the sync target the first time a new store is used
+        if self.sync and not self.store.get_expenses():
+            self.store.add_expenses(self.sync.get_expenses())
 
         # Initialize the N26 client with the credentials
         if Confirm.ask("Fetch expenses from N26?", default=True):
+            from .source_n26 import SourceN26  # Only imported when needed, loading n26 is slow
+
             source = SourceN26(force_signin)
             tree = source.fetch(clear_cache=bool(clear_cache or force_signin))
             self.balance = source.balance
 
-            # Get the new expenses from the source that are not in the sheet yet
-            last_timestamp = max([int(row[0]) for row in sheet_values if str(row[0]).isdigit()])
+            # Get the new expenses from the source that are not in the store yet
+            last_timestamp = self.store.get_last_timestamp()
             new_expenses = list(reversed([e for e in source.get_expenses() if e.timestamp > last_timestamp]))
             self.n_new_expenses = len(new_expenses)
 
-            # Add the new expenses to the sheet
+            # Add the new expenses to the store
             if self.n_new_expenses > 0:
-                first_empty_row = len(sheet_values) + 1
-
-                self._sheet.update(
-                    f"A{first_empty_row}:D{first_empty_row + len(new_expenses)}",
-                    [d.to_list()[:4] for d in new_expenses],
-                )
-
-            # Fetch the latest values from the sheet again to get the complete list of expenses
-            sheet_values = self._fetch_sheet_values()  # TODO improve
+                self.store.add_expenses(new_expenses)
         else:
             tree = Tree("N26 Skipped.")
 
         # From now on, we will work with the up-to-date list of expenses
-        self.expenses = [Expense.from_list(line, i + 2) for i, line in enumerate(sheet_values[1:])]
+        self.expenses = self.store.get_expenses()
+        if self.sync and self.n_new_expenses > 0:
+            self._sync()
 
         # Filter expenses to keep only the ones that are not skipped and incomplete
         self._pending_expenses = [
@@ -137,28 +141,15 @@ class Budget:
         assert self.expenses is not None, "Call `fetch()` first"
         tree = Tree("Budget", hide_root=True, guide_style=TH().HINT)
 
-        def _get_monthly_expenses(month: int, year: int) -> List[Expense]:
-            return [
-                e
-                for e in self.expenses
-                if e.as_datetime().month == month
-                and e.as_datetime().year == year
-                and e.status != Status.SKIP
-                and e.period == Period.MONTHLY
-            ]
+        # Aggregate all expenses once by month, period and constraint
+        cube = ExpenseCube(self.expenses)
 
         def _add_node(title: str, total: float, hint: str = "") -> Tree:
             return tree.add(f"[bold {TH().TEXT}]{title:<11}[/] [{TH().TEXT}]{str(total):>6} € [{TH().ACCENT}]{hint}[/]")
 
         # Get the yearly total
         now = datetime.now()
-        yearly_total = sum(
-            [
-                (e.i_paid if e.i_paid is not None else 0)
-                for e in self.expenses
-                if e.as_datetime().year == now.year and e.status != Status.SKIP and e.period == Period.YEARLY
-            ]
-        )
+        yearly_total = cube.get_total(now.year, period=Period.YEARLY)
         _add_node(
             str(now.year),
             round(yearly_total),
@@ -169,8 +160,7 @@ class Budget:
         # Get each month's total expenses
         month_totals: List[int] = []
         for i_month in range(1, now.month + 1):
-            expenses = _get_monthly_expenses(i_month, now.year)
-            monthly_total = round(sum([(e.i_paid if e.i_paid is not None else 0) for e in expenses]))
+            monthly_total = round(cube.get_total(now.year, i_month, Period.MONTHLY))
             month_totals.append(round(monthly_total + (yearly_total / 12)))
             node = _add_node(
                 datetime(now.year, i_month, 1).strftime("%B"),
@@ -183,7 +173,7 @@ class Budget:
                 for c in [c for c in Constraint if c != Constraint.UNKNOWN]:
                     node.add(
                         f"[{TH().HINT}]{c.value.capitalize():<8} "
-                        f"{round(sum([(e.i_paid if e.i_paid is not None else 0) for e in expenses if e.constraint == c])):>5} €"
+                        f"{round(cube.get_total(now.year, i_month, Period.MONTHLY, c)):>5} €"
                     )
                 tree.add(" ")
 
@@ -199,10 +189,9 @@ class Budget:
         return tree
 
     def interactive_review(self) -> None:
-        """Review the list of pending expenses one by one, and update the sheet
+        """Review the list of pending expenses one by one, and update the store
         with the new values. This method is interactive, and will clear the
         console between each expense or when the user presses Ctrl+C."""
-        assert self._sheet is not None, "Call fetch() first"
         assert self._pending_expenses is not None, "Call `fetch()` first"
 
         if not self._pending_expenses:
@@ -217,6 +206,7 @@ class Budget:
         review_expenses = self._pending_expenses[::-1]
 
         # For each expense, ask the user to set each field to classify the expense
+        n_reviewed = 0
         try:
             for i, t in enumerate(review_expenses):
                 _skip_line = False
@@ -237,20 +227,33 @@ class Budget:
                         _skip_line = True
                         break
 
+                # Saved in the background by stores that write to the network
                 if not _skip_line:
-                    with console.status(f"[bold {TH().ACCENT}]Saving...", spinner_style=TH().ACCENT):
-                        self._sheet.update(f"A{t.cell_number}:J{t.cell_number}", [t.to_list()])
+                    self.store.update_expense(t)
+                    n_reviewed += 1
 
             console.clear()
             console.print("[bold]All done![/] 🎉")
         except KeyboardInterrupt:
             console.clear()
-
-    def _fetch_sheet_values(self) -> List[List[str]]:
-        """Get the latest values from the Google Sheet."""
-        assert self._sheet is not None, "Call connect() first"
-        with console.status(
-            f"[bold {TH().ACCENT}]Fetching previous expenses from Google Sheets...",
-            spinner_style=TH().ACCENT,
-        ):
-            return self._sheet.get_all_values()  # type: ignore
+        finally:
+            # Make sure all reviewed expenses are saved, and send them to the sync target at once
+            try:
+                with console.status(f"[bold {TH().ACCENT}]Saving...", spinner_style=TH().ACCENT):
+                    self.store.flush()
+            except Exception as e:
+                console.log(f"[red][bold]Error:[/] Couldn't save the reviewed expenses to {self.store.name} ({e})")
+                n_unsaved = self.store.save_pending()
+                console.log(
+                    f"[yellow]{n_unsaved} reviewed expenses were saved locally, they will be written "
+                    f"to {self.store.name} the next time the budget is fetched."
+                )
+            else:
+                if self.sync and n_reviewed > 0:
+                    self._sync()
+
+    def _sync(self) -> None:
+        """Internal method to replace the content of the sync target with the expenses of the main store."""
+        assert self.sync is not None
+        with console.status(f"[bold {TH().ACCENT}]Syncing expenses to {self.sync.name}...", spinner_style=TH().ACCENT):
+            self.sync.set_expenses(self.store.get_expenses())
@@ -0,0 +1,102 @@
+"""
+This module aggregates the expenses by month, period and constraint in a single pass so that
+budget summaries (monthly totals, yearly views, trends) don't need to go through all expenses again.
+"""
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import numpy as np
+
+from .expense import Constraint
+from .expense import Expense
+from .expense import Period
+from .expense import Status
+
+# Timestamps further than this from the start or end of a UTC month are in the same month in any timezone
+_MAX_UTC_OFFSET = np.timedelta64(14, "h")
+
+
+class ExpenseCube:
+    """Total amount paid (`i_paid`) for each year, month, `Period` and `Constraint`, skipped expenses excluded."""
+
+    def __init__(self, expenses: List[Expense], timezone: str = "Europe/Paris") -> None:
+        """:param expenses: List of expenses to aggregate.
+        :param timezone: Timezone used to find the month of each expense (see `Expense.as_datetime`).
+        """
+        expenses = [e for e in expenses if e.status != Status.SKIP]
+        months = self._get_local_months(expenses, timezone)
+        years = months.astype("datetime64[Y]").astype(int) + 1970
+
+        # Years covered by the expenses, used as the first axis of the cube
+        self.years: List[int] = [int(y) for y in np.unique(years)]
+
+        periods, constraints = list(Period), list(Constraint)
+        self._totals = np.zeros((len(self.years), 12, len(periods), len(constraints)))
+        np.add.at(
+            self._totals,
+            (
+                np.searchsorted(self.years, years),
+                months.astype(int) % 12,
+                np.array([periods.index(e.period) for e in expenses], dtype=int),
+                np.array([constraints.index(e.constraint) for e in expenses], dtype=int),
+            ),
+            np.array([e.i_paid if e.i_paid is not None else 0.0 for e in expenses]),
+        )
+
+    @staticmethod
+    def _get_local_months(expenses: List[Expense], timezone: str) -> np.ndarray:
+        """Internal method to get the month of each expense in the given timezone. Months are computed
+        in UTC for all expenses at once, only expenses close to the start or end of a month are converted.
+        :returns: An array of `datetime64[M]` values."""
+        timestamps = np.array([e.timestamp for e in expenses], dtype="datetime64[ms]")
+        months = timestamps.astype("datetime64[M]")
+        near_edge = (timestamps - months < _MAX_UTC_OFFSET) | (months + 1 - timestamps <= _MAX_UTC_OFFSET)
+        for i in np.flatnonzero(near_edge):
+            local = expenses[i].as_datetime(timezone)
+            months[i] = np.datetime64(f"{local.year:04d}-{local.month:02d}")
+        return months
+
+    def _select(
+        self,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+        period: Optional[Period] = None,
+        constraint: Optional[Constraint] = None,
+    ) -> np.ndarray:
+        """Internal method to get the part of the cube matching the given filters, None keeps all values."""
+        if year is not None and year not in self.years:
+            return np.zeros((0, 12, len(Period), len(Constraint)))
+        return self._totals[
+            slice(None) if year is None else self.years.index(year),
+            slice(None) if month is None else month - 1,
+            slice(None) if period is None else list(Period).index(period),
+            slice(None) if constraint is None else list(Constraint).index(constraint),
+        ]
+
+    def get_total(
+        self,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+        period: Optional[Period] = None,
+        constraint: Optional[Constraint] = None,
+    ) -> float:
+        """:returns: The total amount paid for the expenses matching all the given filters."""
+        return float(np.sum(self._select(year, month, period, constraint)))
+
+    def get_monthly_totals(
+        self,
+        year: int,
+        period: Optional[Period] = None,
+        constraint: Optional[Constraint] = None,
+    ) -> List[float]:
+        """:returns: The total amount paid during each month of a year (12 values)."""
+        return [self.get_total(year, month, period, constraint) for month in range(1, 13)]
+
+    def get_yearly_totals(
+        self,
+        period: Optional[Period] = None,
+        constraint: Optional[Constraint] = None,
+    ) -> Dict[int, float]:
+        """:returns: The total amount paid during each year with expenses, to compare years or follow trends."""
+        return {year: self.get_total(year, None, period, constraint) for year in self.years}
@@ -47,4 +47,4 @@ class SourceBaseExpense(SourceBase):
         timestamp, amount = int(timestamp), float(amount)
 
         # Form an Expense instance from the information given and save it
-        self._fetched_items.append(Expense(timestamp, amount, merchant_name, merchant_category))
+        self._new_items.append(Expense(timestamp, amount, merchant_name, merchant_category))
@@ -1,6 +1,9 @@
 import json
 import os
 import uuid
+from typing import Any
+from typing import Dict
+from typing import List
 from typing import Optional
 
 import iso18245
@@ -11,6 +14,8 @@ from rich.tree import Tree
 
 from ..config import get_active_theme as TH
 from ..console import console
+from ..fetch.cache import CacheFile
+from .expense import Expense
 from .source_base_expense import SourceBaseExpense
 
 
@@ -22,11 +27,17 @@ class SourceN26(SourceBaseExpense):
         force_signin: bool = False,
         fetch_limit: int = 100,
         cache_validity: int = 12,
+        incremental: bool = True,
     ) -> None:
-        """Initialize the N26 client with the credentials."""
+        """Initialize the N26 client with the credentials.
+        :param fetch_limit: Maximum number of transactions requested at once.
+        :param incremental: Only ask N26 for the transactions newer than the cached ones (even if the cache
+        is outdated) and add them to the cached expenses, otherwise fetch the last `fetch_limit` transactions.
+        """
         super().__init__("N26", cache_validity)
         self.force_signin = force_signin
         self.fetch_limit = fetch_limit
+        self.incremental = incremental
 
         # Create config object with info from file
         self.CREDENTIAL_FILE = os.path.join(os.path.dirname(__file__), "n26_credentials.json")
@@ -114,6 +125,10 @@ class SourceN26(SourceBaseExpense):
             raise ValueError("Could not setup N26 login info.")
         _client = Api(conf)
 
+        # Expenses already known from a previous fetch, only newer transactions will be requested
+        cached_expenses = self._get_cached_expenses() if self.incremental else []
+        since = max([e.timestamp for e in cached_expenses]) if cached_expenses else None
+
         # Fetch the data
         with console.status(
             f"[bold {TH().ACCENT}]Fetching from N26...[/] [dim white](you may have to confirm in the app)",
@@ -123,7 +138,10 @@ class SourceN26(SourceBaseExpense):
             self.balance = float(_client.get_balance()["availableBalance"])
 
             # Get the list of expenses.
-            response = _client.get_transactions(limit=self.fetch_limit)
+            if since is None:
+                response = _client.get_transactions(limit=self.fetch_limit)
+            else:
+                response = self._get_transactions_since(_client, since)
 
         # Transform the list of expenses into a list of Expense objects
         for t in response:
@@ -149,5 +167,39 @@ class SourceN26(SourceBaseExpense):
                 merchant_category,
             )
 
+        # Keep the previous expenses after the new ones (most recent first, like N26)
+        n_new = len(self._new_items)
+        self._new_items.extend(cached_expenses)
+
         # Add a summary of what has been fetched to the data tree
-        tree.add(f"{len(self._fetched_items)} expense(s) found [{TH().HINT}](limited to {self.fetch_limit})")
+        if since is None:
+            tree.add(f"{n_new} expense(s) found [{TH().HINT}](limited to {self.fetch_limit})")
+        else:
+            tree.add(f"{n_new} new expense(s) found [{TH().HINT}]({len(cached_expenses)} already cached)")
+
+    def _get_transactions_since(self, client: Api, since: int) -> List[Dict[str, Any]]:
+        """Internal method to get all transactions confirmed after a timestamp, requested in pages of
+        `fetch_limit` transactions from the most recent to the oldest.
+        :param since: Timestamp (in milliseconds) of the last known transaction.
+        :returns: The list of transactions, most recent first.
+        """
+        transactions: Dict[str, Dict[str, Any]] = {}
+        to_time: Optional[int] = None
+        while True:
+            page = client.get_transactions(from_time=since + 1, to_time=to_time, limit=self.fetch_limit)
+            new = [t for t in page if t["id"] not in transactions and int(t["confirmed"]) > since]
+            transactions.update({t["id"]: t for t in new})
+
+            if len(page) < self.fetch_limit:
+                return list(transactions.values())
+
+            # The next page starts at the oldest timestamp again as other transactions may share it, unless the
+            # whole page already had this timestamp (more transactions at the same time than `fetch_limit`)
+            oldest = min([int(t["confirmed"]) for t in page])
+            to_time = oldest if oldest != to_time else oldest - 1
+
+    def _get_cached_expenses(self) -> List[Expense]:
+        """Internal method to get the expenses saved in the cache file, even if it is outdated.
+        :returns: The list of cached expenses, empty if there is no valid cache file."""
+        data = CacheFile(self.cache_fullpath).read()
+        return [Expense.from_dict(e) for e in data[self._item_name]] if data else []
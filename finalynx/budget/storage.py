@@ -0,0 +1,348 @@
+"""
+Storage backends used by `Budget` to save the list of expenses and their review status.
+
+Two backends are available:
+- `SheetsStore`: a Google Sheet named "Finalynx Expenses", requires a gspread service account.
+- `SQLiteStore`: a local database file, fast and usable offline. A `SheetsStore` can be
+  used as a sync target to keep a copy of the expenses in Google Sheets (see `Budget`).
+
+In both backends, the `cell_number` attribute of each `Expense` identifies its row in the store.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import TYPE_CHECKING
+from typing import Union
+
+from ..config import get_data_dir
+from ..console import console
+from .expense import Expense
+
+# gspread is only imported when a `SheetsStore` is used, as loading it takes a while
+if TYPE_CHECKING:
+    from gspread.worksheet import Worksheet
+
+
+class ExpenseStore:
+    """Abstract class for a database of expenses."""
+
+    name = "Store"
+
+    def connect(self) -> None:
+        """Abstract method, must be overriden by children classes. Open the connection to the store."""
+        raise NotImplementedError("This abstract method must be overriden by all subclasses")
+
+    def get_expenses(self) -> List[Expense]:
+        """Abstract method, must be overriden by children classes.
+        :returns: All expenses in the store, in the order they were added."""
+        raise NotImplementedError("This abstract method must be overriden by all subclasses")
+
+    def add_expenses(self, expenses: List[Expense]) -> None:
+        """Abstract method, must be overriden by children classes. Add new expenses at the end of the store,
+        their `cell_number` is set to their new row."""
+        raise NotImplementedError("This abstract method must be overriden by all subclasses")
+
+    def update_expense(self, expense: Expense) -> None:
+        """Abstract method, must be overriden by children classes. Save the changes made to an expense
+        previously returned by `get_expenses` or added with `add_expenses`."""
+        raise NotImplementedError("This abstract method must be overriden by all subclasses")
+
+    def set_expenses(self, expenses: List[Expense]) -> None:
+        """Abstract method, must be overriden by children classes. Replace the content of the store with
+        the given expenses, in the same order. Used to sync a store with another one, the `cell_number`
+        of the given expenses is not modified."""
+        raise NotImplementedError("This abstract method must be overriden by all subclasses")
+
+    def flush(self) -> None:
+        """Wait until all changes are saved, for stores that write them in the background."""
+
+    def save_pending(self) -> int:
+        """Save the changes that could not be written by `flush` to a local file, for stores that write them
+        in the background. They are written again the next time the store is connected.
+        :returns: The number of saved changes."""
+        return 0
+
+    def get_last_timestamp(self) -> int:
+        """:returns: The most recent timestamp in the store, 0 if the store is empty."""
+        return max([e.timestamp for e in self.get_expenses()], default=0)
+
+    def get_monthly_expenses(self, month: int, year: int) -> List[Expense]:
+        """:returns: The expenses of a given month (in the default timezone of `Expense.as_datetime`)."""
+        return [e for e in self.get_expenses() if e.as_datetime().month == month and e.as_datetime().year == year]
+
+
+class SheetsStore(ExpenseStore):
+    """Store the expenses in the first sheet of a Google Sheet document, one expense per row after the header."""
+
+    name = "Google Sheets"
+
+    RETRY_DELAY = 1.0
+    """Seconds to wait before retrying a request that failed because of the API quota, doubled at each retry."""
+
+    def __init__(
+        self,
+        service_account_path: Union[str, Path, None] = None,
+        document: str = "Finalynx Expenses",
+        batch_size: int = 10,
+        max_retries: int = 5,
+    ):
+        """:param service_account_path: Path to the Google Sheets token file, defaults to the OS's default directory.
+        :param document: Name of the Google Sheet document to use.
+        :param batch_size: Updated expenses are kept in a queue and written together in the background once this
+        number of expenses is reached (and when calling `flush`), instead of one request per expense.
+        :param max_retries: Number of times a request is retried when the Google Sheets API quota is exceeded."""
+        import gspread
+
+        self.service_account_path = (
+            Path(service_account_path) if service_account_path else gspread.auth.DEFAULT_SERVICE_ACCOUNT_FILENAME
+        )
+        self.document = document
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self._sheet: Optional[Worksheet] = None
+
+        # Local copy of the sheet values, fetched once when connecting and kept up to date afterwards
+        self._rows: List[List[Any]] = []
+
+        # Updated rows waiting to be written (by cell number), only one batch is written at a time
+        self._pending: Dict[int, List[Any]] = {}
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_thread: Optional[threading.Thread] = None
+
+        # Local file holding the updates that could not be written before exiting (see `save_pending`)
+        self.pending_path = Path(get_data_dir()) / "unsaved_expenses.json"
+
+    def connect(self) -> None:
+        import gspread
+
+        gs = gspread.service_account(filename=self.service_account_path)
+        self._sheet = gs.open(self.document).worksheet("Sheet1")
+        self._rows = self._sheet.get_all_values()
+        self._load_pending()
+
+    def get_expenses(self) -> List[Expense]:
+        return [Expense.from_list(row, i + 2) for i, row in enumerate(self._rows[1:])]
+
+    def get_last_timestamp(self) -> int:
+        return max([int(row[0]) for row in self._rows if str(row[0]).isdigit()], default=0)
+
+    def add_expenses(self, expenses: List[Expense]) -> None:
+        assert self._sheet is not None, "Call connect() first"
+        if not expenses:
+            return
+        self.flush()
+
+        # Only the information from the source is written, the review columns are left empty
+        first_empty_row = len(self._rows) + 1
+        range_name = f"A{first_empty_row}:D{first_empty_row + len(expenses)}"
+        self._retry(lambda sheet: sheet.update(range_name, [e.to_list()[:4] for e in expenses]))
+        for i, expense in enumerate(expenses):
+            expense.cell_number = first_empty_row + i
+            self._rows.append(self._to_row(expense)[:4] + [""] * 6)
+
+    def update_expense(self, expense: Expense) -> None:
+        """Queue the updated expense, the queue is written in the background once `batch_size` is reached."""
+        assert self._sheet is not None, "Call connect() first"
+        self._rows[expense.cell_number - 1] = self._to_row(expense)
+        with self._pending_lock:
+            self._pending[expense.cell_number] = expense.to_list()
+            n_pending = len(self._pending)
+
+        # Only start a new batch if the previous one has been written
+        if n_pending >= self.batch_size and not (self._flush_thread and self._flush_thread.is_alive()):
+            self._flush_thread = threading.Thread(target=self._flush_in_background, daemon=True)
+            self._flush_thread.start()
+
+    def set_expenses(self, expenses: List[Expense]) -> None:
+        assert self._sheet is not None, "Call connect() first"
+        self.flush()
+        if expenses:
+            values = [e.to_list() for e in expenses]
+            self._retry(lambda sheet: sheet.update(f"A2:J{len(expenses) + 1}", values))
+
+        # Clear the rows left below the new expenses
+        last_row = len(self._rows)
+        if last_row > len(expenses) + 1:
+            self._retry(lambda sheet: sheet.batch_clear([f"A{len(expenses) + 2}:J{last_row}"]))
+        self._rows = self._rows[:1] + [self._to_row(e) for e in expenses]
+
+    def flush(self) -> None:
+        """Write all queued updates in a single request, after the batch being written in the background
+        if any. Updates that could not be written are kept in the queue and the exception is raised."""
+        assert self._sheet is not None, "Call connect() first"
+        with self._flush_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return
+
+            data = [{"range": f"A{cell}:J{cell}", "values": [row]} for cell, row in sorted(pending.items())]
+            try:
+                self._retry(lambda sheet: sheet.batch_update(data))
+            except Exception:
+                # Keep the failed updates in the queue, unless the expense has been updated again meanwhile
+                with self._pending_lock:
+                    self._pending = {**pending, **self._pending}
+                raise
+
+    def save_pending(self) -> int:
+        """Save the queued updates to `pending_path`, they are written to the sheet on the next `connect`."""
+        with self._pending_lock:
+            pending = dict(self._pending)
+        if not pending:
+            return 0
+
+        os.makedirs(self.pending_path.parent, exist_ok=True)
+        with open(self.pending_path, "w") as f:
+            json.dump({"document": self.document, "rows": pending}, f, indent=4)
+        return len(pending)
+
+    def _load_pending(self) -> None:
+        """Internal method to write the updates saved by `save_pending` during a previous run, if any."""
+        if not self.pending_path.exists():
+            return
+        with open(self.pending_path) as f:
+            saved = json.load(f)
+        if saved["document"] != self.document:
+            return
+
+        for cell, row in saved["rows"].items():
+            if int(cell) <= len(self._rows):
+                self._rows[int(cell) - 1] = [str(value) for value in row]
+                with self._pending_lock:
+                    self._pending.setdefault(int(cell), row)
+        self.flush()
+        self.pending_path.unlink()
+        console.log(f"Saved {len(saved['rows'])} expenses reviewed during a previous run to {self.name}.")
+
+    def _flush_in_background(self) -> None:
+        """Internal method to write the queued updates from a background thread. Failed updates stay in the
+        queue and are written with the next batch or by the final `flush`."""
+        try:
+            self.flush()
+        except Exception as e:
+            console.log(
+                f"[yellow][bold]Warning:[/] Couldn't save expenses to {self.name}, will retry with the next batch ({e})"
+            )
+
+    def _retry(self, request: Callable[["Worksheet"], Any]) -> Any:
+        """Internal method to send a request to the sheet, retried with an exponential backoff
+        when the API quota is exceeded or the service is temporarily unavailable."""
+        import gspread
+
+        assert self._sheet is not None, "Call connect() first"
+        for attempt in range(self.max_retries + 1):
+            try:
+                return request(self._sheet)
+            except gspread.exceptions.APIError as e:
+                if attempt == self.max_retries or e.code not in [429, 500, 503]:
+                    raise
+                time.sleep(self.RETRY_DELAY * 2**attempt)
+
+    @staticmethod
+    def _to_row(expense: Expense) -> List[Any]:
+        """Internal method to convert an expense to the values returned by the sheet (as strings)."""
+        return [str(value) for value in expense.to_list()]
+
+
+class SQLiteStore(ExpenseStore):
+    """Store the expenses in a local SQLite database, indexed by timestamp, status and month."""
+
+    name = "SQLite"
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS expenses (
+            id INTEGER PRIMARY KEY,
+            timestamp INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            merchant_name TEXT NOT NULL,
+            merchant_category TEXT NOT NULL,
+            status TEXT NOT NULL,
+            i_paid REAL,
+            payback TEXT NOT NULL,
+            "constraint" TEXT NOT NULL,
+            period TEXT NOT NULL,
+            comment TEXT NOT NULL,
+            month TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS expenses_timestamp ON expenses (timestamp);
+        CREATE INDEX IF NOT EXISTS expenses_status ON expenses (status);
+        CREATE INDEX IF NOT EXISTS expenses_month ON expenses (month);
+    """
+
+    _COLUMNS = (
+        'timestamp, amount, merchant_name, merchant_category, status, i_paid, payback, "constraint", period, comment'
+    )
+
+    def __init__(self, path: Union[str, Path, None] = None):
+        """:param path: Path to the database file, created if needed. Defaults to `expenses.db`
+        in the folder returned by `finalynx.config.get_data_dir`."""
+        self.path = Path(path) if path else Path(get_data_dir()) / "expenses.db"
+        self._db: Optional[sqlite3.Connection] = None
+
+    def connect(self) -> None:
+        os.makedirs(self.path.parent, exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.executescript(self._SCHEMA)
+
+    def get_expenses(self) -> List[Expense]:
+        return self._select("SELECT id, " + self._COLUMNS + " FROM expenses ORDER BY id")
+
+    def get_last_timestamp(self) -> int:
+        assert self._db is not None, "Call connect() first"
+        return int(self._db.execute("SELECT MAX(timestamp) FROM expenses").fetchone()[0] or 0)
+
+    def get_monthly_expenses(self, month: int, year: int) -> List[Expense]:
+        query = "SELECT id, " + self._COLUMNS + " FROM expenses WHERE month = ? ORDER BY id"
+        return self._select(query, (f"{year:04d}-{month:02d}",))
+
+    def add_expenses(self, expenses: List[Expense]) -> None:
+        assert self._db is not None, "Call connect() first"
+        with self._db:
+            for expense in expenses:
+                cursor = self._db.execute(
+                    "INSERT INTO expenses (" + self._COLUMNS + ", month) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    self._to_row(expense),
+                )
+                expense.cell_number = int(cursor.lastrowid or -1)
+
+    def update_expense(self, expense: Expense) -> None:
+        assert self._db is not None, "Call connect() first"
+        with self._db:
+            self._db.execute(
+                "UPDATE expenses SET (" + self._COLUMNS + ", month) = (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) WHERE id = ?",
+                self._to_row(expense) + [expense.cell_number],
+            )
+
+    def set_expenses(self, expenses: List[Expense]) -> None:
+        assert self._db is not None, "Call connect() first"
+        with self._db:
+            self._db.execute("DELETE FROM expenses")
+            self._db.executemany(
+                "INSERT INTO expenses (" + self._COLUMNS + ", month) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [self._to_row(expense) for expense in expenses],
+            )
+
+    def _select(self, query: str, parameters: Any = ()) -> List[Expense]:
+        """Internal method to run a query returning the id and `_COLUMNS` of expenses."""
+        assert self._db is not None, "Call connect() first"
+        return [
+            Expense.from_list([*row[1:6], "" if row[6] is None else str(row[6]), *row[7:]], cell_number=row[0])
+            for row in self._db.execute(query, parameters)
+        ]
+
+    @staticmethod
+    def _to_row(expense: Expense) -> List[Any]:
+        """Internal method to convert an expense to the values of `_COLUMNS` followed by its month."""
+        row = expense.to_list()
+        row[5] = expense.i_paid  # NULL if not set
+        return row + [expense.as_datetime().strftime("%Y-%m")]
@@ -1,6 +1,9 @@
 """
 This file is where Finalynx's overall behavior can be customized.
 """
+import os
+from typing import Optional
+
 from .theme import LightTheme
 from .theme import Theme
 
@@ -20,3 +23,47 @@ def set_active_theme(theme: Theme) -> None:
 def get_active_theme() -> Theme:
     """Getter method needed to pass elements by reference accross modules."""
     return _active_theme
+
+
+# Folder where the fetched data is cached, see `get_cache_dir` for the default location
+_cache_dir: Optional[str] = None
+
+# Format of the cached payloads, "json" (compact) or "gzip" (see `finalynx.fetch.cache`)
+_cache_format: str = "json"
+
+
+def set_cache_dir(path: Optional[str]) -> None:
+    """Setter method needed to pass elements by reference accross modules. Set to None to use the default folder."""
+    global _cache_dir
+    _cache_dir = path
+
+
+def get_cache_dir() -> str:
+    """Get the folder where the fetched data is cached. Defaults to the `FINALYNX_CACHE_DIR` environment
+    variable if defined, otherwise to the `finalynx` folder of the user cache directory (`XDG_CACHE_HOME`)."""
+    if _cache_dir:
+        return _cache_dir
+    if os.environ.get("FINALYNX_CACHE_DIR"):
+        return os.environ["FINALYNX_CACHE_DIR"]
+    return os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache")), "finalynx")
+
+
+def set_cache_format(cache_format: str) -> None:
+    """Setter method needed to pass elements by reference accross modules."""
+    global _cache_format
+    _cache_format = cache_format
+
+
+def get_cache_format() -> str:
+    """Getter method needed to pass elements by reference accross modules."""
+    return _cache_format
+
+
+def get_data_dir() -> str:
+    """Get the folder where Finalynx saves local data (e.g. the expenses database). Defaults to the
+    `FINALYNX_DATA_DIR` environment variable if defined, otherwise to the `finalynx` folder of the
+    user data directory (`XDG_DATA_HOME`)."""
+    if os.environ.get("FINALYNX_DATA_DIR"):
+        return os.environ["FINALYNX_DATA_DIR"]
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser(os.path.join("~", ".local", "share"))
+    return os.path.join(data_home, "finalynx")
@@ -5,6 +5,7 @@ This is a barebones file (with a temporary ugly structure), please check back la
 """
 from datetime import date
 from typing import Any
+from typing import Callable
 from typing import Dict
 from typing import Optional
 from typing import Set
@@ -35,6 +36,9 @@ class Dashboard:
     This module has not started development yet. Check back soon!
     """
 
+    REFRESH_INTERVAL = 5.0
+    """Seconds between two checks for fresh data fetched in the background."""
+
     _url_logo = (
         "https://raw.githubusercontent.com/MadeInPierre/finalynx/main/docs/_static/logo_assistant_transparent.png"
     )
@@ -60,9 +64,18 @@ class Dashboard:
 
     def __init__(self, hide_amounts: bool = False):
         self.hide_amounts = hide_amounts
-
-    def run(self, portfolio: Portfolio, timeline: Optional[Timeline] = None) -> None:
-        """Simple structure for now, to be improved!"""
+        self._refreshed = False
+
+    def run(
+        self,
+        portfolio: Portfolio,
+        timeline: Optional[Timeline] = None,
+        refresh: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        """Simple structure for now, to be improved!
+        :param refresh: Optional function called periodically until it returns True, which means that
+        the portfolio has been updated with fresh data (see `Assistant.refresh`) and must be displayed again.
+        """
         self.color_map = "finalynx"
         self.selected_node: Node = portfolio
 
@@ -167,6 +180,10 @@ class Dashboard:
                         """,
                         )
 
+                    # Display the fresh data once it has been fetched in the background
+                    if refresh:
+                        ui.timer(self.REFRESH_INTERVAL, lambda: self._on_refresh_timer(refresh, portfolio, tree))
+
                     # dashboard_console = Console(record=True)
                     # dashboard_console.print(portfolio.tree(output_format="[dashboard_console]", hide_root=True))
                     # ui.html(dashboard_console.export_html())
@@ -185,7 +202,7 @@ class Dashboard:
                             self.chart_etats_enveloppes = ui.chart(
                                 timeline.chart_timeline(
                                     "Envelope States Evolution",
-                                    timeline._log_env_states,
+                                    timeline.get_metrics("investment_states"),
                                     {
                                         "Unknown": "#434348",
                                         "Closed": "#999999",
@@ -198,14 +215,14 @@ class Dashboard:
                                 else {}
                             )
                             self.chart_enveloppes = ui.chart(
-                                timeline.chart_timeline("Envelopes Evolution", timeline._log_enveloppe_values)
+                                timeline.chart_timeline("Envelopes Evolution", timeline.get_metrics("envelopes"))
                                 if timeline
                                 else {}
                             )
                             self.chart_asset_classes = ui.chart(
                                 timeline.chart_timeline(
                                     "Asset Classes Evolution",
-                                    timeline._log_assets_classes_values,
+                                    timeline.get_metrics("asset_classes"),
                                     AnalyzeAssetClasses.ASSET_COLORS_FINARY,
                                 )
                                 if timeline
@@ -214,7 +231,7 @@ class Dashboard:
                             self.chart_subasset_classes = ui.chart(
                                 timeline.chart_timeline(
                                     "Asset Subclasses Evolution",
-                                    timeline._log_assets_subclasses_values,
+                                    timeline.get_metrics("asset_subclasses"),
                                     AnalyzeAssetSubclasses.SUBASSET_COLORS_FINARY,
                                 )
                                 if timeline
@@ -223,7 +240,7 @@ class Dashboard:
                             self.chart_lines = ui.chart(
                                 timeline.chart_timeline(
                                     "Line-by-line Evolution",
-                                    timeline._log_lines_values,
+                                    timeline.get_metrics("lines"),
                                     visible_by_default=False,
                                 )
                                 if timeline
@@ -239,6 +256,21 @@ class Dashboard:
             native=False,
         )
 
+    def _on_refresh_timer(self, refresh: Callable[[], bool], portfolio: Portfolio, tree: ui.tree) -> None:
+        if self._refreshed or not refresh():
+            return
+        self._refreshed = True
+
+        # Rebuild the tree and charts with the updated portfolio
+        self.portfolio_dict = self._convert_rich_tree_to_nicegui(portfolio)
+        max_id = self._add_ids_to_tree(self.portfolio_dict, set())
+        tree._props["nodes"] = self.portfolio_dict["children"]
+        tree._props["expanded"] = list(range(max_id))
+        tree.update()
+        self.selected_node = portfolio
+        self._update_chart()
+        ui.notify("Portfolio updated with fresh data")
+
     def _on_tree_expand(self, event: Any) -> None:
         console.log(event)
 
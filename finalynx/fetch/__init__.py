@@ -10,14 +10,6 @@ However, any other source might be added in the future by creating a new source
 subpackage.
 """
 # flake8: noqa
-import os
-
-import finary_uapi.constants  # type: ignore # Set the credentials and cookies constants to a full path
-
-finary_uapi.constants.CREDENTIAL_FILE = os.path.join(os.path.dirname(__file__), "finary_credentials.json")
-finary_uapi.constants.COOKIE_FILENAME = os.path.join(os.path.dirname(__file__), "finary_cookies.txt")
-finary_uapi.constants.JWT_FILENAME = os.path.join(os.path.dirname(__file__), "jwt.json")
-
 from ..console import console
 from .fetch import Fetch
 from .source_base import SourceBase
@@ -0,0 +1,115 @@
+"""
+Cache files used by the sources to save what has been fetched online and reuse it on the next runs.
+
+Each cache file starts with a one-line JSON header (format version, date of the last update, payload
+format and checksum) followed by the payload itself. The header can be read without loading the
+payload, e.g. to check if the cache is still recent enough. Files are written to a temporary file
+first and then renamed, so that a run never reads a partially written cache.
+"""
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+CACHE_VERSION = 1
+"""Increment when the structure of the cached payloads changes, older cache files are then ignored."""
+
+CACHE_FORMATS = ["json", "gzip"]
+"""Available payload formats: compact JSON, or gzip-compressed JSON for large payloads."""
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class CacheFile:
+    """Read and write a cache file made of a small header and a JSON payload."""
+
+    def __init__(self, path: str) -> None:
+        """:param path: Full path to the cache file, its folder is created when writing if needed."""
+        self.path = path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def delete(self) -> None:
+        """Delete the cache file if it exists."""
+        if self.exists():
+            os.remove(self.path)
+
+    def read_header(self) -> Optional[Dict[str, Any]]:
+        """Only read the first line of the file, without loading the payload.
+        :returns: The header as a dictionary, or None if the file doesn't exist or is not a valid cache file
+        for the current `CACHE_VERSION`.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                header: Dict[str, Any] = json.loads(f.readline())
+        except (OSError, ValueError):
+            return None
+        if not isinstance(header, dict) or header.get("version") != CACHE_VERSION:
+            return None
+        return header
+
+    def get_age(self) -> Optional[int]:
+        """:returns: The number of hours since the last update, or None if there is no valid cache file."""
+        header = self.read_header()
+        if header is None:
+            return None
+        last_updated = datetime.datetime.strptime(header["last_updated"], DATE_FORMAT)
+        return int((datetime.datetime.now() - last_updated).total_seconds() // 3600)
+
+    def read(self) -> Optional[Any]:
+        """Read the payload and check that it has not been corrupted.
+        :returns: The cached payload, or None if there is no valid cache file.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                header = json.loads(f.readline())
+                data = f.read()
+        except (OSError, ValueError):
+            return None
+        if not isinstance(header, dict) or header.get("version") != CACHE_VERSION:
+            return None
+        if hashlib.sha256(data).hexdigest() != header.get("checksum"):
+            return None
+        if header.get("format") == "gzip":
+            data = gzip.decompress(data)
+        return json.loads(data)
+
+    def write(self, payload: Any, format: str = "json", last_updated: Optional[str] = None) -> None:
+        """Atomically replace the cache file with a new payload.
+        :param payload: Any object that can be serialized to JSON.
+        :param format: Payload format, one of `CACHE_FORMATS`.
+        :param last_updated: Date of the last update saved in the header (see `DATE_FORMAT`), defaults to now.
+        """
+        if format not in CACHE_FORMATS:
+            raise ValueError(f"Cache format must be one of {CACHE_FORMATS}, got '{format}'")
+
+        data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+        if format == "gzip":
+            data = gzip.compress(data)
+        header = {
+            "version": CACHE_VERSION,
+            "last_updated": last_updated or datetime.datetime.now().strftime(DATE_FORMAT),
+            "format": format,
+            "checksum": hashlib.sha256(data).hexdigest(),
+        }
+
+        # Write to a temporary file in the same folder, then rename it to replace the previous cache at once
+        folder = os.path.dirname(self.path) or "."
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".tmp_", suffix=".cache")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(header).encode() + b"\n")
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict
 from typing import List
 from typing import Optional
@@ -6,6 +7,9 @@ from rich.tree import Tree
 
 from ..console import console
 from ..portfolio.folder import Portfolio
+from ..profiler import profiler
+from .line_matcher import LineMatcher
+from .line_matcher import MatchReport
 from .source_base_line import SourceBaseLine
 
 
@@ -18,14 +22,33 @@ class Fetch:
         clear_cache: bool = False,
         ignore_orphans: bool = False,
         sources: Optional[List[SourceBaseLine]] = None,
+        parallel: bool = False,
+        build_tree: bool = True,
+        revalidate: bool = False,
     ) -> None:
-        """This class orchestrates the fetching process from multiple sources."""
+        """This class orchestrates the fetching process from multiple sources.
+        :param parallel: Fetch the data from all sources at the same time (in separate threads). The fetched
+        lines are then matched with the portfolio one source at a time, in the same order as sequential fetching.
+        :param build_tree: Add each fetched item to the returned tree, disable it if the tree won't be displayed.
+        :param revalidate: Use outdated caches immediately and fetch fresh data in the background instead of
+        waiting for it, call `apply_refresh` to update the portfolio once the fresh data is available.
+        """
         self.portfolio = portfolio
         self._sources: Dict[str, SourceBaseLine] = {s.name: s for s in sources} if sources else {}
 
         # Flags set by user
         self.clear_cache = clear_cache
         self.ignore_orphans = ignore_orphans
+        self.parallel = parallel
+        self.build_tree = build_tree
+        self.revalidate = revalidate
+
+        # Summary of the lines matched by each source during the last fetch
+        self.reports: Dict[str, MatchReport] = {}
+
+        # Sources used during the last fetch and index of the portfolio, kept to match fresh data later
+        self._fetched_sources: List[SourceBaseLine] = []
+        self._matcher: Optional[LineMatcher] = None
 
     def add_source(self, source: SourceBaseLine) -> None:
         """Register a new source instance which must already be configured."""
@@ -35,18 +58,72 @@ class Fetch:
         """Fetch from all sources specified in `active_sources` and return a `rich`
         tree used to render what has been fetched to the console."""
         tree = Tree("Fetched data", hide_root=True)
+        self._matcher = matcher = LineMatcher(self.portfolio)
 
-        # Fill the portfolio with info from each activated source
+        # Only keep the sources that have been added
+        sources: List[SourceBaseLine] = []
         for source_id in active_source_names:
             if source_id not in self._sources.keys():
                 console.log(
                     f"[red][bold]Error:[/] Source '{source_id}' not recognized, have you added it first? Skipping."
                 )
                 continue
-            tree.add(self._sources[source_id].fetch(self.portfolio, self.clear_cache, self.ignore_orphans))
+            self._sources[source_id].build_tree = self.build_tree
+            self._sources[source_id].revalidate = self.revalidate
+            sources.append(self._sources[source_id])
+
+        def _fetch(source: SourceBaseLine) -> Tree:
+            with profiler.span(source.name):
+                return source._fetch(self.clear_cache)
+
+        # Fetch the data from each source, at the same time if enabled since most of the time is spent waiting
+        if self.parallel and len(sources) > 1:
+            with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+                futures = [executor.submit(_fetch, source) for source in sources]
+                trees = [future.result() for future in futures]
+        else:
+            trees = [_fetch(source) for source in sources]
 
+        # Fill the portfolio with info from each activated source, always in the same order
+        with profiler.span("match"):
+            for source, source_tree in zip(sources, trees):
+                source.match(self.portfolio, self.ignore_orphans, matcher)
+                self.reports[source.id] = source.report
+                tree.add(source_tree)
+
+        self._fetched_sources = sources
         return tree
 
+    @property
+    def is_refreshing(self) -> bool:
+        """Whether some sources are still fetching fresh data in the background (see `revalidate`)."""
+        return any(source.is_refreshing for source in self._fetched_sources)
+
+    def apply_refresh(self, wait: bool = False) -> bool:
+        """Update the portfolio with the fresh data fetched in the background by the sources that used an
+        outdated cache. The changes made by the previous matching are undone and all sources are matched
+        again in the same order, so the result is the same as fetching the fresh data directly.
+        The portfolio must be processed again afterwards if it has been updated.
+        :param wait: Wait for all background refreshes to finish, otherwise only update the portfolio
+        if they are already finished.
+        :returns: True if the portfolio has been updated, False if there was nothing new to apply.
+        """
+        if wait:
+            for source in self._fetched_sources:
+                source.wait_refresh()
+        if self._matcher is None or self.is_refreshing:
+            return False
+        if not any(source.refreshed for source in self._fetched_sources):
+            return False
+
+        console.log("Updating the portfolio with the refreshed data...")
+        self._matcher.reset()
+        for source in self._fetched_sources:
+            source.refreshed = False
+            source.match(self.portfolio, self.ignore_orphans, self._matcher)
+            self.reports[source.id] = source.report
+        return True
+
     def fetch_all(self) -> Tree:
         """Fetch from all sources added and return a `rich` tree used
         to render what has been fetched to the console."""
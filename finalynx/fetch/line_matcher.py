@@ -0,0 +1,128 @@
+"""This file defines an index of the portfolio lines used to quickly find which `Line` instances
+correspond to each investment fetched online, instead of traversing the whole tree each time.
+"""
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from finalynx.fetch.fetch_line import FetchLine
+from finalynx.portfolio.folder import Folder
+from finalynx.portfolio.line import Line
+from finalynx.portfolio.node import Node
+from finalynx.profiler import profiler
+
+
+@dataclass
+class MatchReport:
+    """Summary of the matching between fetched lines and the portfolio lines."""
+
+    # Fetched lines that matched exactly one line in the portfolio
+    matched: List[Tuple[FetchLine, Line]] = field(default_factory=list)
+
+    # Fetched lines that matched several lines in the portfolio, only the first one was updated
+    multiple: List[Tuple[FetchLine, List[Line]]] = field(default_factory=list)
+
+    # Fetched lines that did not match any line in the portfolio
+    orphans: List[FetchLine] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "matched": [{"fetched": f.name, "line": line.name} for f, line in self.matched],
+            "multiple": [{"fetched": f.name, "lines": [line.name for line in lines]} for f, lines in self.multiple],
+            "orphans": [f.name for f in self.orphans],
+        }
+
+
+class LineMatcher:
+    """Index of the portfolio's lines and envelope folders, built once per fetch."""
+
+    def __init__(self, portfolio: Folder):
+        """Traverses the portfolio once to index each line by key and name, and each folder
+        with an envelope by the envelope's key and name. Each node is identified by its path in
+        the tree (indices of the successive children) so that matches are returned in tree order,
+        like `Folder.match_lines`.
+        :param portfolio: Root folder of the tree to match fetched lines with.
+        """
+        self._paths: Dict[int, Tuple[int, ...]] = {}  # id(node) -> path of the first occurrence in the tree
+        self._lines: Dict[str, List[Line]] = {}  # Line key or name -> lines
+        self._folders: Dict[str, List[Folder]] = {}  # Envelope key or name -> folders with this envelope
+
+        # Changes made to the portfolio while matching, to be able to undo them (see `reset`)
+        self._added: List[Tuple[Line, Folder]] = []  # Lines added to the portfolio and their parent
+        self._updated: Dict[int, Tuple[Line, float, str]] = {}  # id(line) -> original amount, currency
+
+        profiler.count("tree traversals")
+        stack: List[Tuple[Node, Tuple[int, ...]]] = [(portfolio, ())]
+        while stack:
+            node, path = stack.pop()
+            self._add_node(node, path)
+            if isinstance(node, Folder):
+                stack.extend(reversed([(child, path + (i,)) for i, child in enumerate(node.children)]))
+
+    def _add_node(self, node: Node, path: Tuple[int, ...]) -> None:
+        """Internal method to add a line or a folder with an envelope to the index."""
+        if id(node) in self._paths:
+            return
+        self._paths[id(node)] = path
+
+        if isinstance(node, Line):
+            for name in {node.key, node.name}:
+                if name:
+                    self._lines.setdefault(name, []).append(node)
+        elif isinstance(node, Folder) and node.envelope:
+            for name in {node.envelope.key, node.envelope.name}:
+                if name:
+                    self._folders.setdefault(name, []).append(node)
+
+    def add_line(self, line: Line, parent: Folder) -> None:
+        """Add a line to a folder of the portfolio and to the index, e.g. for orphan lines added to the root."""
+        parent.add_child(line)
+        self._add_node(line, self._paths[id(parent)] + (len(parent.children) - 1,))
+        self._added.append((line, parent))
+
+    def update_line(self, fetch_line: FetchLine, line: Line) -> None:
+        """Update a portfolio line with a fetched line (see `FetchLine.update_line`), the original
+        values are kept the first time the line is updated."""
+        if id(line) not in self._updated:
+            self._updated[id(line)] = (line, line.amount, line.currency)
+        fetch_line.update_line(line)
+
+    def reset(self) -> None:
+        """Undo all changes made to the portfolio since the creation of this index: lines added by
+        `add_line` are removed and lines updated by `update_line` get their original values back.
+        Used to match the portfolio again when new data has been fetched."""
+        for line, parent in reversed(self._added):
+            parent.children = [child for child in parent.children if child is not line]
+            del self._paths[id(line)]
+            for name in {line.key, line.name}:
+                if name in self._lines:
+                    self._lines[name] = [other for other in self._lines[name] if other is not line]
+        for line, amount, currency in self._updated.values():
+            line.amount, line.currency = amount, currency
+        self._added, self._updated = [], {}
+
+    def match_lines(self, fetch_line: FetchLine) -> List[Line]:
+        """Equivalent to `Folder.match_lines` on the indexed portfolio: folders with an envelope
+        matching the fetched line's account get a new generated line, and lines matching with
+        `FetchLine.matches_line` are returned.
+        :param fetch_line: FetchLine instance created that represents an investment found online.
+        :returns: The list of matching lines (without duplicates) in tree order.
+        """
+        matched: Dict[int, Line] = {}
+
+        # Automatically match lines with the Folder's envelope
+        for folder in self._folders.get(fetch_line.account, []) if fetch_line.account else []:
+            generated_line = fetch_line.generate_line()
+            self.add_line(generated_line, folder)
+            matched[id(generated_line)] = generated_line
+
+        # Only check the lines with a key or name corresponding to this fetched line
+        for name in {fetch_line.name, fetch_line.id, fetch_line.account}:
+            for line in self._lines.get(name, []) if name else []:
+                if fetch_line.matches_line(line):
+                    matched[id(line)] = line
+
+        return sorted(matched.values(), key=lambda line: self._paths[id(line)])
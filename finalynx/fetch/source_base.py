@@ -1,17 +1,28 @@
-import datetime
-import json
 import os
+import threading
+from contextlib import contextmanager
 from typing import Any
+from typing import Callable
+from typing import Iterator
 from typing import List
+from typing import Optional
 
 from rich.tree import Tree
 
+from ..config import get_active_theme as TH
+from ..config import get_cache_dir
+from ..config import get_cache_format
 from ..console import console
+from ..profiler import profiler
+from .cache import CacheFile
 
 
 class SourceBase:
     """Abstract class to fetch data from multiple sources."""
 
+    _status_lock = threading.Lock()
+    """Held by the source currently displaying a spinner in the console (see `_status`)."""
+
     def __init__(self, name: str, _type: type, item_name: str, cache_validity: int = 12):
         """This is an abstract class to provide a common interface when fetching investments from
         multiple sources.
@@ -24,17 +35,36 @@ class SourceBase:
         activate this source is the lower-case name.
         :param _type: Used by children classes to specify what type of object the source generates.
         :param cache_validity: Finalynx will save fetched results to a file and reuse them on
-        the next run if the cache age is less than the specified number of hours.
+        the next run if the cache age is less than the specified number of hours. Cache files
+        are saved in the folder returned by `finalynx.config.get_cache_dir`.
         """
         self.name = name
         self.cache_validity = cache_validity
-        self.cache_fullpath = os.path.join(os.path.dirname(__file__), f"{self.id}_cache.json")
         self._type = _type
         self._item_name = item_name
 
         # This list will hold all fetched objects
         self._fetched_items: List[Any] = []
 
+        # List where the `_register_*` methods add the items found by `_fetch_data`, same as `_fetched_items`
+        # except when a stale cache is being refreshed in the background (see `revalidate`)
+        self._new_items: List[Any] = self._fetched_items
+
+        # Whether to add each fetched item to the returned tree, can be disabled if it will not be displayed
+        self.build_tree = True
+
+        # Whether to use an outdated cache immediately while fetching fresh data in the background
+        self.revalidate = False
+
+        # Set when the fetched items come from an outdated cache, until the background refresh replaces them
+        self.is_stale = False
+
+        # Set when the background refresh has replaced the stale items, reset once the new items have been used
+        self.refreshed = False
+
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._refresh_callbacks: List[Callable[["SourceBase"], None]] = []
+
     def _fetch(
         self,
         clear_cache: bool,
@@ -46,18 +76,27 @@ class SourceBase:
         console.log(f"Fetching data from {self.name}...")
 
         # Remove the cached data for this source if asked by the user
-        if clear_cache and os.path.exists(self.cache_fullpath):
+        cache = CacheFile(self.cache_fullpath)
+        if clear_cache and cache.exists():
             self._log("Deleting cache per user request.")
-            os.remove(self.cache_fullpath)
+            cache.delete()
 
         # This will hold a key:amount dictionary of all lines found in the source
-        self._fetched_items = self._get_cache()  # try to get the data in the cache first
+        self.is_stale = False
+        self._fetched_items = self._get_cache(stale=self.revalidate)  # try to get the data in the cache first
         tree = Tree(self.name, highlight=True, hide_root=True)
 
+        # If the cache is outdated but can be used while waiting, fetch the data online in the background
+        if self.is_stale:
+            if self._prepare_refresh():
+                self._refresh_thread = threading.Thread(target=self._refresh, name=f"refresh-{self.id}", daemon=True)
+                self._refresh_thread.start()
+
         # If there's no valid cache, signin and fetch the data online
-        if not self._fetched_items:
+        elif not self._fetched_items:
             try:
                 # Go fetch the data online and populate self._fetched_lines through `_register_fetchline`
+                self._fetched_items = self._new_items = []
                 self._fetch_data(tree)
             except Exception as e:
                 self._log("[red bold]Error: Couldn't fetch data, please try using the `-f` option to signin again.")
@@ -76,44 +115,105 @@ class SourceBase:
         each fetched investment."""
         raise NotImplementedError("This abstract method must be overriden by all subclasses")
 
-    def _get_cache(self) -> List[Any]:
-        """Attempt to retrieve the cached data. Check if more than an hour has passed since the last update.
-        :returns: A key:amount dictionary if the cache file is less than an hour old, None otherwise.
+    def _get_cache(self, stale: bool = False) -> List[Any]:
+        """Attempt to retrieve the cached data. Only the cache header is read to check if it is recent enough.
+        :param stale: Also return the cached items if the cache is outdated, `is_stale` is then set to True.
+        :returns: The list of cached items if the cache file is recent enough, an empty list otherwise.
         """
+        cache = CacheFile(self.cache_fullpath)
 
         # Abort retrieving cache if the file doesn't exist
-        if not os.path.exists(self.cache_fullpath):
+        if not cache.exists():
             self._log("No cache file found, fetching data.")
             return []
 
-        # Parse the JSON content
-        with open(self.cache_fullpath) as f:
-            data = json.load(f)
-
-        # Return the cached content if the cache file is less than the maximum age
-        last_updated = datetime.datetime.strptime(data["last_updated"], "%Y-%m-%d %H:%M:%S")
-        time_diff = datetime.datetime.now() - last_updated
-        hours_passed = int(time_diff.total_seconds() // 3600)
+        # Check the cache age from the header, without parsing the cached items
+        hours_passed = cache.get_age()
+        if hours_passed is None:
+            self._log("[yellow][bold]Warning:[/] Cache file is invalid or outdated, fetching data.")
+            return []
+        if hours_passed >= self.cache_validity and not stale:
+            self._log(f"Fetching data (cache file is {hours_passed}h old > {self.cache_validity}h max)")
+            return []
 
-        if hours_passed < self.cache_validity:
+        # Parse the cached content, which can still be corrupted
+        data = cache.read()
+        if data is None:
+            self._log("[yellow][bold]Warning:[/] Cache file is corrupted, fetching data.")
+            return []
+        if hours_passed >= self.cache_validity:
+            self._log(f"Using cached data while refreshing in the background ({hours_passed}h old)")
+            self.is_stale = True
+        else:
             self._log(f"Using recently cached data (<{self.cache_validity}h max)")
 
-            # Assume the children class' generated object has a `from_dict` method
-            return [self._type.from_dict(line_dict) for line_dict in data[self._item_name]]  # type: ignore
-        self._log(f"Fetching data (cache file is {hours_passed}h old > {self.cache_validity}h max)")
-        return []
+        # Assume the children class' generated object has a `from_dict` method
+        return [self._type.from_dict(line_dict) for line_dict in data[self._item_name]]  # type: ignore
 
     def _save_cache(self) -> None:
         """Save the fetched data locally to work offline and reduce the amoutn of calls to the API.
-        :param tree: Generated tree object containing all information
+        The cache file is replaced at once, so that overlapping runs never read a partially written file.
         """
+        try:
+            data = {self._item_name: [line.to_dict() for line in self._fetched_items]}
+            CacheFile(self.cache_fullpath).write(data, get_cache_format())
+            self._log(f"Saved fetched data to '{self.cache_fullpath}'")
+        except OSError as e:
+            self._log(f"[yellow][bold]Warning:[/] Couldn't save the fetched data to the cache ({e})")
+
+    def _prepare_refresh(self) -> bool:
+        """Called from the main thread before fetching fresh data in the background. The background thread must
+        never ask for user input, so sources that need to sign in must do it here if no input is needed.
+        :returns: False to skip the background refresh and keep using the outdated cached data."""
+        return True
+
+    def _refresh(self) -> None:
+        """Internal method run in a background thread to fetch fresh data while the stale cached items are
+        being used. The cached items are only replaced once all new items have been fetched successfully."""
+        self._new_items = []
+        try:
+            with profiler.span(f"{self.name} (background refresh)"):
+                self._fetch_data(Tree(self.name))
+        except Exception as e:
+            self._new_items = self._fetched_items
+            self._log(f"[yellow][bold]Warning:[/] Couldn't refresh {self.name} data, keeping the cached data ({e})")
+            return
+
+        self._fetched_items = self._new_items
+        self.is_stale = False
+        self.refreshed = True
+        self._save_cache()
+        for callback in self._refresh_callbacks:
+            callback(self)
+
+    def add_refresh_callback(self, callback: Callable[["SourceBase"], None]) -> None:
+        """Register a function called (from the background thread) when fresh data replaced the stale cache."""
+        self._refresh_callbacks.append(callback)
+
+    def wait_refresh(self, timeout: Optional[float] = None) -> None:
+        """Block until the background refresh is finished, if any.
+        :param timeout: Maximum number of seconds to wait, waits indefinitely by default."""
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout)
 
-        # Save current date and time to a JSON file with the fetched data
-        self._log(f"Saved fetched data to '{self.cache_fullpath}'")
-        current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        data = {"last_updated": current_time, self._item_name: [line.to_dict() for line in self._fetched_items]}
-        with open(self.cache_fullpath, "w") as f:
-            json.dump(data, f, indent=4)
+    @property
+    def is_refreshing(self) -> bool:
+        """Whether fresh data is still being fetched in the background."""
+        return self._refresh_thread is not None and self._refresh_thread.is_alive()
+
+    @contextmanager
+    def _status(self, message: str) -> Iterator[None]:
+        """Display a spinner with a message while waiting for the source. The console can only display
+        one spinner at a time, so sources fetched in parallel (see `Fetch`) skip theirs if one is shown.
+        Sources refreshing in the background never show a spinner."""
+        if self.is_refreshing or not SourceBase._status_lock.acquire(blocking=False):
+            yield
+            return
+        try:
+            with console.status(message, spinner_style=TH().ACCENT):
+                yield
+        finally:
+            SourceBase._status_lock.release()
 
     def _log(self, message: str, **kwargs: Any) -> None:
         console.log(" " * 4 + message, **kwargs)
@@ -121,3 +221,8 @@ class SourceBase:
     @property
     def id(self) -> str:
         return self.name.lower()
+
+    @property
+    def cache_fullpath(self) -> str:
+        """Path to this source's cache file, in the cache folder set when fetching."""
+        return os.path.join(get_cache_dir(), f"{self.id}.cache")
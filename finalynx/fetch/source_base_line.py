@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Any
 from typing import Dict
 from typing import List
@@ -10,31 +11,51 @@ from ..config import get_active_theme as TH
 from ..portfolio import Line
 from ..portfolio import Portfolio
 from .fetch_line import FetchLine
+from .line_matcher import LineMatcher
+from .line_matcher import MatchReport
 from .source_base import SourceBase
 
+# Account names and some security names are repeated for many lines, only convert them once
+_unidecode = lru_cache(maxsize=4096)(unidecode)
+
 
 class SourceBaseLine(SourceBase):
     def __init__(self, name: str, cache_validity: int = 12):
         super().__init__(name, FetchLine, "lines", cache_validity)
+        self.report = MatchReport()
 
     def fetch(
         self,
         portfolio: Portfolio,
         clear_cache: bool,
         ignore_orphans: bool,
+        matcher: Optional[LineMatcher] = None,
     ) -> Tree:
         """Fetch data online from a source that contains investment `Line` objects.
         :param clear_cache: Delete cached data to immediately fetch data online, defaults to False
         :param ignore_orphans: If a line in your account is not referenced in your `Portfolio` instance
         then don't attach it to the root (used as a reminder), defaults to False
+        :param matcher: Optional `LineMatcher` index of the portfolio, shared by all sources. Created if not set.
         :returns: A `Tree` object from the `rich` package used to display what has been fetched.
         """
         tree = self._fetch(clear_cache)
+        self.match(portfolio, ignore_orphans, matcher)
+        return tree
+
+    def match(self, portfolio: Portfolio, ignore_orphans: bool, matcher: Optional[LineMatcher] = None) -> None:
+        """Match the lines fetched by `_fetch` with the portfolio lines and update them.
+        This step modifies the portfolio, it must not run concurrently with other sources.
+        :param ignore_orphans: If a line in your account is not referenced in your `Portfolio` instance
+        then don't attach it to the root (used as a reminder), defaults to False
+        :param matcher: Optional `LineMatcher` index of the portfolio, shared by all sources. Created if not set.
+        """
+        matcher = matcher if matcher else LineMatcher(portfolio)
+        self.report = MatchReport()
 
         # If the cache is not empty, Match all lines to the portfolio hierarchy
         for fline in self._fetched_items:
             name = fline.name if fline.name else "Unknown"
-            matched_lines: List[Line] = list(set(portfolio.match_lines(fline)))  # merge identical instances
+            matched_lines = matcher.match_lines(fline)
 
             # Set attributes to the first matched line
             if matched_lines:
@@ -44,20 +65,23 @@ class SourceBaseLine(SourceBase):
                         f"[yellow][bold]Warning:[/] Line matched with multiple nodes, updating first only: {name}",
                         highlight=False,
                     )
+                    self.report.multiple.append((fline, matched_lines))
+                else:
+                    self.report.matched.append((fline, matched_lines[0]))
 
                 # Update the first line's attributes based on whata has been found online
-                fline.update_line(matched_lines[0])
+                matcher.update_line(fline, matched_lines[0])
 
             # If no line matched, attach a fake line to root (unless ignored)
-            elif not ignore_orphans:
-                self._log(
-                    f"[yellow][bold]Warning:[/] Line did not match with any node, attaching to root: {name}"
-                    " (ignore with --ignore-orphans)",
-                    highlight=False,
-                )
-                portfolio.add_child(Line(name, amount=fline.amount, currency=fline.currency))
-
-        return tree
+            else:
+                self.report.orphans.append(fline)
+                if not ignore_orphans:
+                    self._log(
+                        f"[yellow][bold]Warning:[/] Line did not match with any node, attaching to root: {name}"
+                        " (ignore with --ignore-orphans)",
+                        highlight=False,
+                    )
+                    matcher.add_line(Line(name, amount=fline.amount, currency=fline.currency), portfolio)
 
     def _register_fetchline(
         self,
@@ -76,12 +100,13 @@ class SourceBaseLine(SourceBase):
             return
 
         # Discard non-ASCII characters in the fields
-        name, id, account, amount = unidecode(name), str(id), unidecode(account), round(float(amount))
+        name, id, account, amount = _unidecode(name), str(id), _unidecode(account), round(float(amount))
 
         # Add the line to the rendering tree
-        tree_node.add(f"{amount} {currency} {name} [{TH().HINT}]{id=}")
+        if self.build_tree:
+            tree_node.add(f"{amount} {currency} {name} [{TH().HINT}]{id=}")
 
         # Form a FetLine instance from the information given and return it
-        self._fetched_items.append(
+        self._new_items.append(
             FetchLine(name=name, id=id, account=account, custom=custom, amount=amount, currency=currency)
         )
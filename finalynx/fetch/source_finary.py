@@ -3,10 +3,9 @@ import os
 from typing import Any
 from typing import Dict
 from typing import Optional
+from typing import Tuple
 
-import finary_uapi.__main__ as ff
 import finary_uapi.constants
-import finary_uapi.user_portfolio
 from requests import Session
 from rich.prompt import Confirm
 from rich.tree import Tree
@@ -15,23 +14,75 @@ from ..config import get_active_theme as TH
 from ..console import console
 from .source_base_line import SourceBaseLine
 
+# Set the credentials and cookies constants to a full path, before importing the modules that copy them
+finary_uapi.constants.CREDENTIAL_FILE = os.path.join(os.path.dirname(__file__), "finary_credentials.json")
+finary_uapi.constants.COOKIE_FILENAME = os.path.join(os.path.dirname(__file__), "finary_cookies.txt")
+finary_uapi.constants.JWT_FILENAME = os.path.join(os.path.dirname(__file__), "jwt.json")
+
+import finary_uapi.__main__ as ff  # noqa: E402
+import finary_uapi.user_portfolio  # noqa: E402
+
+_ACCOUNT = "<account>"  # Marks a field path starting from the account instead of the item
+
 
 class SourceFinary(SourceBaseLine):
     """Wrapper class for the `finary_uapi` package."""
 
-    _categories = [
-        "fiats",
-        "securities",
-        "cryptos",
-        "fonds_euro",
-        "startups",
-        "precious_metals",
-        "scpis",
-        "generic_assets",
-        "real_estates",
-        "loans",
-        "crowdlendings",
-    ]
+    _categories: Dict[str, Tuple[Tuple[str, ...], ...]] = {
+        "fiats": (
+            (_ACCOUNT, "name"),
+            ("display_current_value",),
+            ("fiat", "symbol"),
+            (_ACCOUNT, "institution", "name"),
+        ),
+        "securities": (
+            ("security", "name"),
+            ("display_current_value",),
+            ("security", "display_currency", "symbol"),
+            (_ACCOUNT, "name"),
+        ),
+        "crowdlendings": (("name",), ("display_current_price",), ("currency", "symbol"), (_ACCOUNT, "name")),
+        "cryptos": (
+            ("crypto", "name"),
+            ("display_current_value",),
+            ("buying_price_currency", "symbol"),
+            (_ACCOUNT, "name"),
+        ),
+        "fonds_euro": (
+            ("name",),
+            ("display_current_value",),
+            (_ACCOUNT, "display_currency", "symbol"),
+            (_ACCOUNT, "name"),
+        ),
+        "precious_metals": (
+            ("precious_metal", "name"),
+            ("display_current_value",),
+            ("precious_metal", "display_currency", "symbol"),
+            (_ACCOUNT, "name"),
+        ),
+        "startups": (("startup", "name"), ("display_current_value",), ("currency", "symbol"), (_ACCOUNT, "name")),
+        "scpis": (
+            ("scpi", "name"),
+            ("display_current_value",),
+            ("scpi", "display_currency", "symbol"),
+            (_ACCOUNT, "name"),
+        ),
+        "generic_assets": (("name",), ("display_current_value",), ("currency", "symbol"), (_ACCOUNT, "name")),
+        "real_estates": (
+            ("description",),
+            ("display_current_value",),
+            (_ACCOUNT, "display_currency", "symbol"),
+            (_ACCOUNT, "name"),
+        ),
+        "loans": (
+            (_ACCOUNT, "name"),
+            (_ACCOUNT, "display_balance"),
+            (_ACCOUNT, "display_currency", "symbol"),
+            (_ACCOUNT, "name"),
+        ),
+    }
+    """Paths to the name, amount, currency and account name of the items in each category of a Finary
+    account. Paths starting with `_ACCOUNT` are read from the account instead of the item."""
 
     def __init__(
         self,
@@ -73,6 +124,23 @@ class SourceFinary(SourceBaseLine):
         super().__init__(name, cache_validity)
         self.force_signin = force_signin
 
+        # Session retrieved in the main thread before a background refresh (see `_prepare_refresh`)
+        self._session: Optional[Session] = None
+
+    def _prepare_refresh(self) -> bool:
+        """Retrieve the saved session before refreshing in the background. Signing in may ask for credentials
+        or a 2FA code, which is not possible from the background thread, so the outdated data is kept instead."""
+        if self.force_signin or not os.path.exists(finary_uapi.constants.COOKIE_FILENAME):
+            self._log(
+                "[yellow][bold]Warning:[/] Signing in to Finary may need your input, keeping the outdated cached "
+                "data. Run without `--background-refresh` to sign in."
+            )
+            return False
+
+        self._log("Found cookies file, retrieving session.")
+        self._session = ff.prepare_session()
+        return True
+
     def _authenticate(self) -> Optional[Session]:
         """Internal method used to signin and retrieve a session from Finary.
         Called by `_fetch_data` once, only exists for better logic separation.
@@ -126,11 +194,10 @@ class SourceFinary(SourceBaseLine):
         # Login to Finary with the existing cookies file or credentials in environment variables and retrieve data
         if os.environ.get("FINARY_EMAIL") and os.environ.get("FINARY_PASSWORD"):
             self._log("Signing in to Finary...")
-            with console.status(
+            with self._status(
                 f"""[bold {TH().ACCENT}]Signing in to Finary...[/]  """
                 """[dim white](Type your 2FA code if prompted and press [italic]Enter[/], """
-                """it will remain invisible while you type)""",
-                spinner_style=TH().ACCENT,
+                """it will remain invisible while you type)"""
             ):
                 result = ff.signin()
                 self._log("Signed in to Finary.")
@@ -168,136 +235,50 @@ class SourceFinary(SourceBaseLine):
         The `tree` instance can be displayed in the console to make sure everything was retrieved.
         """
 
-        # Retrieve the user session from cache, environment variables, or manual login
-        session = self._authenticate()
+        # Retrieve the session prepared for a background refresh, or sign in from cache, environment
+        # variables, or manual login
+        session = self._session if self._session else self._authenticate()
+        self._session = None
         if not session:
             raise ValueError("Finary signin failed.")
 
         # Call the API and parse the response into `FetchLine` instances
-        with console.status(
-            f"[bold {TH().ACCENT}]Fetching investments from Finary...",
-            spinner_style=TH().ACCENT,
-        ):
+        with self._status(f"[bold {TH().ACCENT}]Fetching investments from Finary..."):
             response = ff.get_holdings_accounts(session)
             if response["message"] == "OK":
                 for dict_account in response["result"]:
                     self._process_account(dict_account, tree)
 
     def _process_account(self, dict_account: Dict[str, Any], tree: Tree) -> None:
+        """Internal method to register the items of every category in a Finary account (see `_categories`)."""
         account_name = dict_account["name"]
-        node = tree.add(account_name if not dict_account["fiats"] else dict_account["institution"]["name"])
-
-        for item in dict_account["fiats"]:
-            if dict_account["bank_account_type"]["subtype"] == "credit":
-                amount = -item["display_current_value"]
-            else:
-                amount = item["display_current_value"]
-
-            self._register_fetchline(
-                tree_node=node,
-                name=account_name,
-                id=item["id"],
-                account=dict_account["institution"]["name"],
-                amount=amount,
-                currency=item["fiat"]["symbol"],
-            )
-
-        for item in dict_account["securities"]:
-            self._register_fetchline(
-                tree_node=node,
-                name=item["security"]["name"],
-                id=item["id"],
-                account=account_name,
-                amount=item["display_current_value"],
-                currency=item["security"]["display_currency"]["symbol"],
-            )
-
-        for item in dict_account["crowdlendings"]:
-            self._register_fetchline(
-                tree_node=node,
-                name=item["name"],
-                id=item["id"],
-                account=account_name,
-                amount=item["display_current_price"],
-                currency=item["currency"]["symbol"],
-            )
-
-        for item in dict_account["cryptos"]:
-            self._register_fetchline(
-                tree_node=node,
-                name=item["crypto"]["name"],
-                id=item["id"],
-                account=account_name,
-                amount=item["display_current_value"],
-                currency=item["buying_price_currency"]["symbol"],
-            )
-
-        for item in dict_account["fonds_euro"]:
-            self._register_fetchline(
-                tree_node=node,
-                name=item["name"],
-                id=item["id"],
-                account=account_name,
-                amount=item["display_current_value"],
-                currency=dict_account["display_currency"]["symbol"],
-            )
-
-        for item in dict_account["precious_metals"]:
-            self._register_fetchline(
-                tree_node=node,
-                name=item["precious_metal"]["name"],
-                id=item["id"],
-                account=account_name,
-                amount=item["display_current_value"],
-                currency=item["precious_metal"]["display_currency"]["symbol"],
-            )
-
-        for item in dict_account["startups"]:
-            self._register_fetchline(
-                tree_node=node,
-                name=item["startup"]["name"],
-                id=item["id"],
-                account=account_name,
-                amount=item["display_current_value"],
-                currency=item["currency"]["symbol"],
-            )
-
-        for item in dict_account["scpis"]:
-            self._register_fetchline(
-                tree_node=node,
-                name=item["scpi"]["name"],
-                id=item["id"],
-                account=account_name,
-                amount=item["display_current_value"],
-                currency=item["scpi"]["display_currency"]["symbol"],
-            )
-
-        for item in dict_account["generic_assets"]:
-            self._register_fetchline(
-                tree_node=node,
-                name=item["name"],
-                id=item["id"],
-                account=account_name,
-                amount=item["display_current_value"],
-                currency=item["currency"]["symbol"],
-            )
-
-        for item in dict_account["real_estates"]:
-            self._register_fetchline(
-                tree_node=node,
-                name=item["description"],
-                id=item["id"],
-                account=account_name,
-                amount=item["display_current_value"],
-                currency=dict_account["display_currency"]["symbol"],
-            )
+        node = tree
+        if self.build_tree:
+            node = tree.add(account_name if not dict_account["fiats"] else dict_account["institution"]["name"])
+
+        for category, (name_path, amount_path, currency_path, account_path) in self._categories.items():
+            for item in dict_account[category]:
+                amount = self._get_field(dict_account, item, amount_path)
+
+                # Credit cards and loans are debts
+                if category == "loans":
+                    amount = -round(amount)
+                elif category == "fiats" and dict_account["bank_account_type"]["subtype"] == "credit":
+                    amount = -amount
+
+                self._register_fetchline(
+                    tree_node=node,
+                    name=self._get_field(dict_account, item, name_path),
+                    id=item["id"],
+                    account=self._get_field(dict_account, item, account_path),
+                    amount=amount,
+                    currency=self._get_field(dict_account, item, currency_path),
+                )
 
-        for item in dict_account["loans"]:
-            self._register_fetchline(
-                tree_node=node,
-                name=account_name,
-                id=item["id"],
-                account=account_name,
-                amount=-round(dict_account["display_balance"]),
-                currency=dict_account["display_currency"]["symbol"],
-            )
+    @staticmethod
+    def _get_field(dict_account: Dict[str, Any], item: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+        """Internal method to read a value in an account item, or in the account itself (see `_categories`)."""
+        value = dict_account if path[0] == _ACCOUNT else item
+        for key in path[1:] if path[0] == _ACCOUNT else path:
+            value = value[key]
+        return value
@@ -1,86 +1,186 @@
-import json
+import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Union
 
 import requests
+from requests.adapters import HTTPAdapter
 from rich.tree import Tree
 
 from ..config import get_active_theme as TH
-from ..console import console
+from ..config import get_cache_dir
+from ..config import get_cache_format
+from .cache import CacheFile
 from .source_base_line import SourceBaseLine
 
 
 GNOSIS_API_TOKENLIST_URI = "https://blockscout.com/xdai/mainnet/api?module=account&action=tokenlist&address="
 REALT_API_TOKENLIST_URI = "https://api.realt.community/v1/token"
+REQUEST_TIMEOUT = 30  # seconds
 
 
 class SourceRealT(SourceBaseLine):
-    def __init__(self, wallet_address: str, name: str = "RealT", cache_validity: int = 120) -> None:
+    _token_cache_lock = threading.RLock()
+    """Shared by all RealT sources, which may read and write the token cache file from background threads."""
+
+    def __init__(
+        self,
+        wallet_address: str,
+        name: str = "RealT",
+        cache_validity: int = 120,
+        token_cache_validity: int = 24,
+        max_workers: int = 8,
+    ) -> None:
         """RealT wrapper to fetch an address' investments.
         :param wallet_address: Your wallet address.
         :param name: Set this source's name, can be changed when using multiple RealT sources
         for multiple RealT addresses.
         :param cache_validity: Finalynx will save fetched results to a file and reuse them on
         the next run if the cache age is less than the specified number of hours.
+        :param token_cache_validity: The list of RealT tokens (names and prices) is cached separately
+        and shared by all RealT sources, it is downloaded again if older than this number of hours.
+        :param max_workers: Maximum number of simultaneous requests to resolve `armmR` tokens.
         """
         super().__init__(name, cache_validity)  # cache is valid for 5 days
         self.wallet_address = wallet_address
+        self.token_cache_validity = token_cache_validity
+        self.max_workers = max_workers
+
+        # Reuse connections between requests, with enough connections for concurrent requests
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_maxsize=max_workers))
 
     def _fetch_data(self, tree: Tree) -> None:
         """Get investments from RealT and match them with information found on the specified wallet."""
 
-        with console.status(f"[bold {TH().ACCENT}]Fetching data from {self.name}...", spinner_style=TH().ACCENT):
-            # Todo optimize API call with API key and/or cached file
-            # Get list of all Realtoken info needed from RealT
-            realt_tokenlist = json.loads(requests.get(REALT_API_TOKENLIST_URI).text)
-            realt_tokeninfo = {}
-            for item in realt_tokenlist:
-                realt_tokeninfo.update(
-                    {
-                        item["uuid"].lower(): {
-                            "fullName": item["fullName"],
-                            "shortName": item["shortName"],
-                            "tokenPrice": item["tokenPrice"],
-                            "uuid": item["uuid"],
-                        }
-                    }
-                )
-
+        with self._status(f"[bold {TH().ACCENT}]Fetching data from {self.name}..."):
             # Get list of token own from Gnosis address
-            gnosis_tokenlist = json.loads(requests.get(GNOSIS_API_TOKENLIST_URI + self.wallet_address).text)
+            gnosis_tokenlist = self._get_json(GNOSIS_API_TOKENLIST_URI + self.wallet_address)
+            items = [i for i in gnosis_tokenlist["result"] if re.match(r"^(REALTOKEN|armmR)", str(i["symbol"]))]
+
+            # Get the RealT tokens info (cached), the `armmR` tokens point to the RealT token they hold
+            token_cache = self._get_token_cache(items)
+            realt_tokeninfo: Dict[str, Dict[str, Any]] = token_cache["tokens"]
+            underlying = self._get_underlying_addresses(items, token_cache)
 
             # Display the lines found to the console, you can create a nested tree if you want
             node = tree.add("RealT")
 
             # Register the real investment information, will be cached and matched to the portfolio
-            for item in gnosis_tokenlist["result"]:
+            for item in items:
                 address = str(item["contractAddress"])
                 try:
                     amount = float(item["balance"]) / pow(10, int(item["decimals"]))
 
                     if re.match(r"^REALTOKEN", str(item["symbol"])):
-                        info = realt_tokeninfo[address.lower()]
-
-                        self._register_fetchline(
-                            tree_node=node,
-                            name=info["shortName"],
-                            id=info["uuid"],
-                            account=self.name,
-                            amount=amount * info["tokenPrice"],
-                            currency="$",
-                        )
-
-                    if re.match(r"^armmR", str(item["symbol"])):
-                        original_contract_address = json.loads(requests.get(GNOSIS_API_TOKENLIST_URI + address).text)
-                        key = str(original_contract_address["result"][0]["contractAddress"]).lower()
-
-                        self._register_fetchline(
-                            tree_node=node,
-                            name=realt_tokeninfo[key]["shortName"],
-                            id=realt_tokeninfo[key]["uuid"],
-                            account=self.name,
-                            amount=amount * realt_tokeninfo[key]["tokenPrice"],
-                            currency="$",
-                        )
+                        key = address.lower()
+                    else:
+                        resolved = underlying[address.lower()]
+                        if isinstance(resolved, Exception):
+                            raise resolved
+                        key = resolved
+
+                    info = realt_tokeninfo[key]
+                    self._register_fetchline(
+                        tree_node=node,
+                        name=info["shortName"],
+                        id=info["uuid"],
+                        account=self.name,
+                        amount=amount * info["tokenPrice"],
+                        currency="$",
+                    )
 
                 except Exception as e:
                     self._log(f"[yellow][bold]Warning:[/] failed to parse line '{address}', skipping ({e})")
+
+    def _get_json(self, url: str) -> Any:
+        """Internal method to send a GET request with the shared session.
+        :returns: The parsed JSON response."""
+        response = self._session.get(url, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+    def _get_token_cache(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Internal method to get the info of each RealT token from the token cache file. The list is downloaded
+        again if the cache is too old or if a `REALTOKEN` held by the wallet is missing (e.g. a new property).
+        :param items: Tokens held by the wallet, as returned by the Gnosis API.
+        :returns: A dictionary with the `tokens` info (by lowercase address) and the `underlying`
+        RealT token addresses of the `armmR` tokens already resolved."""
+        token_cache_file = CacheFile(self.token_cache_fullpath)
+        with SourceRealT._token_cache_lock:
+            cache: Dict[str, Any] = {"tokens": {}, "underlying": {}}
+            hours_passed = token_cache_file.get_age()
+            if hours_passed is not None:
+                cache.update(token_cache_file.read() or {})
+
+            # Check if the cached token list is recent enough and contains all tokens
+            realtokens = [str(i["contractAddress"]).lower() for i in items if re.match(r"^REALTOKEN", str(i["symbol"]))]
+            missing = [address for address in realtokens if address not in cache["tokens"]]
+
+            if hours_passed is not None and hours_passed < self.token_cache_validity and not missing:
+                self._log(f"Using cached RealT token list (<{self.token_cache_validity}h max)")
+                return cache
+
+            # Get list of all Realtoken info needed from RealT
+            cache["tokens"] = {
+                item["uuid"].lower(): {
+                    "fullName": item["fullName"],
+                    "shortName": item["shortName"],
+                    "tokenPrice": item["tokenPrice"],
+                    "uuid": item["uuid"],
+                }
+                for item in self._get_json(REALT_API_TOKENLIST_URI)
+            }
+            self._save_token_cache(cache)
+            return cache
+
+    def _get_underlying_addresses(
+        self, items: List[Dict[str, Any]], token_cache: Dict[str, Any]
+    ) -> Dict[str, Union[str, Exception]]:
+        """Internal method to find the RealT token held by each `armmR` token. Addresses that are not
+        in the token cache yet are requested in parallel, then saved in the cache as they never change.
+        :returns: A dictionary with the `armmR` addresses as keys and the RealT token addresses (lowercase)
+        as values, or the exception raised if the request failed."""
+        known: Dict[str, str] = token_cache["underlying"]
+        addresses = {str(item["contractAddress"]).lower() for item in items if re.match(r"^armmR", str(item["symbol"]))}
+        unknown = sorted(addresses - known.keys())
+
+        def _resolve(address: str) -> Union[str, Exception]:
+            try:
+                return str(self._get_json(GNOSIS_API_TOKENLIST_URI + address)["result"][0]["contractAddress"]).lower()
+            except Exception as e:
+                return e
+
+        resolved: Dict[str, Union[str, Exception]] = {}
+        if unknown:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                resolved.update(zip(unknown, executor.map(_resolve, unknown)))
+
+            # Save the new addresses for the next fetches, without changing the age of the token list
+            known.update({k: v for k, v in resolved.items() if isinstance(v, str)})
+            self._save_token_cache(token_cache, keep_date=True)
+
+        resolved.update({address: known[address] for address in addresses if address in known})
+        return resolved
+
+    def _save_token_cache(self, cache: Dict[str, Any], keep_date: bool = False) -> None:
+        """Internal method to save the RealT token list and the resolved `armmR` tokens to the token cache file.
+        :param keep_date: Keep the date of the previous token list instead of marking it as updated now."""
+        token_cache_file = CacheFile(self.token_cache_fullpath)
+        with SourceRealT._token_cache_lock:
+            header = token_cache_file.read_header() if keep_date else None
+
+            # Keep the `armmR` tokens resolved meanwhile by other RealT sources
+            saved = token_cache_file.read() if header else None
+            if saved:
+                cache["underlying"] = {**saved.get("underlying", {}), **cache["underlying"]}
+            token_cache_file.write(cache, get_cache_format(), last_updated=header["last_updated"] if header else None)
+
+    @property
+    def token_cache_fullpath(self) -> str:
+        """Path to the RealT token cache file, shared by all RealT sources."""
+        return os.path.join(get_cache_dir(), "realt_tokens.cache")
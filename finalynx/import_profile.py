@@ -0,0 +1,109 @@
+"""
+Measure how long each module takes to import, enabled with the `--import-profile` command-line option.
+
+The profiler is installed by `finalynx/__init__.py` before importing the rest of the package, so it records
+every module imported afterwards (Finalynx's modules and their dependencies), including the ones only imported
+when an option is used (e.g. `budget` or the Finary source). Modules imported before `finalynx` are not listed.
+The measured times are similar to the ones printed by `python -X importtime`.
+"""
+import importlib.abc
+import sys
+import threading
+import time
+from importlib.machinery import ModuleSpec
+from types import ModuleType
+from typing import Any
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from rich.table import Table
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wraps the loader of a module to measure the time spent executing it, other calls are forwarded."""
+
+    def __init__(self, loader: Any, profiler: "ImportProfiler") -> None:
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec: ModuleSpec) -> Optional[ModuleType]:
+        return self._loader.create_module(spec)  # type: ignore
+
+    def exec_module(self, module: ModuleType) -> None:
+        self._profiler._exec_module(self._loader, module)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    """Import hook that records the time spent importing each module."""
+
+    def __init__(self) -> None:
+        # Module name, time spent in the module itself and time including its own imports (in seconds)
+        self.timings: List[Tuple[str, float, float]] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()  # Stack of the modules being imported in each thread
+
+    def find_spec(
+        self, fullname: str, path: Optional[Sequence[str]], target: Optional[ModuleType] = None
+    ) -> Optional[ModuleSpec]:
+        """Find the module with the other finders and wrap its loader to time the import."""
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec: Optional[ModuleSpec] = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    def _exec_module(self, loader: Any, module: ModuleType) -> None:
+        """Internal method to execute a module with its original loader and record the time it took."""
+        stack: List[float] = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)  # Time spent importing the children modules
+        start = time.perf_counter()
+        try:
+            loader.exec_module(module)
+        finally:
+            cumulative = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += cumulative
+            with self._lock:
+                self.timings.append((module.__name__, cumulative - children, cumulative))
+
+    def render(self, max_rows: int = 30) -> "Table":
+        """:returns: A table with the modules that took the longest to import (including their own imports)."""
+        from rich.table import Table
+
+        total = sum(timing[1] for timing in self.timings)
+        table = Table(title=f"Import time: {total:.3f}s for {len(self.timings)} modules")
+        table.add_column("Cumulative", justify="right")
+        table.add_column("Self", justify="right")
+        table.add_column("Module")
+
+        for name, self_time, cumulative in sorted(self.timings, key=lambda t: t[2], reverse=True)[:max_rows]:
+            table.add_row(f"{cumulative * 1000:.1f} ms", f"{self_time * 1000:.1f} ms", name)
+        return table
+
+
+_profiler: Optional[ImportProfiler] = None
+
+
+def enable_import_profile() -> None:
+    """Install the import profiler, only if the `--import-profile` option was passed on the command line."""
+    global _profiler
+    if _profiler is None and "--import-profile" in sys.argv:
+        _profiler = ImportProfiler()
+        sys.meta_path.insert(0, _profiler)
+
+
+def get_import_profiler() -> Optional[ImportProfiler]:
+    """:returns: The import profiler, or None if `--import-profile` was not used."""
+    return _profiler
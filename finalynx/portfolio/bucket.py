@@ -1,11 +1,12 @@
+import bisect
 import itertools
 from typing import Any
 from typing import Dict
 from typing import List
+from typing import Tuple
 from typing import TYPE_CHECKING
 
-import numpy as np
-
+from ..profiler import profiler
 from .line import Line
 
 if TYPE_CHECKING:
@@ -29,59 +30,97 @@ class Bucket:
         that use this `Bucket`.
         """
         self.name = name
-        self.lines = [] if lines is None else lines
         self._prev_amount_used: float = 0
         self.amount_used: float = 0
 
+        # Cumulative sums of the line amounts, valid until the amount of a bucket line changes (see `invalidate`)
+        self._revision = 0
+        self._prefix_sums: List[float] = []
+        self._prefix_revision = -1
+        self.lines = [] if lines is None else lines
+
+    @property
+    def lines(self) -> List["Line"]:
+        """Lines shared by the `SharedFolder` objects using this bucket."""
+        return self._lines
+
+    @lines.setter
+    def lines(self, lines: List["Line"]) -> None:
+        """Replace the lines, each line notifies this bucket when its amount changes."""
+        self._lines = lines
+        for line in lines:
+            line.bucket = self
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Mark the cumulative sums of the line amounts as outdated. Called automatically when the amount of
+        a bucket line changes or when `lines` is replaced, but must be called manually if you modify the
+        `lines` list in place."""
+        self._revision += 1
+
+    def _get_prefix_sums(self) -> List[float]:
+        """Internal method that returns the cumulative sums of the line amounts. They are only
+        recomputed when the amount of a bucket line changed since the last call.
+        :returns: A list where each element is the total amount of the lines up to this index (included)."""
+        if self._prefix_revision != self._revision or len(self._prefix_sums) != len(self.lines):
+            if profiler.enabled:
+                profiler.count("bucket prefix sums")
+            self._prefix_sums = list(itertools.accumulate(line.get_amount() for line in self.lines))
+            self._prefix_revision = self._revision
+        return self._prefix_sums
+
     def get_max_amount(self) -> float:
         """:returns: The total amount contained in this bucket."""
-        return float(np.sum([line.get_amount() for line in self.lines]))
-
-    def _get_cumulative_index(self, target: float) -> Dict[str, Any]:
-        """:returns: A dictionary containing the Line index where the cumulative sum meets,
-        and the remainder amount not used in this line."""
-        result = {"index": -1, "remainder": 0.0}
-        amounts = [line.get_amount() for line in self.lines]
-        cumulative_sum = list(itertools.accumulate(amounts))
-        for i, item in enumerate(cumulative_sum):
-            if item >= target:
-                result["index"] = i
-                result["remainder"] = target - (cumulative_sum[i - 1] if i != 0 else 0)
-                return result
-        return result
+        prefix_sums = self._get_prefix_sums()
+        return float(prefix_sums[-1]) if prefix_sums else 0.0
+
+    def _get_cumulative_index(self, target: float) -> Tuple[int, float]:
+        """:returns: The Line index where the cumulative sum meets the target (-1 if the target
+        is above the total amount), and the remainder amount used in this line."""
+        prefix_sums = self._get_prefix_sums()
+        index = bisect.bisect_left(prefix_sums, target)
+        if index == len(prefix_sums):
+            return -1, 0.0
+        return index, target - (prefix_sums[index - 1] if index != 0 else 0)
+
+    def get_slices(self) -> List[Tuple[int, float]]:
+        """:returns: The index of each line used between the two previous `use_amount()` calls,
+        along with the amount used in each line."""
+        if not self.lines:
+            return []
+
+        index_prev, remainder_prev = self._get_cumulative_index(self._prev_amount_used)
+        index, remainder = self._get_cumulative_index(self.amount_used)
+
+        if index == index_prev:
+            return [(index, remainder - remainder_prev)]
+
+        first = (index_prev, self.lines[index_prev].amount - remainder_prev)
+        return [first] + [(i, self.lines[i].amount) for i in range(index_prev + 1, index)] + [(index, remainder)]
 
     def get_lines(self) -> List["Line"]:
         """:returns: A copy of the `Bucket`'s lines between the two previous `use_amount()`
         calls."""
-        result_prev = self._get_cumulative_index(self._prev_amount_used)
-        result = self._get_cumulative_index(self.amount_used)
         sublines = []
-
-        if result["index"] == result_prev["index"]:
-            new_line = self.lines[result["index"]].copy()
-            new_line.amount = result["remainder"] - result_prev["remainder"]
+        for index, amount in self.get_slices():
+            new_line = self.lines[index].copy()
+            new_line.amount = amount
             sublines.append(new_line)
-        else:
-            line1 = self.lines[result_prev["index"]].copy()
-            line1.amount = line1.amount - result_prev["remainder"]
-            sublines.append(line1)
-
-            for i in range(result_prev["index"] + 1, result["index"]):
-                sublines.append(self.lines[i].copy())
-
-            line2 = self.lines[result["index"]].copy()
-            line2.amount = result["remainder"]
-            sublines.append(line2)
-
         return sublines
 
+    def use_slices(self, amount: float) -> List[Tuple[int, float]]:
+        """Ask to consume the specified amount from the bucket, without copying the lines.
+        :returns: A list of line indexes with their respective used amounts (see `get_slices`)."""
+        self._prev_amount_used = self.amount_used
+        self.amount_used = min(self.get_max_amount(), self.amount_used + amount)
+        return self.get_slices()
+
     def use_amount(self, amount: float) -> List["Line"]:
         """Ask to consume the specified amount from the bucket.
         :returns: A list of copies of the used Lines with their respective used amounts.
         Next time this method is called, the bucket will start from the cumulative amount
         used so far."""
-        self._prev_amount_used = self.amount_used
-        self.amount_used = min(self.get_max_amount(), self.amount_used + amount)
+        self.use_slices(amount)
         return self.get_lines()
 
     def get_used_amount(self) -> float:
@@ -91,28 +130,34 @@ class Bucket:
     def add_amount(self, amount: float) -> None:
         """Add or remove an amount to the bucket's lines. This can be used to dynamically change the
         bucket's total amount, e.g. to apply recommendations from Finalynx during the simulation"""
+        prefix_sums = self._get_prefix_sums()
 
         # If the amount is positive, add the amount to the last line in the bucket
         if amount > 0:
             if not self.lines:
                 raise ValueError("Cannot add amount to an empty bucket.")
             self.lines[-1].amount += amount
+            prefix_sums[-1] += amount
 
         # If the amount is negative, remove successively from each line
         else:
             amount *= -1
             removed_amount = 0.0
-            for line in reversed(self.lines):
-                remaining_amount = amount - removed_amount
+            for i in reversed(range(len(self.lines))):
+                line, remaining_amount = self.lines[i], amount - removed_amount
 
                 if line.amount >= remaining_amount:
                     line.amount -= remaining_amount
-                    return
+                    prefix_sums[i:] = [prefix_sums[i] - remaining_amount] * (len(self.lines) - i)
+                    break
                 else:
                     removed_amount += line.amount
                     line.amount = 0
+            else:
+                raise ValueError("Attempted to remove too much from the bucket.")
 
-        raise ValueError("Attempted to remove too much from the bucket.")
+        # Only the last lines changed, keep the updated cumulative sums valid
+        self._prefix_revision = self._revision
 
     def reset(self) -> None:
         """Go back to a state where no amount was used."""
@@ -10,23 +10,45 @@ from enum import Enum
 from typing import Any
 from typing import Dict
 from typing import Optional
+from typing import Tuple
 
 
 @dataclass
 class LinePerf:
     """Represents a Line's expected performance.
     :param expected: this investment's expected yearly return (e.g. 2 for 2%/yr)
+    :param pessimistic: Lowest yearly return, used by Monte Carlo simulations (not set by default)
+    :param optimistic: Highest yearly return, used by Monte Carlo simulations (not set by default)
     :param skip: Don't use this line when calculating the performance in upper nodes
     """
 
     expected: float
-    pessimistic: Optional[float] = 0  # TODO not used
-    optimistic: Optional[float] = 0  # TODO not used
+    pessimistic: Optional[float] = None
+    optimistic: Optional[float] = None
     skip: bool = False
 
+    def get_range(self) -> Tuple[float, float]:
+        """:returns: The (lowest, highest) yearly returns around the expected one. If neither
+        bound is set, the range is reduced to the expected return (no randomness). If only one
+        bound is set, the other one is mirrored around the expected return."""
+        if self.pessimistic is not None and self.optimistic is not None:
+            low, high = self.pessimistic, self.optimistic
+        elif self.pessimistic is not None:
+            low, high = self.pessimistic, 2 * self.expected - self.pessimistic
+        elif self.optimistic is not None:
+            low, high = 2 * self.expected - self.optimistic, self.optimistic
+        else:
+            return self.expected, self.expected
+        return min(low, self.expected), max(high, self.expected)
+
     @staticmethod
     def from_dict(dict: Dict[str, Any]) -> "LinePerf":
-        return LinePerf(expected=dict["expected"], skip=dict["skip"])
+        pessimistic, optimistic = dict.get("pessimistic"), dict.get("optimistic")
+
+        # Previous versions always saved 0 for both bounds, which meant no bounds
+        if pessimistic == 0 and optimistic == 0:
+            pessimistic = optimistic = None
+        return LinePerf(expected=dict["expected"], pessimistic=pessimistic, optimistic=optimistic, skip=dict["skip"])
 
 
 class AssetClass(Enum):
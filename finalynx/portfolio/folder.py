@@ -4,6 +4,7 @@ from typing import Any
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Tuple
 from typing import TYPE_CHECKING
 from typing import Union
 
@@ -15,6 +16,7 @@ if TYPE_CHECKING:
 
 from ..config import get_active_theme as TH
 from ..console import console
+from ..profiler import profiler
 from .bucket import Bucket
 from .constants import AssetClass
 from .constants import AssetSubclass
@@ -99,6 +101,17 @@ class Folder(Node):
                 self.envelope,
             )
 
+    @property
+    def children(self) -> List[Node]:
+        """List of `Node` objects contained in this folder."""
+        return self._children
+
+    @children.setter
+    def children(self, children: List[Node]) -> None:
+        """Replace the list of children and mark this folder as dirty."""
+        self._children = children
+        self.invalidate()
+
     def add_child(self, child: Node) -> None:
         """Manually add a child at the end of the existing children in this folder.
         :param child: Any `Node` object to add as a child.
@@ -109,10 +122,16 @@ class Folder(Node):
         self.set_child_attribs(child, self.asset_class, self.asset_subclass, self.perf, self.currency, self.envelope)
 
     def get_amount(self) -> float:
-        """Get the total amount contained in this folder.
+        """Get the total amount contained in this folder. The result is cached until
+        a line below this folder changes (see `Node.invalidate`).
         :returns: The sum of what each child's `get_amount()` method returns.
         """
-        return float(np.sum([child.get_amount() for child in self.children]) if self.children else 0)
+        if profiler.enabled:
+            profiler.count("get_amount calls")
+        if self._dirty:
+            self._cached_amount = float(np.sum([child.get_amount() for child in self.children]) if self.children else 0)
+            self._dirty = False
+        return self._cached_amount
 
     def get_currency(self) -> str:
         """:returns: This folder's currency symbol, equal to its children common currency.
@@ -122,7 +141,7 @@ class Folder(Node):
             return currencies[0]
         return "#"  # TODO replace with a better behavior
 
-    def get_ideal(self) -> float:
+    def _compute_ideal(self) -> float:
         """:returns: The ideal amount to be invested in this node based on surrounding targets."""
         return (
             self.target.get_ideal()
@@ -132,7 +151,15 @@ class Folder(Node):
 
     def get_perf(self, ideal: bool = True) -> LinePerf:
         """Get the weighted mean expected performance of all children to get the folder's
-        expected performance."""
+        expected performance. The result is cached until any amount in the tree changes."""
+        revision, perf = self._cached_perf.get(ideal, (-1, None))
+        if revision != Node._revision or perf is None:
+            perf = self._compute_perf(ideal)
+            self._cached_perf[ideal] = (Node._revision, perf)
+        return perf
+
+    def _compute_perf(self, ideal: bool) -> LinePerf:
+        """Internal method called by `get_perf` when the cached value is outdated."""
 
         # Get children's performances
         children = [c for c in self.children if not (isinstance(c, Line) and c.perf.skip)]  # type: ignore
@@ -173,6 +200,8 @@ class Folder(Node):
         :param format: `rich` for console output, `name` for only names, defaults to `rich`
         :returns: A `Tree` instance containing the rendered titles for each `Node` object.
         """
+        if not _tree:
+            profiler.count("tree traversals")
         render = self.render(output_format, **render_args)
         node = _tree.add(render) if _tree else Tree(render, guide_style=TH().TREE_BRANCH, hide_root=hide_root)
         if self.display == FolderDisplay.EXPANDED:
@@ -194,6 +223,9 @@ class Folder(Node):
                 return node.render(sidecar.output_format, align=False)  # type: ignore
             return ""
 
+        if not _tree:
+            profiler.count("tree traversals")
+
         # Follow the same print policy as the main tree
         render = (
             _render_node(self)
@@ -234,6 +266,8 @@ class Folder(Node):
         values have been fetched from Finary. Folders do not have any processing procedure.
         Here, we only call the `process()` method of all children.
         """
+        if self.parent is None:
+            profiler.count("tree traversals")
         total_ratio = 0.0
 
         for child in self.children:
@@ -371,8 +405,13 @@ class SharedFolder(Folder):
         self.newline = newline
         self.bucket = bucket
 
+        # Copies of the bucket lines displayed in this folder, reused each time the folder is processed
+        self._views: Dict[int, Tuple[Line, Line]] = {}
+
     def process(self) -> None:
-        self.children = self.bucket.use_amount(self.target_amount)  # type: ignore
+        self.children = [
+            self._get_view(index, amount) for index, amount in self.bucket.use_slices(self.target_amount)
+        ]
 
         for child in self.children:
             child.set_parent(self)
@@ -380,6 +419,25 @@ class SharedFolder(Folder):
         if self.children:
             self.children[-1].newline = self.newline
 
+    def _get_view(self, index: int, amount: float) -> Line:
+        """Internal method to get the copy of a bucket line holding the amount used by this folder.
+        Copies are only created the first time and updated afterwards, which avoids creating new
+        lines (and linking them to their envelopes) each time the portfolio is processed.
+        :returns: A `Line` with the same attributes as the bucket line and the used amount."""
+        line = self.bucket.lines[index]
+        source, view = self._views.get(index, (None, None))
+
+        if view is None or source is not line:
+            view = line.copy()
+            self._views[index] = (line, view)
+        else:
+            view.name, view.key, view.perf, view.newline = line.name, line.key, line.perf, line.newline
+            view.asset_class, view.asset_subclass = line.asset_class, line.asset_subclass
+            view.target.set_parent(view)
+
+        view.amount = amount
+        return view
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             "type": "shared_folder",
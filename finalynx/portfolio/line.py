@@ -8,6 +8,7 @@ import numpy as np
 
 from ..config import DEFAULT_CURRENCY
 from ..config import get_active_theme as TH
+from ..profiler import profiler
 from .constants import AssetClass
 from .constants import AssetSubclass
 from .constants import LinePerf
@@ -15,6 +16,7 @@ from .node import Node
 from .targets import Target
 
 if TYPE_CHECKING:
+    from .bucket import Bucket
     from .envelope import Envelope
     from .folder import Folder
 
@@ -67,15 +69,31 @@ class Line(Node):
             agents=render_agents,
         )
         self.key = key if key is not None else name
+        self.bucket: Optional["Bucket"] = None  # Set by the bucket holding this line, if any
         self.amount = amount
 
         # Let the envelope know that this is a child line
         if self.envelope:
             self.envelope.link_line(self)
 
+    @property
+    def amount(self) -> float:
+        """How much is invested in this line."""
+        return self._amount
+
+    @amount.setter
+    def amount(self, value: float) -> None:
+        """Set a new amount and mark all parent folders (and the bucket holding this line) as dirty."""
+        self._amount = value
+        if self.bucket is not None:
+            self.bucket.invalidate()
+        self.invalidate()
+
     def get_amount(self) -> float:
         """:returns: The amount invested in this line."""
-        return self.amount
+        if profiler.enabled:
+            profiler.count("get_amount calls")
+        return self._amount
 
     def get_perf(self) -> LinePerf:
         """:returns: The expected yearly performance of this line (set by user)."""
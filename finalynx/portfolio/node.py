@@ -3,6 +3,7 @@ from typing import Callable
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Tuple
 from typing import TYPE_CHECKING
 
 import numpy as np
@@ -25,6 +26,10 @@ if TYPE_CHECKING:
 class Node(Hierarchy, Render):
     """Abstract class that represents an element in the Portfolio tree."""
 
+    _revision: int = 0
+    """Global counter incremented each time an amount or the tree structure changes. Used to
+    validate cached values that may depend on any other node in the tree (ideals, performances)."""
+
     def __init__(
         self,
         name: str,
@@ -50,20 +55,22 @@ class Node(Hierarchy, Render):
         """
         Hierarchy.__init__(self, parent)
 
+        # Cached aggregates, recomputed lazily when outdated (see `invalidate`)
+        self._dirty = True
+        self._cached_amount = 0.0
+        self._cached_ideal: Tuple[int, float] = (-1, 0.0)
+        self._cached_perf: Dict[bool, Tuple[int, LinePerf]] = {}
+
         self.parent: Optional["Folder"] = parent
         self.name: str = name
         self.newline = newline
         self.target = target if target is not None else Target()
-        self.target.set_parent(self)
         self.currency = currency if currency else DEFAULT_CURRENCY
         self.asset_class = asset_class
         self.asset_subclass = asset_subclass
         self.perf = perf
         self.envelope = envelope
 
-        if target is not None:
-            target.set_parent(self)
-
         # Setup custom aliases for node rendering
         render_aliases: Dict[str, str] = {
             "[text]": "[target_text][prehint] [name] [hint][newline]",
@@ -98,12 +105,52 @@ class Node(Hierarchy, Render):
         render_agents.update(agents if agents else {})
         Render.__init__(self, render_aliases, render_agents)
 
+    @property
+    def target(self) -> Target:
+        """Target used to check this node's amount and calculate its ideal amount."""
+        return self._target
+
+    @target.setter
+    def target(self, target: Target) -> None:
+        """Set a new target attached to this node and invalidate the cached ideals."""
+        previous = getattr(self, "_target", None)
+        self._target = target
+        target.set_parent(self)
+        self.invalidate()
+
+        # Render agents are bound to the target, replace them unless they were customized
+        agents = getattr(self, "_render_agents", {})  # Not set yet when called from `__init__`
+        for key in ["target_symbol", "target_color"]:
+            method = f"_render_{key}"
+            if previous is not None and agents.get(key) == getattr(previous, method):
+                agents[key] = getattr(target, method)
+
+    @property
+    def perf(self) -> Optional[LinePerf]:
+        """Expected yearly performance of this node."""
+        return self._perf
+
+    @perf.setter
+    def perf(self, perf: Optional[LinePerf]) -> None:
+        """Set a new performance and invalidate the cached performances."""
+        self._perf = perf
+        self.invalidate()
+
     def get_amount(self) -> float:
         """Virtual method that must be implemented by all subclasses."""
         raise NotImplementedError("Must be implemented by children classes")
 
     def get_ideal(self) -> float:
-        """:returns: The ideal amount to be invested in this node based on surrounding targets."""
+        """:returns: The ideal amount to be invested in this node based on surrounding targets.
+        The result is cached until any amount or the tree structure changes."""
+        revision, ideal = self._cached_ideal
+        if revision != Node._revision:
+            ideal = self._compute_ideal()
+            self._cached_ideal = (Node._revision, ideal)
+        return ideal
+
+    def _compute_ideal(self) -> float:
+        """Internal method called by `get_ideal` when the cached value is outdated."""
         return self.target.get_ideal()
 
     def get_delta(self) -> float:
@@ -118,6 +165,26 @@ class Node(Hierarchy, Render):
         """:returns: This node's currency symbol."""
         return self.currency
 
+    def set_parent(self, parent: "Hierarchy") -> None:
+        """Move this node to a new parent. Both the previous and new parents are marked as dirty.
+        :param parent: The reference of the new parent."""
+        if self.parent is not None:
+            self.parent.invalidate()
+        super().set_parent(parent)
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Mark this node and all of its parents as dirty so that their cached aggregates
+        (amount, ideal, performance) are recomputed on the next access. This is done
+        automatically when a `Line` amount, a node's `target` or `perf`, or a `Folder`'s
+        children are replaced, but must be called manually if you modify one of them in
+        place (e.g. append to a `children` list or change a `TargetRatio.target_ratio`)."""
+        Node._revision += 1
+        node: Optional[Node] = self
+        while node is not None:
+            node._dirty = True
+            node = node.parent
+
     def tree(
         self,
         output_format: str = "[console]",
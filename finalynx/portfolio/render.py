@@ -1,8 +1,13 @@
 import inspect
+import re
 from typing import Any
 from typing import Callable
 from typing import Dict
+from typing import List
 from typing import Optional
+from typing import Tuple
+
+from ..profiler import profiler
 
 
 class Render:
@@ -11,6 +16,19 @@ class Render:
     MAX_ALIAS_DEPTH = 10
     """Maximum recursion depth when replacing aliases to prevent infinite loops."""
 
+    _KEYWORD_REGEX = re.compile(r"\[(\w+)\]")
+    """Matches `[keyword]` placeholders in a render format once aliases have been expanded."""
+
+    _alias_sets: Dict[Tuple[Tuple[str, str], ...], int] = {}
+    """Identifiers shared by instances with identical aliases, so that they share compiled templates."""
+
+    _templates: Dict[Tuple[int, str], List[str]] = {}
+    """Compiled templates for each (alias set, output format) pair. Each template alternates
+    literal text (even indices) and keywords (odd indices)."""
+
+    _agent_kwargs: Dict[Callable[..., str], Tuple[str, ...]] = {}
+    """Names of the optional arguments accepted by each agent function."""
+
     def __init__(
         self, aliases: Optional[Dict[str, str]] = None, agents: Optional[Dict[str, Callable[..., str]]] = None
     ) -> None:
@@ -26,6 +44,10 @@ class Render:
         self._render_aliases: Dict[str, str] = aliases if aliases else {}
         self._render_agents: Dict[str, Callable[..., str]] = agents if agents else {}
 
+        # Instances with the same aliases (e.g. all lines) share the same compiled templates
+        alias_key = tuple(self._render_aliases.items())
+        self._render_aliases_id = Render._alias_sets.setdefault(alias_key, len(Render._alias_sets))
+
     def render(self, output_format: str = "[console]", **args: Dict[str, Any]) -> str:
         """Render the instance as a string by following the output format. See
         [formatting guidelines](https://finalynx.readthedocs.io/en/latest/tutorials/customization.html)
@@ -34,25 +56,61 @@ class Render:
         """
 
         # TODO automatically add a space between components instead of hardcoding everywhere?
+        if profiler.enabled:
+            profiler.count("render calls")
 
-        # Utility method used below
-        def safe_len(obj: Any) -> int:
-            return len(obj) if obj else 0
+        # Get the output format with aliases expanded and split into literal text and keywords
+        template = self._compile(output_format)
+        result = template.copy()
 
-        # Recursively replace alias keywords by their correspoding values
-        output_format = self._apply_aliases(output_format)
+        # Call the corresponding methods called "agents" only for keywords present in the format
+        for i in range(1, len(template), 2):
+            agent = self._render_agents.get(template[i])
+
+            # Keywords that don't correspond to any agent are kept as-is (e.g. rich styles)
+            if agent is None:
+                result[i] = f"[{template[i]}]"
+                continue
 
-        # Call the corresponding methods called "agents" for each keyword
-        for keyword, agent in self._render_agents.items():
             # Filter the arguments to what this agent takes as input parameters
-            argspec = inspect.getfullargspec(agent)
-            kwargs = argspec.args[safe_len(argspec.args) - safe_len(argspec.defaults) :] if argspec else []  # noqa
-            filtered_args = {k: v for k, v in args.items() if k in kwargs}
+            if args:
+                kwargs = self._get_agent_kwargs(agent)
+                result[i] = agent(**{k: v for k, v in args.items() if k in kwargs})
+            else:
+                result[i] = agent()
+
+        return "".join(result)
+
+    def _compile(self, output_format: str) -> List[str]:
+        """Internal method that expands the aliases in the output format and splits it into a list
+        alternating literal text and agent keywords. The result is cached for each set of aliases.
+        :returns: The compiled template, with keywords at odd indices.
+        """
+        key = (self._render_aliases_id, output_format)
+        template = Render._templates.get(key)
 
-            # Call the method with the arguments provided by the user (filtered for this method above)
-            output_format = output_format.replace(f"[{keyword}]", agent(**filtered_args))
+        if template is None:
+            template = Render._KEYWORD_REGEX.split(self._apply_aliases(output_format))
+            Render._templates[key] = template
 
-        return output_format
+        return template
+
+    @staticmethod
+    def _get_agent_kwargs(agent: Callable[..., str]) -> Tuple[str, ...]:
+        """Internal method that lists the arguments with default values accepted by an agent.
+        Results are cached per function (shared by all instances for bound methods).
+        :returns: The names of the optional arguments of the agent.
+        """
+        function = getattr(agent, "__func__", agent)
+        kwargs = Render._agent_kwargs.get(function)
+
+        if kwargs is None:
+            argspec = inspect.getfullargspec(agent)
+            n_args, n_defaults = len(argspec.args or []), len(argspec.defaults or [])
+            kwargs = tuple(argspec.args[n_args - n_defaults :]) if n_defaults else ()  # noqa: E203
+            Render._agent_kwargs[function] = kwargs
+
+        return kwargs
 
     def _apply_aliases(self, output_format: str) -> str:
         """Internal method that recursively replaces alias keywords into their values specified
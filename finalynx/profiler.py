@@ -0,0 +1,144 @@
+"""
+Lightweight instrumentation to see where time goes during a run, enabled with the `--profile` option.
+
+Each step of `Assistant.run` is measured in a span (`with profiler.span("name"): ...`), spans can be nested
+and opened from any thread (e.g. sources fetched in parallel). Counters keep track of frequent calls such as
+renders, tree traversals and `get_amount` calls. Nothing is recorded while the profiler is disabled.
+
+The results can be printed as a table (see `render`) or saved as a trace (see `save_trace`) in the Chrome
+trace event format, which can be opened in `chrome://tracing`, [Perfetto](https://ui.perfetto.dev) or
+[speedscope](https://www.speedscope.app).
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+from rich.table import Table
+
+
+@dataclass
+class Span:
+    """Time spent in a named step of the run."""
+
+    name: str
+    path: Tuple[str, ...]  # Names of the parent spans opened in the same thread, followed by this span's name
+    start: float  # Seconds since the profiler was enabled
+    duration: float  # Seconds
+    thread_id: int
+
+
+class Profiler:
+    """Records spans and counters when enabled, see the module description."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.spans: List[Span] = []
+        self.counters: Dict[str, int] = {}
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()  # Stack of the spans opened in each thread
+
+    def enable(self) -> None:
+        """Start recording, previous spans and counters are cleared."""
+        with self._lock:
+            self.spans, self.counters = [], {}
+            self._origin = time.perf_counter()
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop recording, the spans and counters recorded so far are kept."""
+        self.enabled = False
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Measure the time spent in a `with` block, e.g. `with profiler.span("fetch"): ...`."""
+        if not self.enabled:
+            yield
+            return
+
+        stack: List[str] = self._local.__dict__.setdefault("stack", [])
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            span = Span(name, tuple(stack), start - self._origin, time.perf_counter() - start, threading.get_ident())
+            stack.pop()
+            with self._lock:
+                self.spans.append(span)
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Increment a counter, called in frequently used methods so it does nothing when disabled."""
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def render(self) -> Table:
+        """:returns: A table with the total time and number of calls of each span (nested spans are indented),
+        followed by the counters."""
+        start = min([s.start for s in self.spans], default=0.0)
+        wall_time = max([s.start + s.duration for s in self.spans], default=0.0) - start
+        table = Table(title=f"Profile: {wall_time:.3f}s")
+        table.add_column("Phase")
+        table.add_column("Calls", justify="right")
+        table.add_column("Total", justify="right")
+        table.add_column("%", justify="right")
+
+        # Merge the spans with the same path, in the order they were first opened
+        calls: Dict[Tuple[str, ...], int] = {}
+        totals: Dict[Tuple[str, ...], float] = {}
+        for span in sorted(self.spans, key=lambda s: (s.start, len(s.path))):
+            calls[span.path] = calls.get(span.path, 0) + 1
+            totals[span.path] = totals.get(span.path, 0.0) + span.duration
+
+        for i, (path, total) in enumerate(totals.items()):
+            name = "  " * (len(path) - 1) + path[-1]
+            share = f"{100 * total / wall_time:.0f} %" if wall_time else ""
+            table.add_row(name, str(calls[path]), f"{total * 1000:.1f} ms", share, end_section=i == len(totals) - 1)
+
+        # Counters are shown in a separate section below the phases
+        if self.counters:
+            for name, value in sorted(self.counters.items()):
+                table.add_row(name, str(value), "", "")
+        return table
+
+    def to_trace(self) -> Dict[str, Any]:
+        """:returns: The spans as "complete" events and the counters as a "counter" event of the
+        Chrome trace event format (times in microseconds)."""
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = [
+            {
+                "name": span.name,
+                "cat": "finalynx",
+                "ph": "X",
+                "ts": span.start * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": span.thread_id,
+            }
+            for span in sorted(self.spans, key=lambda s: s.start)
+        ]
+        if self.counters:
+            end = max([s.start + s.duration for s in self.spans], default=0.0)
+            events.append({"name": "counters", "ph": "C", "ts": end * 1e6, "pid": pid, "args": self.counters})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_trace(self, path: str) -> None:
+        """Save the trace returned by `to_trace` to a JSON file."""
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_trace(), f)
+
+
+# Shared profiler used by all modules
+profiler = Profiler()
@@ -16,6 +16,7 @@ from .actions import SetLineAmount
 # Events
 from .events import Event
 from .events import Salary
+from .events import EventQueue
 
 # Recurrence
 from .recurrence import DeltaRecurrence
@@ -24,3 +25,5 @@ from .recurrence import MonthlyRecurrence
 # Main classes
 from .timeline import Timeline
 from .timeline import Simulation
+from .vectorized import VectorizedTimeline
+from .montecarlo import MonteCarloTimeline
@@ -28,6 +28,12 @@ class Action:
         """Apply this action's consequence, must be overridden."""
         raise NotImplementedError("Must be overridden.")
 
+    def get_touched_lines(self) -> Optional[List[Line]]:
+        """Used by the timeline to only process the shared folders that depend on the changed lines.
+        :returns: The lines whose amount may have been changed by `apply`, or None if any line
+        in the portfolio may have changed (default)."""
+        return None
+
     def __str__(self) -> str:
         return self.name
 
@@ -47,6 +53,9 @@ class SetLineAmount(Action):
         self.target_line.amount = self.amount
         return []
 
+    def get_touched_lines(self) -> Optional[List[Line]]:
+        return [self.target_line]
+
 
 class AddLineAmount(Action):
     """Add some amount to a line."""
@@ -63,6 +72,9 @@ class AddLineAmount(Action):
         self.target_line.amount += self.amount
         return []
 
+    def get_touched_lines(self) -> Optional[List[Line]]:
+        return [self.target_line]
+
 
 class ApplyPerformance(Action):
     """Add the investment interests to each line (defined by the expected performance)."""
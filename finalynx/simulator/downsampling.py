@@ -0,0 +1,62 @@
+"""
+Downsampling methods used to reduce the number of points sent to the dashboard charts.
+
+Each method returns the indices of the points to keep (sorted, including the first and last points)
+so that the same indices can be applied to several stacked series to keep them aligned.
+"""
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: split the points in buckets and keep the point in each bucket
+    that forms the largest triangle with the previously kept point and the average of the next bucket.
+    :param x: Sorted x coordinates of the points.
+    :param y: Values of the points.
+    :param max_points: Maximum number of points to keep.
+    :returns: The indices of the points to keep.
+    """
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    # Bucket boundaries, excluding the first and last points which are always kept
+    edges = np.floor(np.arange(max_points - 1) * (n - 2) / (max_points - 2)).astype(int) + 1
+    edges[-1] = n - 1
+    indices = np.empty(max_points, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+
+    return indices
+
+
+def minmax(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Split the points in buckets and keep the minimum and maximum values of each bucket.
+    Cheaper than LTTB and keeps all peaks, but the shape between peaks is less accurate.
+    :param x: Sorted x coordinates of the points (unused, kept for a common signature).
+    :param y: Values of the points.
+    :param max_points: Maximum number of points to keep.
+    :returns: The indices of the points to keep.
+    """
+    n = len(y)
+    if max_points >= n or max_points < 4:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, (max_points - 2) // 2 + 1).astype(int)
+    kept = [0, n - 1]
+    for start, end in zip(edges[:-1], edges[1:]):
+        if start < end:
+            kept += [start + int(np.argmin(y[start:end])), start + int(np.argmax(y[start:end]))]
+
+    return np.unique(kept)
+
+
+METHODS = {"LTTB": lttb, "MINMAX": minmax}
+"""Downsampling methods available for `Simulation.chart_downsampling`."""
@@ -1,6 +1,11 @@
+import heapq
+import itertools
 from datetime import date
+from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import Optional
+from typing import Tuple
 
 from finalynx.portfolio.folder import Portfolio
 from finalynx.portfolio.line import Line
@@ -36,13 +41,15 @@ class Event:
     def apply(self, portfolio: Portfolio) -> List["Event"]:
         """Apply this event's consequence. This event can generate several new Events."""
         new_events = self.action.apply(portfolio)
+        return new_events + self.get_next_events()
 
-        # Create a copy of this event with the new date if a recurrence is set
+    def get_next_events(self) -> List["Event"]:
+        """Create the next occurrence of this event if a recurrence is set, without applying
+        the action. Used by `apply` and by simulation engines that apply actions themselves."""
         if self.recurrence:
             if next_date := self.recurrence.next(self.planned_date):
-                new_events.append(Event(self.action, next_date, self.recurrence, self.name))
-
-        return new_events
+                return [Event(self.action, next_date, self.recurrence, self.name)]
+        return []
 
     def __str__(self) -> str:
         return self.name
@@ -96,11 +103,9 @@ class Salary(Event):
             name,
         )
 
-    def apply(self, portfolio: Portfolio) -> List["Event"]:
+    def get_next_events(self) -> List["Event"]:
         """Update the salary amount with the growth rates. Creates a new salary
         with the updated income/expense amounts depending on the growth rates."""
-        self.action.apply(portfolio)
-
         assert self.recurrence is not None  # Needed for mypy
         if next_date := self.recurrence.next(self.planned_date):
             income_gains = self.income * self.income_growth / (12 * 100)
@@ -133,3 +138,42 @@ class YearlyPerformance(Event):
         start_date = date(start_year if start_year is not None else date.today().year, 12, 31)
         recurrence = DeltaRecurrence(years=1) if repeat_annual else None
         super().__init__(ApplyPerformance(inflation), start_date, recurrence, name)
+
+
+class EventQueue:
+    """Priority queue of events sorted by planned date, used by the simulation engines."""
+
+    def __init__(self, events: Optional[Iterable[Event]] = None) -> None:
+        """Events are stored in a heap with a sequence number, so that pushing and popping
+        an event is O(log n). Events planned on the same date are kept in insertion order.
+        :param events: Optional initial events to add to the queue.
+        """
+        self._heap: List[Tuple[date, int, Event]] = []
+        self._counter = itertools.count()
+        if events:
+            self.extend(events)
+
+    def push(self, event: Event) -> None:
+        """Add an event to the queue."""
+        heapq.heappush(self._heap, (event.planned_date, next(self._counter), event))
+
+    def extend(self, events: Iterable[Event]) -> None:
+        """Add several events to the queue in the given order."""
+        for event in events:
+            self.push(event)
+
+    def peek(self) -> Event:
+        """:returns: The next event without removing it from the queue."""
+        return self._heap[0][2]
+
+    def pop(self) -> Event:
+        """:returns: The next event, removed from the queue."""
+        return heapq.heappop(self._heap)[2]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __iter__(self) -> Iterator[Event]:
+        """:returns: An iterator over the events in the order they will be popped."""
+        return (event for _, _, event in sorted(self._heap))
+
@@ -0,0 +1,128 @@
+import csv
+from datetime import date
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+import numpy as np
+
+
+class MetricsStore:
+    """Columnar storage for the time series recorded during a simulation."""
+
+    def __init__(self, capacity: int = 64) -> None:
+        """Values are stored in a 2D NumPy array with one row per date and one column per series.
+        The array grows geometrically when full, and missing values are stored as NaN.
+        Column names are free, the timeline groups them with prefixes (e.g. `lines/Livret A`).
+        :param capacity: Initial number of rows to allocate.
+        """
+        self._dates: List[date] = []
+        self._rows: Dict[date, int] = {}  # Date -> row index
+        self._columns: Dict[str, int] = {}  # Column name -> column index
+        self._data = np.full((max(capacity, 1), 8), np.nan)
+
+    @staticmethod
+    def from_columns(dates: List[date], columns: Dict[str, np.ndarray]) -> "MetricsStore":
+        """Create a store from complete columns, e.g. computed by a vectorized engine.
+        :param dates: Dates corresponding to each row, must be unique.
+        :param columns: Dictionary of column names and values, each with one value per date.
+        """
+        store = MetricsStore(capacity=len(dates))
+        store._dates = list(dates)
+        store._rows = {d: i for i, d in enumerate(store._dates)}
+        store.add_columns(columns.keys())
+        for name, values in columns.items():
+            store._data[: len(dates), store._columns[name]] = values
+        return store
+
+    def add_columns(self, names: Iterable[str]) -> None:
+        """Create empty columns for the new names, existing columns are left untouched."""
+        for name in names:
+            if name not in self._columns:
+                if len(self._columns) == self._data.shape[1]:
+                    self._grow(self._data.shape[0], 2 * self._data.shape[1])
+                self._columns[name] = len(self._columns)
+
+    def record(self, row_date: date, values: Dict[str, float]) -> None:
+        """Set the values of some columns at a date. A new row is added the first time a date is
+        recorded, otherwise the existing row is updated. New column names are added automatically."""
+        row = self._rows.get(row_date)
+        if row is None:
+            row = len(self._dates)
+            if row == self._data.shape[0]:
+                self._grow(2 * self._data.shape[0], self._data.shape[1])
+            self._rows[row_date] = row
+            self._dates.append(row_date)
+
+        self.add_columns(values.keys())
+        self._data[row, [self._columns[name] for name in values]] = list(values.values())
+
+    def _grow(self, n_rows: int, n_columns: int) -> None:
+        """Internal method to reallocate the array with a bigger capacity."""
+        data = np.full((n_rows, n_columns), np.nan)
+        data[: self._data.shape[0], : self._data.shape[1]] = self._data
+        self._data = data
+
+    @property
+    def dates(self) -> List[date]:
+        """:returns: The recorded dates, in the order they were recorded."""
+        return self._dates
+
+    @property
+    def columns(self) -> List[str]:
+        """:returns: The column names, in the order they were added."""
+        return list(self._columns)
+
+    def get_row(self, row_date: date) -> Optional[int]:
+        """:returns: The row index for this date, or None if it was not recorded."""
+        return self._rows.get(row_date)
+
+    def get_column(self, name: str) -> np.ndarray:
+        """:returns: The values of the column for each recorded date (read-only view)."""
+        column = self._data[: len(self._dates), self._columns[name]]
+        column.flags.writeable = False
+        return column
+
+    def to_dict(self, prefix: str = "", fill_value: Optional[float] = None) -> Dict[str, List[float]]:
+        """:param prefix: Only return the columns starting with this prefix, which is removed from the keys.
+        :param fill_value: Optional value to replace missing values (NaN) with.
+        :returns: A dictionary with the column names as keys and the lists of values as values.
+        """
+        names = [name for name in self._columns if name.startswith(prefix)]
+        values = self._data[: len(self._dates), [self._columns[name] for name in names]]
+        if fill_value is not None:
+            values = np.where(np.isnan(values), fill_value, values)
+        return {name[len(prefix) :]: column for name, column in zip(names, values.T.tolist())}  # noqa: E203
+
+    def to_npz(self, path: str) -> None:
+        """Export the store to a compressed NumPy file with `dates`, `columns` and `values` arrays."""
+        np.savez_compressed(
+            path,
+            dates=np.array(self._dates, dtype="datetime64[D]"),
+            columns=np.array(self.columns, dtype=str),
+            values=self._data[: len(self._dates), : len(self._columns)],
+        )
+
+    def to_csv(self, path: str) -> None:
+        """Export the store to a CSV file with one row per date, missing values are left empty."""
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["date"] + self.columns)
+            for row_date, row in zip(self._dates, self._data[: len(self._dates), : len(self._columns)].tolist()):
+                writer.writerow([row_date.isoformat()] + ["" if np.isnan(v) else v for v in row])
+
+    def to_parquet(self, path: str) -> None:
+        """Export the store to a Parquet file with one row per date, requires `pyarrow` to be installed."""
+        try:
+            import pyarrow as pa  # type: ignore
+            import pyarrow.parquet as pq  # type: ignore
+        except ImportError as e:
+            raise ImportError("Exporting to Parquet requires pyarrow, install it with `pip install pyarrow`.") from e
+
+        values = self._data[: len(self._dates), : len(self._columns)]
+        table = pa.table({"date": self._dates, **{name: values[:, i] for i, name in enumerate(self._columns)}})
+        pq.write_table(table, path)
+
+    def __len__(self) -> int:
+        return len(self._dates)
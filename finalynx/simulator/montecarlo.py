@@ -0,0 +1,187 @@
+import bisect
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from datetime import timedelta
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+
+from finalynx.console import console
+from finalynx.portfolio.bucket import Bucket
+from finalynx.portfolio.folder import Portfolio
+from finalynx.simulator.metrics import MetricsStore
+from finalynx.simulator.timeline import Simulation
+from finalynx.simulator.vectorized import VectorizedTimeline
+
+
+class MonteCarloPaths(VectorizedTimeline):
+    """Simulation engine that runs a chunk of random paths at once, used by `MonteCarloTimeline`."""
+
+    def __init__(
+        self,
+        simulation: Simulation,
+        portfolio: Portfolio,
+        buckets: List[Bucket],
+        n_paths: int,
+        seed: np.random.SeedSequence,
+    ) -> None:
+        """Each line's yearly return is drawn from a triangular distribution between its
+        `pessimistic` and `optimistic` performances with its peak at the `expected` one (see `LinePerf.get_range`).
+        All paths are simulated together by adding a path axis to the `VectorizedTimeline` arrays.
+        The portfolio itself is not modified, the worth of each path is stored in `worth` at each date of `dates`.
+        :param n_paths: Number of random paths in this chunk.
+        :param seed: Seed of the random returns of this chunk.
+        """
+        super().__init__(simulation, portfolio, buckets)
+        self.n_paths = n_paths
+        self._rng = np.random.default_rng(seed)
+        self.dates: List[date] = []
+        self.worth: List[np.ndarray] = []
+
+    def _flatten(self) -> None:
+        """Flatten the portfolio and store the range of yearly returns for each line."""
+        super()._flatten()
+        ranges = np.array([line.perf.get_range() if line.perf else (0.0, 0.0) for line in self._lines]).reshape(-1, 2)
+        self._perf_low, self._perf_high = ranges[:, 0], ranges[:, 1]
+        self._perf_random = self._perf_mask & (self._perf_low < self._perf_high)
+
+    def _load(self) -> None:
+        """Copy the line amounts for each path the first time, then keep the simulated amounts."""
+        if not self._is_flattened:
+            super()._load()
+            self._amounts = np.tile(self._amounts, (self.n_paths, 1))
+
+    def _store(self) -> None:
+        """Each path has different amounts, the portfolio is left untouched."""
+
+    def _get_performances(self) -> np.ndarray:
+        """Draw new random yearly returns for each path and each line with a performance range.
+        :returns: An array of performances (in %) with one row per path."""
+        perf = np.tile(self._get_line_values(self._perf), (self.n_paths, 1))
+        mask = self._get_line_values(self._perf_random)
+        low, high = self._get_line_values(self._perf_low)[mask], self._get_line_values(self._perf_high)[mask]
+        perf[:, mask] = self._rng.triangular(low, perf[0, mask], high, size=(self.n_paths, int(mask.sum())))
+        return perf
+
+    def _get_line_values(self, values: np.ndarray) -> np.ndarray:
+        """Internal method to pad per-line values for lines added after the flattening (outside of the tree)."""
+        return np.pad(values, (0, len(self._lines) - len(values)))
+
+    def _record_metrics(self) -> None:
+        """Record the portfolio's worth of each path at the current date."""
+        self._load()
+        worth = self._get_folder_amounts(self._get_allocations())[..., 0]
+        if self.dates and self.dates[-1] == self.current_date:
+            self.worth[-1] = worth
+        else:
+            self.dates.append(self.current_date)
+            self.worth.append(worth)
+
+
+def _run_paths(paths: MonteCarloPaths, end_date: date) -> Tuple[List[date], np.ndarray]:
+    """Internal function to simulate a chunk of paths until the end date, called in a worker process.
+    :returns: The recorded dates and the worth of each path at each date (one row per date)."""
+    paths.goto(end_date)
+    return paths.dates, np.array(paths.worth)
+
+
+class MonteCarloTimeline:
+    """Simulation engine that runs many random paths to estimate the range of outcomes."""
+
+    PERCENTILES = [5, 50, 95]
+    """Percentiles of the portfolio's worth recorded at each date."""
+
+    CHUNK_PATHS = 500
+    """Number of paths simulated together by each `MonteCarloPaths` engine."""
+
+    def __init__(
+        self,
+        simulation: Simulation,
+        portfolio: Portfolio,
+        buckets: List[Bucket],
+    ) -> None:
+        """The paths are split into chunks of `CHUNK_PATHS` paths, each chunk is simulated by a
+        `MonteCarloPaths` engine in a separate process (see `Simulation.monte_carlo_workers`). Each chunk
+        gets its own seed spawned from `Simulation.monte_carlo_seed`, so the results only depend on the
+        seed and not on the number of processes.
+
+        The whole simulation runs at once on the first `goto`, starting from the current amounts of
+        the portfolio, which is not modified. Use `get_percentiles` to get the results.
+        """
+        self.simulation = simulation
+        self._portfolio = portfolio
+        self._buckets = buckets
+        self.n_paths = simulation.monte_carlo_paths
+        self.current_date = date.today()
+        self.end_date = simulation.end_date if simulation.end_date else date.today() + timedelta(weeks=100 * 52)
+        self.metrics = MetricsStore()
+        self._percentiles: Optional[np.ndarray] = None  # One row per recorded date
+
+    def run(self) -> None:
+        """Simulate all paths until the simulation limit is reached."""
+        self.goto(self.end_date)
+
+    def goto(self, target_date: date) -> None:
+        """Move to the target date, all paths are simulated until the end date the first time."""
+        if target_date < self.current_date:
+            raise NotImplementedError("Cannot unstep yet.")
+        self._simulate()
+        self.current_date = target_date
+
+    @property
+    def is_finished(self) -> bool:
+        """The timeline is finished once the end date is reached."""
+        return self.current_date >= self.end_date
+
+    def _simulate(self) -> None:
+        """Internal method to simulate all chunks of paths in parallel and record the percentiles."""
+        if self._percentiles is not None:
+            return
+
+        # Chunks only depend on the number of paths, each one with its own random generator
+        n_chunks = max(1, -(-self.n_paths // self.CHUNK_PATHS))
+        sizes = [len(chunk) for chunk in np.array_split(np.arange(self.n_paths), n_chunks)]
+        seeds = np.random.SeedSequence(self.simulation.monte_carlo_seed).spawn(n_chunks)
+        chunks = [MonteCarloPaths(self.simulation, self._portfolio, self._buckets, n, s) for n, s in zip(sizes, seeds)]
+        workers = min(self.simulation.monte_carlo_workers or os.cpu_count() or 1, n_chunks)
+
+        # Chunks are sent to the worker processes with the portfolio, which must be picklable
+        if workers > 1:
+            try:
+                pickle.dumps(chunks[0])
+            except Exception as e:
+                console.log(f"[yellow][bold]Warning:[/] Running Monte Carlo paths in a single process ({e}).")
+                workers = 1
+
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_run_paths, chunks, [self.end_date] * n_chunks))
+        else:
+            results = [_run_paths(chunk, self.end_date) for chunk in chunks]
+
+        # All chunks record the same dates as the events don't depend on the amounts
+        dates = results[0][0]
+        worth = np.concatenate([chunk_worth for _, chunk_worth in results], axis=1)
+        self._percentiles = np.percentile(worth, self.PERCENTILES, axis=1).T
+        columns = {f"worth/P{p}": self._percentiles[:, i] for i, p in enumerate(self.PERCENTILES)}
+        self.metrics = MetricsStore.from_columns(dates, columns)
+
+    def get_current_percentiles(self) -> np.ndarray:
+        """:returns: The percentiles of the portfolio's worth over all paths at the last recorded date
+        before the current date (see `Simulation.metrics_record_frequency`)."""
+        self._simulate()
+        assert self._percentiles is not None  # Needed for mypy
+        row = bisect.bisect_right(self.metrics.dates, self.current_date) - 1
+        result: np.ndarray = self._percentiles[max(row, 0)]
+        return result
+
+    def get_percentiles(self) -> Dict[str, List[float]]:
+        """:returns: A dictionary with the percentile names as keys (e.g. "P5") and the portfolio's
+        worth at each recorded date (see `self.metrics.dates`) as values."""
+        self._simulate()
+        return self.metrics.to_dict(prefix="worth/")
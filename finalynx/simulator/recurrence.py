@@ -1,5 +1,6 @@
 from datetime import date
 from datetime import timedelta
+from typing import Iterator
 from typing import Optional
 
 
@@ -15,6 +16,17 @@ class RecurrenceBase:
             return None
         return next_date
 
+    def occurrences(self, current_date: date, until: date) -> Iterator[date]:
+        """Lazily expand this recurrence into the successive dates following `current_date`.
+        Dates are only computed when the iterator is consumed.
+        :param until: Last date to include, in addition to the recurrence's own `until` date.
+        :returns: An iterator over the next dates in chronological order.
+        """
+        next_date = self.next(current_date)
+        while next_date is not None and next_date <= until:
+            yield next_date
+            next_date = self.next(next_date)
+
     def _next_date(self, current_date: date) -> date:
         raise NotImplementedError("Must be overridden by subclass.")
 
@@ -7,18 +7,24 @@ from typing import Dict
 from typing import List
 from typing import Optional
 
-from finalynx.analyzer.asset_class import AnalyzeAssetClasses
-from finalynx.analyzer.asset_subclass import AnalyzeAssetSubclasses
-from finalynx.analyzer.envelopes import AnalyzeEnvelopes
-from finalynx.analyzer.investment_state import AnalyzeInvestmentStates
-from finalynx.analyzer.lines import AnalyzeLines
+import numpy as np
+
+from finalynx.analyzer.metrics import AnalyzeMetrics
+from finalynx.analyzer.snapshot import PortfolioSnapshot
 from finalynx.portfolio.bucket import Bucket
 from finalynx.portfolio.constants import AssetClass
 from finalynx.portfolio.envelope import EnvelopeState
+from finalynx.portfolio.folder import Folder
 from finalynx.portfolio.folder import Portfolio
+from finalynx.portfolio.folder import SharedFolder
+from finalynx.portfolio.line import Line
+from finalynx.portfolio.node import Node
+from finalynx.simulator import downsampling
 from finalynx.simulator.actions import AutoBalance
 from finalynx.simulator.events import Event
+from finalynx.simulator.events import EventQueue
 from finalynx.simulator.events import YearlyPerformance
+from finalynx.simulator.metrics import MetricsStore
 from finalynx.simulator.recurrence import MonthlyRecurrence
 
 
@@ -50,6 +56,27 @@ class Simulation:
     # Record the portfolio stats on each day of the simulation 'DAY', 'MONTH', 'YEAR'
     metrics_record_frequency: str = "MONTH"
 
+    # Use the NumPy engine (`VectorizedTimeline`) instead of applying events on the portfolio tree
+    vectorized: bool = False
+
+    # Also simulate random paths using each line's pessimistic/optimistic returns (see `LinePerf`)
+    monte_carlo: bool = False
+
+    # Number of random paths to simulate in Monte Carlo mode
+    monte_carlo_paths: int = 10000
+
+    # Seed used to draw the random returns, set it to get reproducible Monte Carlo results
+    monte_carlo_seed: Optional[int] = None
+
+    # Number of processes simulating the Monte Carlo paths in parallel, None to use all CPU cores
+    monte_carlo_workers: Optional[int] = None
+
+    # Maximum number of points per series in the dashboard charts, None to show all recorded dates
+    chart_max_points: Optional[int] = 2000
+
+    # Method used to downsample the chart series above `chart_max_points`: 'LTTB' or 'MINMAX'
+    chart_downsampling: str = "LTTB"
+
 
 class Timeline:
     """Main simulation engine to execute programmed actions on your portfolio."""
@@ -66,29 +93,33 @@ class Timeline:
         self.simulation = simulation
         self._portfolio = portfolio
         self._buckets = buckets
-        self._events = simulation.events if simulation.events else []
+        events = list(simulation.events) if simulation.events else []
 
         # Create default events in addition to the user ones and sort events by date
         if simulation.default_events:
-            self._events += [
+            events += [
                 YearlyPerformance(simulation.inflation),
                 Event(AutoBalance(), recurrence=MonthlyRecurrence(1, n_months=3)),
             ]
-        self._sort_events()
+        self._events = EventQueue(events)
 
         # This is a pointer to the current portfolio's date, which will move when applying events
         self.current_date = date.today()
         self.end_date = simulation.end_date if simulation.end_date else date.today() + timedelta(weeks=100 * 52)
 
-        # Log some metrics during the simulation to display them at the end
-        self._log_dates: List[date] = []  # Dates at which the portfolio metrics were logged
-        self._log_env_states: Dict[str, List[float]] = {c.value: [] for c in EnvelopeState}
-        self._log_enveloppe_values: Dict[str, List[float]] = {}
-        self._log_assets_classes_values: Dict[str, List[float]] = {c.value: [] for c in AssetClass}
-        self._log_assets_subclasses_values: Dict[str, List[float]] = {}
-        self._log_lines_values: Dict[str, List[float]] = {}
+        # Log some metrics during the simulation to display them at the end, columns are
+        # named by group (e.g. `envelopes/PEA`), see `AnalyzeMetrics` for the group names
+        self.metrics = MetricsStore()
+        self.metrics.add_columns(f"investment_states/{c.value}" for c in EnvelopeState)
+        self.metrics.add_columns(f"asset_classes/{c.value}" for c in AssetClass)
         self._log_events: Dict[date, List[str]] = {}
 
+        # Shared folders fed by each bucket in tree order, found at the first step (see `_process`)
+        self._shared_folders: Optional[Dict[Bucket, List[SharedFolder]]] = None
+
+        # Flat copy of the portfolio reused by each metrics record, created at the first record
+        self._snapshot: Optional[PortfolioSnapshot] = None
+
     def run(self) -> None:
         """Step all events until the simulation limit is reached."""
         self.goto(self.end_date)
@@ -121,7 +152,7 @@ class Timeline:
             return True
 
         # State check
-        next_event = self._events[0]
+        next_event = self._events.peek()
         assert self.current_date <= next_event.planned_date, "Cannot step into a past event."
         if next_event.planned_date >= self.end_date:
             return True
@@ -133,15 +164,12 @@ class Timeline:
         else:
             self._log_events[next_event.planned_date] = [next_event.name]
 
-        # Recalculate the amounts for shared folders
-        for bucket in self._buckets:
-            bucket.reset()
-        self._portfolio.process()
+        # Recalculate the amounts for shared folders fed by the lines changed by this event
+        self._process(next_event.action.get_touched_lines())
 
-        # Remove this event, add the new ones, and sort by date
-        self._events.remove(next_event)
-        self._events += new_events
-        self._sort_events()
+        # Remove this event and add the new ones, the queue keeps them sorted by date
+        self._events.pop()
+        self._events.extend(new_events)
 
         # Record the metrics if the year changed
         _freq = self.simulation.metrics_record_frequency
@@ -171,60 +199,52 @@ class Timeline:
         or the limit date is reached."""
         return len(self._events) == 0 or self.current_date >= self.end_date
 
+    def _process(self, lines: Optional[List[Line]] = None) -> None:
+        """Internal method to recalculate the amounts of the shared folders after some lines changed,
+        instead of processing the whole portfolio. Buckets are consumed in the same order as `Portfolio.process`.
+        :param lines: The lines whose amount changed, None to process all shared folders.
+        """
+        if self._shared_folders is None:
+            self._shared_folders = self._get_shared_folders()
+
+        for bucket, folders in self._shared_folders.items():
+            if lines is None or any(line is bucket_line for line in lines for bucket_line in bucket.lines):
+                bucket.reset()
+                for folder in folders:
+                    folder.process()
+
+    def _get_shared_folders(self) -> Dict[Bucket, List[SharedFolder]]:
+        """Internal method to find the shared folders in the portfolio tree.
+        :returns: A dictionary with each bucket and the shared folders using it, in tree order."""
+        shared_folders: Dict[Bucket, List[SharedFolder]] = {}
+        stack: List[Node] = [self._portfolio]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, SharedFolder):
+                shared_folders.setdefault(node.bucket, []).append(node)
+            elif isinstance(node, Folder):
+                stack.extend(reversed(node.children))
+        return shared_folders
+
     def _record_metrics(self) -> None:
-        """Record the portfolio's metrics at the current date to display later."""
-        if self.current_date not in self._log_dates:
-            self._log_dates.append(self.current_date)
-
-            # Record the envelope states and their amounts at this date
-            for key, value in AnalyzeInvestmentStates(self._portfolio).analyze(self.current_date).items():
-                self._log_env_states[key].append(value)
-
-            for key, value in AnalyzeEnvelopes(self._portfolio).analyze().items():
-                if key in self._log_enveloppe_values:
-                    self._log_enveloppe_values[key].append(value)
-                else:
-                    self._log_enveloppe_values[key] = [value]
-
-            for key, value in AnalyzeAssetClasses(self._portfolio).analyze_flat().items():
-                self._log_assets_classes_values[key].append(value)
-
-            for key, value in AnalyzeAssetSubclasses(self._portfolio).analyze_flat().items():
-                if key in self._log_assets_subclasses_values:
-                    self._log_assets_subclasses_values[key].append(value)
-                else:
-                    self._log_assets_subclasses_values[key] = [value]
-
-            for key, value in AnalyzeLines(self._portfolio).analyze().items():
-                if key in self._log_lines_values:
-                    self._log_lines_values[key].append(value)
-                else:
-                    self._log_lines_values[key] = [value]
+        """Record the portfolio's metrics at the current date to display later. Metrics
+        already recorded at this date are replaced."""
+        if self._snapshot is None:
+            self._snapshot = PortfolioSnapshot(self._portfolio)
         else:
-            # Record the envelope states and their amounts at this date
-            for key, value in AnalyzeInvestmentStates(self._portfolio).analyze(self.current_date).items():
-                self._log_env_states[key][-1] = value
-
-            for key, value in AnalyzeEnvelopes(self._portfolio).analyze().items():
-                if key in self._log_enveloppe_values:
-                    self._log_enveloppe_values[key][-1] = value
-                else:
-                    self._log_enveloppe_values[key] = [value]
-
-            for key, value in AnalyzeAssetClasses(self._portfolio).analyze_flat().items():
-                self._log_assets_classes_values[key][-1] = value
-
-            for key, value in AnalyzeAssetSubclasses(self._portfolio).analyze_flat().items():
-                if key in self._log_assets_subclasses_values:
-                    self._log_assets_subclasses_values[key][-1] = value
-                else:
-                    self._log_assets_subclasses_values[key] = [value]
-
-            for key, value in AnalyzeLines(self._portfolio).analyze().items():
-                if key in self._log_lines_values:
-                    self._log_lines_values[key][-1] = value
-                else:
-                    self._log_lines_values[key] = [value]
+            self._snapshot.refresh()
+        metrics = AnalyzeMetrics(self._portfolio, self._snapshot).analyze(self.current_date)
+        self.metrics.record(
+            self.current_date,
+            {f"{group}/{key}": value for group, values in metrics.items() for key, value in values.items()},
+        )
+
+    def get_metrics(self, group: str) -> Dict[str, List[float]]:
+        """:param group: One of `investment_states`, `envelopes`, `asset_classes`, `asset_subclasses` or `lines`.
+        :returns: A dictionary with the metric names as keys and their values at each recorded date
+        (see `self.metrics.dates`). Missing values (e.g. a line that was not in the portfolio yet) are 0.
+        """
+        return self.metrics.to_dict(prefix=f"{group}/", fill_value=0.0)
 
     def chart_timeline(
         self,
@@ -234,7 +254,15 @@ class Timeline:
         visible_by_default: bool = True,
     ) -> Dict[str, Any]:
         """Plot a Highcharts chart of the portfolio's caracteristics and amounts over time."""
-        # assert self._log_enveloppe_values, "Run the simulation before charting."
+        # assert self.metrics.dates, "Run the simulation before charting."
+        values = np.array(list(valuesToGraph.values()), dtype=float).reshape(len(valuesToGraph), len(self.metrics))
+        indices = self._get_chart_indices(values)
+        values = values[:, indices]
+
+        # Point coordinates and event descriptions are shared by all series
+        dates = [self.metrics.dates[i] for i in indices.tolist()]
+        timestamps = [datetime.combine(d, datetime.min.time()).timestamp() * 1000 for d in dates]
+        names = ["* " + "<br>* ".join(self._log_events[d]) if d in self._log_events else "" for d in dates]
 
         return {
             "chart": {
@@ -258,11 +286,13 @@ class Timeline:
             "series": [
                 {
                     "name": key,
-                    "data": self._convert_data_series(value),
+                    "data": [
+                        {"x": x, "y": y, "name": name} for x, y, name in zip(timestamps, values[i].tolist(), names)
+                    ],
                     "visible": visible_by_default,
                     "color": colors[key] if (key in colors) else {None},
                 }
-                for key, value in valuesToGraph.items()
+                for i, key in enumerate(valuesToGraph.keys())
             ],
             "xAxis": {"type": "datetime"},
             "yAxis": {"crosshair": True},
@@ -274,27 +304,24 @@ class Timeline:
             "credits": {"enabled": False},
         }
 
-    def _convert_data_series(self, data: List[float]) -> List[Any]:
-        """Convert DataSeries in a time series format to allow non regular data"""
-        res = []
-        i = 0
-        while i < len(data):
-            if self._log_dates[i] in self._log_events:
-                evenements = "* " + "<br>* ".join(self._log_events[self._log_dates[i]])
-            else:
-                evenements = ""
-            point = {
-                "x": datetime.combine(self._log_dates[i], datetime.min.time()).timestamp() * 1000,
-                "y": data[i],
-                "name": evenements,
-            }
-            res.append(point)
-            i += 1
-        return res
-
-    def _sort_events(self) -> None:
-        """Internal method to sort the event list by planned date."""
-        self._events.sort(key=lambda event: event.planned_date)
+    def _get_chart_indices(self, values: np.ndarray) -> np.ndarray:
+        """Internal method to select the recorded dates to display, sorted chronologically. If there are more
+        than `chart_max_points` dates, the stacked total of all series is downsampled so that all series keep
+        the same points and stay aligned.
+        :param values: Array of series to display with one row per series and one column per recorded date.
+        :returns: The indices of the recorded dates to display.
+        """
+        dates = np.array(self.metrics.dates, dtype="datetime64[D]")
+        order = np.argsort(dates, kind="stable")
+        max_points = self.simulation.chart_max_points
+
+        if max_points is None or len(order) <= max_points:
+            return order
+        if self.simulation.chart_downsampling not in downsampling.METHODS:
+            raise ValueError(f"Unknown chart downsampling method '{self.simulation.chart_downsampling}'.")
+
+        x, total = dates[order].astype(float), values.sum(axis=0)[order]
+        return order[downsampling.METHODS[self.simulation.chart_downsampling](x, total, max_points)]
 
     def __str__(self) -> str:
         return f"Timeline at {self.current_date}"
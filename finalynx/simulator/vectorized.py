@@ -0,0 +1,442 @@
+from datetime import date
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+
+from finalynx.portfolio.bucket import Bucket
+from finalynx.portfolio.constants import AssetClass
+from finalynx.portfolio.envelope import Envelope
+from finalynx.portfolio.envelope import EnvelopeState
+from finalynx.portfolio.folder import Folder
+from finalynx.portfolio.folder import Portfolio
+from finalynx.portfolio.folder import SharedFolder
+from finalynx.portfolio.line import Line
+from finalynx.portfolio.node import Node
+from finalynx.portfolio.targets import TargetGlobalRatio
+from finalynx.portfolio.targets import TargetRatio
+from finalynx.simulator.actions import AddLineAmount
+from finalynx.simulator.actions import ApplyPerformance
+from finalynx.simulator.actions import AutoBalance
+from finalynx.simulator.actions import SetLineAmount
+from finalynx.simulator.events import Event
+from finalynx.simulator.metrics import MetricsStore
+from finalynx.simulator.timeline import Simulation
+from finalynx.simulator.timeline import Timeline
+
+
+class VectorizedTimeline(Timeline):
+    """Simulation engine that applies events on NumPy arrays instead of the portfolio tree."""
+
+    def __init__(
+        self,
+        simulation: Simulation,
+        portfolio: Portfolio,
+        buckets: List[Bucket],
+    ) -> None:
+        """Drop-in replacement for `Timeline` which flattens the portfolio once into arrays
+        (line amounts, performances, envelopes, folder ranges) and applies the supported actions
+        (`ApplyPerformance`, `AddLineAmount`, `SetLineAmount`, `AutoBalance`) as batched operations.
+        Amounts are written back to the `Line` objects at the end of each `goto` call.
+
+        The portfolio structure (folders, targets, performances) is assumed to stay the same during
+        the simulation, only the line amounts change. Events with other actions raise a `ValueError`.
+        """
+        super().__init__(simulation, portfolio, buckets)
+
+        # The portfolio is flattened on the first step, after the amounts were fetched
+        self._is_flattened = False
+
+        # Effective amounts and envelope state totals recorded at each date
+        self._history: List[np.ndarray] = []
+        self._state_history: List[np.ndarray] = []
+        self._history_dates: Dict[date, int] = {}
+
+    def _flatten(self) -> None:
+        """Internal method that traverses the portfolio once to build the arrays used by the engine."""
+        self._lines: List[Line] = []  # Lines actually storing the amounts
+        self._line_indexes: Dict[int, int] = {}  # Line id -> index in self._lines
+        self._tree_buckets: List[Bucket] = []  # Buckets used in the tree, their lines are contiguous
+        self._bucket_ranges: List[Tuple[int, int]] = []  # Range of each bucket in self._lines
+        self._shared: List[SharedFolder] = []  # Shared folders in the tree order
+        self._folders: List[Folder] = []  # Folders in the tree order, the root is first
+        self._folder_ranges: List[Tuple[int, int]] = []  # Range of each folder in the leaves
+        self._leaves: List[Tuple[bool, int]] = []  # (is_shared, index) for each leaf in the tree order
+        self._flatten_node(self._portfolio)
+        self._is_flattened = True
+
+        # Lines added later (targeted by events but outside of the tree) are stored after these ones
+        self._n_tree_lines = n_lines = len(self._lines)
+
+        # Lines directly in the tree, the other ones are bucket lines only recorded when a shared folder uses them
+        self._in_tree = np.zeros(n_lines, dtype=bool)
+        self._in_tree[[index for shared, index in self._leaves if not shared]] = True
+        self._recorded = self._in_tree.copy()
+        self._amounts = np.array([line.amount for line in self._lines], dtype=float)
+
+        # Performance of each line, lines without performance (or skipped) don't change
+        self._perf = np.array([line.perf.expected if line.perf else 0.0 for line in self._lines], dtype=float)
+        self._perf_mask = np.array([bool(line.perf and not line.perf.skip) for line in self._lines])
+
+        # Bucket ranges and index of the bucket owning each line (-1 for lines directly in the tree)
+        self._bucket_start = np.array([r[0] for r in self._bucket_ranges], dtype=int)
+        self._bucket_end = np.array([r[1] for r in self._bucket_ranges], dtype=int)
+        self._line_bucket = np.full(n_lines, -1, dtype=int)
+        self._line_bucket_matrix = np.zeros((n_lines, len(self._tree_buckets)))
+        for i_bucket, (start, end) in enumerate(self._bucket_ranges):
+            self._line_bucket[start:end] = i_bucket
+            self._line_bucket_matrix[start:end, i_bucket] = 1.0
+
+        # Shared folders consume their bucket on a first-come first-served basis (see `Bucket.use_amount`)
+        bucket_ids = {id(b): i for i, b in enumerate(self._tree_buckets)}
+        self._shared_bucket = np.array([bucket_ids[id(f.bucket)] for f in self._shared], dtype=int)
+        targets = np.array([f.target_amount for f in self._shared], dtype=float)
+        self._shared_cum_target = np.zeros(len(self._shared))
+        self._shared_prev_cum_target = np.zeros(len(self._shared))
+        self._shared_first = np.zeros(len(self._shared), dtype=bool)
+        self._shared_bucket_matrix = np.zeros((len(self._shared), len(self._tree_buckets)))
+        self._shared_bucket_matrix[np.arange(len(self._shared)), self._shared_bucket] = 1.0
+        for i_bucket in range(len(self._tree_buckets)):
+            mask = self._shared_bucket == i_bucket
+            cum_target = np.cumsum(targets[mask])  # Targets can be infinite, don't subtract them
+            self._shared_cum_target[mask] = cum_target
+            self._shared_prev_cum_target[mask] = np.concatenate(([0.0], cum_target[:-1]))
+            self._shared_first[np.argmax(mask)] = True
+
+        # Folder amounts are the sums of their leaves, calculated as matrix products
+        self._line_folder_matrix = np.zeros((n_lines, len(self._folders)))
+        self._shared_folder_matrix = np.zeros((len(self._shared), len(self._folders)))
+        for i_folder, (start, end) in enumerate(self._folder_ranges):
+            for shared, index in self._leaves[start:end]:
+                matrix = self._shared_folder_matrix if shared else self._line_folder_matrix
+                matrix[index, i_folder] += 1.0
+
+        # Ideal amounts used by `AutoBalance` are expressed as coefficient * amount of an anchor folder
+        folder_ids = {id(f): i for i, f in enumerate(self._folders)}
+        balance: Dict[bool, List[Tuple[int, float, int]]] = {False: [], True: []}
+        for shared, index in self._leaves:
+            node: Node = self._shared[index] if shared else self._lines[index]
+            if isinstance(node.target, TargetRatio) or (
+                node.target.__class__.__name__ == "Target"
+                and node.parent
+                and isinstance(node.parent.target, TargetRatio)
+            ):
+                balance[shared].append((index, *self._get_ideal_formula(node, folder_ids)))
+        self._balance_lines = self._to_balance_arrays(balance[False])
+        self._balance_shared = self._to_balance_arrays(balance[True])
+
+        # Only keep the folders that need to be summed: the root (portfolio worth) and the anchors
+        kept = np.unique(np.concatenate(([0], self._balance_lines[2], self._balance_shared[2])))
+        kept = kept[kept >= 0]
+        positions = np.full(len(self._folders) + 1, -1, dtype=int)
+        positions[kept] = np.arange(len(kept))
+        self._line_folder_matrix = self._line_folder_matrix[:, kept]
+        self._shared_folder_matrix = self._shared_folder_matrix[:, kept]
+        self._balance_lines = self._balance_lines[:2] + (positions[self._balance_lines[2]],)
+        self._balance_shared = self._balance_shared[:2] + (positions[self._balance_shared[2]],)
+
+        # Group lines by envelope to record the envelope states at each date
+        self._envelopes: List[Envelope] = []
+        for line in self._lines:
+            if line.envelope and line.envelope not in self._envelopes:
+                self._envelopes.append(line.envelope)
+        self._line_envelope = np.array(
+            [self._envelopes.index(line.envelope) if line.envelope else -1 for line in self._lines], dtype=int
+        )
+
+    def _flatten_node(self, node: Node) -> None:
+        """Internal method that recursively adds the node's lines, leaves and folders to the flat lists."""
+        if isinstance(node, SharedFolder):
+            if node.bucket not in self._tree_buckets:
+                start = len(self._lines)
+                for line in node.bucket.lines:
+                    self._line_indexes[id(line)] = len(self._lines)
+                    self._lines.append(line)
+                self._tree_buckets.append(node.bucket)
+                self._bucket_ranges.append((start, len(self._lines)))
+            self._leaves.append((True, len(self._shared)))
+            self._shared.append(node)
+        elif isinstance(node, Folder):
+            i_folder, start = len(self._folders), len(self._leaves)
+            self._folders.append(node)
+            self._folder_ranges.append((start, start))
+            for child in node.children:
+                self._flatten_node(child)
+            self._folder_ranges[i_folder] = (start, len(self._leaves))
+        elif isinstance(node, Line):
+            if id(node) not in self._line_indexes:
+                self._line_indexes[id(node)] = len(self._lines)
+                self._lines.append(node)
+            self._leaves.append((False, self._line_indexes[id(node)]))
+        else:
+            raise ValueError(f"Unknown node type '{type(node)}'.")
+
+    @staticmethod
+    def _to_balance_arrays(formulas: List[Tuple[int, float, int]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Internal method to convert a list of (index, coefficient, anchor) tuples to separate arrays."""
+        indexes, coefs, anchors = zip(*formulas) if formulas else ((), (), ())
+        return np.array(indexes, dtype=int), np.array(coefs, dtype=float), np.array(anchors, dtype=int)
+
+    def _get_line_index(self, line: Line) -> int:
+        """Internal method to get the index of a line in the arrays. Lines outside of the portfolio
+        are added to the arrays but are ignored by the performance and the recorded metrics.
+        :returns: The line's index in `self._amounts`."""
+        if id(line) not in self._line_indexes:
+            self._line_indexes[id(line)] = len(self._lines)
+            self._lines.append(line)
+            new_amounts = np.full(self._amounts.shape[:-1] + (1,), line.amount)
+            self._amounts = np.concatenate((self._amounts, new_amounts), axis=-1)
+            self._perf = np.append(self._perf, 0.0)
+            self._perf_mask = np.append(self._perf_mask, False)
+        return self._line_indexes[id(line)]
+
+    def _get_ideal_formula(self, node: Node, folder_ids: Dict[int, int]) -> Tuple[float, int]:
+        """Internal method to express the ideal amount used by `AutoBalance` for this node as
+        a linear function of a folder's amount, following the same logic as the targets.
+        :returns: A (coefficient, folder index) tuple, the folder index is -1 for a null ideal."""
+
+        # Nodes with a ratio target use a percentage of their parent's ideal or amount
+        if isinstance(node.target, TargetRatio):
+            if isinstance(node.target, TargetGlobalRatio):
+                return node.target.target_ratio / 100, 0
+
+            parent = node.parent
+            if parent is None:
+                return 0.0, -1
+            elif isinstance(parent.target, TargetRatio):
+                coef, anchor = self._get_ideal_formula(parent, folder_ids)
+            else:
+                coef, anchor = 1.0, folder_ids[id(parent)]
+            return coef * node.target.target_ratio / 100, anchor
+
+        # Lines auto-added in folders share the parent's ideal equally
+        assert node.parent is not None
+        coef, anchor = self._get_ideal_formula(node.parent, folder_ids)
+        return coef / len(node.parent.children), anchor
+
+    @staticmethod
+    def _prefix_sums(values: np.ndarray) -> np.ndarray:
+        """Internal method to calculate the cumulative sums along the last axis, starting with zero."""
+        zeros = np.zeros(values.shape[:-1] + (1,))
+        return np.concatenate((zeros, np.cumsum(values, axis=-1)), axis=-1)
+
+    def _get_used_ranges(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Internal method to calculate the part of its bucket used by each shared folder.
+        :returns: The amounts used in the bucket before and after each shared folder, in the tree order."""
+        totals = (self._amounts[..., : self._n_tree_lines] @ self._line_bucket_matrix)[..., self._shared_bucket]
+        used = np.minimum(totals, self._shared_cum_target)
+        prev_used = np.where(self._shared_first, 0.0, np.minimum(totals, self._shared_prev_cum_target))
+        return prev_used, used
+
+    def _get_allocations(self) -> np.ndarray:
+        """Internal method to calculate the amount used by each shared folder from its bucket.
+        :returns: An array with the amount of each shared folder in the tree order."""
+        prev_used, used = self._get_used_ranges()
+        return used - prev_used
+
+    def _get_recorded_lines(self) -> np.ndarray:
+        """Internal method to find the lines that `Timeline` would record at this date: the lines directly in
+        the tree, and the bucket lines displayed in shared folders. Like `Bucket.get_slices`, a shared folder
+        displays all lines from the one where its used range starts to the one where it ends.
+        :returns: A boolean mask of the tree lines."""
+        recorded = self._in_tree.copy()
+        prev_used, used = self._get_used_ranges()
+        for i_shared, i_bucket in enumerate(self._shared_bucket.tolist()):
+            start, end = self._bucket_start[i_bucket], self._bucket_end[i_bucket]
+            if start == end:
+                continue
+
+            # Same as `Bucket._get_cumulative_index`, an index past the last line points to the last line
+            prefix_sums = np.cumsum(self._amounts[start:end])
+            bounds = np.searchsorted(prefix_sums, [prev_used[i_shared], used[i_shared]])
+            first, last = np.minimum(bounds, end - start - 1).tolist()
+            recorded[[start + first, start + last]] = True
+            recorded[start + first + 1 : start + last] = True  # noqa: E203
+        return recorded
+
+    def _get_folder_amounts(self, allocations: np.ndarray) -> np.ndarray:
+        """Internal method to calculate the amounts of the root and anchor folders from their leaves.
+        :returns: An array with the amount of each kept folder (the root is first), with an extra
+        zero for empty anchors."""
+        lines = self._amounts[..., : self._n_tree_lines]
+        folders = lines @ self._line_folder_matrix + allocations @ self._shared_folder_matrix
+        return np.concatenate((folders, np.zeros(folders.shape[:-1] + (1,))), axis=-1)
+
+    def _get_effective_amounts(self) -> np.ndarray:
+        """Internal method to calculate the amount of each line as seen from the portfolio tree,
+        where bucket lines only count for the amount used by shared folders.
+        :returns: An array with the amount of each line in the tree."""
+        amounts = self._amounts[..., : self._n_tree_lines].copy()
+        in_bucket = self._line_bucket >= 0
+        if in_bucket.any():
+            used = self._get_allocations() @ self._shared_bucket_matrix
+            # Only sum the bucket lines, large amounts in other lines would make the differences imprecise
+            cumsum = self._prefix_sums(np.where(in_bucket, amounts, 0.0))
+            bucket = self._line_bucket[in_bucket]
+            before = cumsum[..., :-1][..., in_bucket] - cumsum[..., self._bucket_start[bucket]]
+            amounts[..., in_bucket] = np.clip(used[..., bucket] - before, 0.0, amounts[..., in_bucket])
+        return amounts
+
+    def _get_performances(self) -> np.ndarray:
+        """Internal method to get the yearly performance of each line, overridden to draw random returns.
+        :returns: An array of performances (in %) that can be broadcast to the amounts."""
+        return self._perf
+
+    def _apply_action(self, event: Event) -> None:
+        """Internal method to apply an event's action on the arrays."""
+        action = event.action
+
+        if isinstance(action, ApplyPerformance):
+            rate = (self._get_performances() - action.inflation) / (100 * action.period_years)
+            mask = self._perf_mask
+            self._amounts[..., mask] += self._amounts[..., mask] * rate[..., mask]
+        elif isinstance(action, AddLineAmount):
+            self._amounts[..., self._get_line_index(action.target_line)] += action.amount
+        elif isinstance(action, SetLineAmount):
+            self._amounts[..., self._get_line_index(action.target_line)] = action.amount
+        elif isinstance(action, AutoBalance):
+            self._auto_balance()
+        else:
+            raise ValueError(f"Action '{action}' is not supported by the vectorized engine, use `Timeline` instead.")
+
+    def _auto_balance(self) -> None:
+        """Internal method to set all lines and shared folders with a ratio target to their ideal amount."""
+        allocations = self._get_allocations()
+        folders = self._get_folder_amounts(allocations)
+
+        # Ideals are all calculated before setting any amount, like `AutoBalance`
+        line_indexes, line_coefs, line_anchors = self._balance_lines
+        shared_indexes, shared_coefs, shared_anchors = self._balance_shared
+        line_ideals = line_coefs * folders[..., line_anchors]
+        shared_ideals = shared_coefs * folders[..., shared_anchors]
+
+        # Shared folders of the same bucket are updated sequentially in the tree order
+        self._amounts[..., line_indexes] = line_ideals
+        for i, i_shared in enumerate(shared_indexes.tolist()):
+            delta = shared_ideals[..., i] - allocations[..., i_shared]
+            self._add_bucket_amount(self._shared_bucket[i_shared], delta)
+
+    def _add_bucket_amount(self, i_bucket: int, amount: np.ndarray) -> None:
+        """Internal method equivalent to `Bucket.add_amount` on the arrays."""
+        start, end = self._bucket_start[i_bucket], self._bucket_end[i_bucket]
+        if start == end:
+            raise ValueError("Cannot add amount to an empty bucket.")
+
+        # Remove negative amounts successively from the last lines
+        lines = self._amounts[..., start:end][..., ::-1]
+        removed = np.clip(-amount[..., None] - self._prefix_sums(lines)[..., :-1], 0.0, lines)
+        too_much = np.any(-amount > lines.sum(axis=-1))
+        self._amounts[..., start:end] -= removed[..., ::-1]
+
+        # Add positive amounts to the last line
+        self._amounts[..., end - 1] += np.maximum(amount, 0.0)
+        if too_much:
+            raise ValueError("Attempted to remove too much from the bucket.")
+
+    def step_until(self, target_date: date) -> None:
+        """Execute all events until the specified date is reached and write the
+        new amounts back to the portfolio."""
+        self._load()
+        super().step_until(target_date)
+        self._store()
+
+    def step(self) -> bool:
+        """Execute the next event on the arrays. Unlike `Timeline`, the portfolio is
+        only updated at the end of `step_until`.
+        :returns: True if the simulation ended (no more events)."""
+        if self.is_finished:
+            return True
+
+        # State check
+        next_event = self._events.peek()
+        next_date = next_event.planned_date
+        assert self.current_date <= next_date, "Cannot step into a past event."
+        if next_date >= self.end_date:
+            return True
+
+        # Apply the event and add the newly generated ones
+        self._events.pop()
+        self._apply_action(next_event)
+        self._log_events.setdefault(next_date, []).append(next_event.name)
+        self._events.extend(next_event.get_next_events())
+
+        # Record the metrics if the year changed
+        _freq = self.simulation.metrics_record_frequency
+        if (
+            (_freq == "DAY" and next_date != self.current_date)
+            or (_freq == "YEAR" and next_date.year != self.current_date.year)
+            or (_freq == "MONTH" and next_date.month != self.current_date.month)
+        ):
+            self.current_date = next_date
+            self._record_metrics()
+
+        # Move the current date to this event's date
+        self.current_date = next_date
+        return False
+
+    def _load(self) -> None:
+        """Internal method to read the line amounts, in case they changed since the last `goto`.
+        The portfolio is flattened the first time, along with the lines targeted by events."""
+        if not self._is_flattened:
+            self._flatten()
+            for event in self._events:
+                if isinstance(event.action, (AddLineAmount, SetLineAmount)):
+                    self._get_line_index(event.action.target_line)
+        self._amounts = np.array([line.amount for line in self._lines], dtype=float)
+
+    def _store(self) -> None:
+        """Internal method to write the amounts back to the lines and process the portfolio again
+        to recalculate the shared folders. The recorded metrics are also converted to the same
+        columns as `Timeline` for the dashboard."""
+        for line, amount in zip(self._lines, self._amounts.tolist()):
+            line.amount = amount
+
+        self._process()
+
+        self._update_logs()
+
+    def _record_metrics(self) -> None:
+        """Record the line amounts and envelope states at the current date."""
+        amounts = self._get_effective_amounts()
+        self._recorded |= self._get_recorded_lines()
+
+        # Sum the amounts for each envelope state at this date
+        state_codes = {s: i for i, s in enumerate(EnvelopeState)}
+        codes = np.array([state_codes[e.get_state(self.current_date)] for e in self._envelopes] + [0], dtype=int)
+        states = np.bincount(codes[self._line_envelope], weights=amounts, minlength=len(EnvelopeState))
+
+        if self.current_date not in self._history_dates:
+            self._history_dates[self.current_date] = len(self._history)
+            self._history.append(amounts)
+            self._state_history.append(states)
+        else:
+            self._history[self._history_dates[self.current_date]] = amounts
+            self._state_history[self._history_dates[self.current_date]] = states
+
+    def _update_logs(self) -> None:
+        """Internal method to group the recorded line amounts into the same metrics as `Timeline`."""
+        if not self._history:
+            return
+
+        # Only keep the lines recorded at least once, like the columns added by `Timeline`
+        kept = np.flatnonzero(self._recorded)
+        history = np.array(self._history)[:, kept]
+        lines = [self._lines[i] for i in kept.tolist()]
+        columns: Dict[str, np.ndarray] = {}
+
+        def _group(group: str, keys: List[str], all_keys: Optional[List[str]] = None) -> None:
+            """Sum the history columns with the same key, keeping the order of first appearance."""
+            names = list(dict.fromkeys((all_keys if all_keys else []) + keys))
+            groups = np.zeros((len(keys), len(names)))
+            groups[np.arange(len(keys)), [names.index(key) for key in keys]] = 1.0
+            columns.update({f"{group}/{name}": values for name, values in zip(names, (history @ groups).T)})
+
+        states = np.array(self._state_history).T
+        columns.update({f"investment_states/{s.value}": states[i] for i, s in enumerate(EnvelopeState)})
+        _group("envelopes", [line.envelope.name if line.envelope else "Unknown" for line in lines])
+        _group("asset_classes", [line.asset_class.value for line in lines], [c.value for c in AssetClass])
+        _group("asset_subclasses", [line.asset_subclass.value for line in lines])
+        _group("lines", [line.name if line.name else "Unknown" for line in lines])
+        self.metrics = MetricsStore.from_columns(list(self._history_dates), columns)
@@ -53,6 +53,13 @@ Options:
   perf                 Shortcut to --format="[console_perf]" (show expected performances)
 
   -s --sources=string  Comma-separated list of sources to activate, defaults to "finary" only
+  --parallel-fetch     Fetch from all active sources at the same time instead of one after the other
+  --cache-dir=path     Path to a folder where the fetched data is cached, defaults to the user cache directory
+  --cache-format=string  Format of the cache files, "json" (default) or "gzip" (compressed)
+  --background-refresh  Use outdated cached data immediately and fetch fresh data in the background
+  --import-profile     Print the time taken to import each module (to check the startup time)
+  --profile            Print the time spent in each step (fetch, process, render, simulation, ...)
+  --profile-trace=path  Save the time spent in each step as a Chrome trace JSON file (also readable by speedscope)
 
   --sim-steps=int      Display the simulated portfolio's worth every X years, defaults to 5
   --future             Print the portfolio after the simulation has finished
@@ -0,0 +1,118 @@
+import random
+from typing import Any
+from typing import Dict
+from typing import List
+
+import pytest
+
+from finalynx.analyzer.asset_class import AnalyzeAssetClasses
+from finalynx.analyzer.asset_subclass import AnalyzeAssetSubclasses
+from finalynx.analyzer.snapshot import PortfolioSnapshot
+from finalynx.portfolio import AssetClass
+from finalynx.portfolio import AssetSubclass
+from finalynx.portfolio import Bucket
+from finalynx.portfolio import Folder
+from finalynx.portfolio import Line
+from finalynx.portfolio import Node
+from finalynx.portfolio import Portfolio
+from finalynx.portfolio import SharedFolder
+
+
+def _recursive_classes(node: Node) -> Dict[str, Any]:
+    """Reference implementation: merge the classes and subclasses of the children recursively."""
+    result: Dict[str, Any] = {
+        c.value: {"total": 0.0, "subclasses": {s.value: 0.0 for s in AssetSubclass}} for c in AssetClass
+    }
+    if isinstance(node, Line):
+        result[node.asset_class.value]["total"] = node.get_amount()
+        result[node.asset_class.value]["subclasses"][node.asset_subclass.value] = node.get_amount()
+    else:
+        assert isinstance(node, Folder)
+        for child in node.children:
+            for key, subdict in _recursive_classes(child).items():
+                result[key]["total"] += subdict["total"]
+                for subkey, subvalue in subdict["subclasses"].items():
+                    result[key]["subclasses"][subkey] += subvalue
+    return result
+
+
+def _recursive_subclasses_flat(node: Node) -> Dict[str, float]:
+    """Reference implementation: merge the subclasses of the children recursively, in order of appearance."""
+    if isinstance(node, Line):
+        return {node.asset_subclass.value: node.get_amount()}
+    assert isinstance(node, Folder)
+    total: Dict[str, float] = {}
+    for child in node.children:
+        for key, value in _recursive_subclasses_flat(child).items():
+            total[key] = total.get(key, 0.0) + value
+    return total
+
+
+def _build(seed: int) -> Portfolio:
+    """Create a portfolio with nested folders, an empty folder, and a shared folder using a bucket."""
+    rng = random.Random(seed)
+
+    def _lines(n: int) -> List[Node]:
+        return [
+            Line(
+                f"Line {rng.random():.6f}",
+                asset_class=rng.choice(list(AssetClass)[:4]),
+                asset_subclass=rng.choice(list(AssetSubclass)[:8]),
+                amount=rng.choice([0, round(rng.uniform(1, 10000), 2)]),
+            )
+            for _ in range(n)
+        ]
+
+    bucket = Bucket("Bucket", _lines(3))  # type: ignore
+    nested = Folder("Nested", children=_lines(2) + [Folder("Deep", children=_lines(3)), Folder("Empty")])
+    shared = SharedFolder("Shared", bucket, target_amount=rng.uniform(0, 20000))
+    portfolio = Portfolio(children=_lines(3) + [nested, Folder("Other", children=_lines(4) + [shared])])
+    portfolio.process()
+    return portfolio
+
+
+def _folders(node: Node) -> List[Folder]:
+    """All folders below a node, including itself."""
+    if not isinstance(node, Folder):
+        return []
+    return [node] + [folder for child in node.children for folder in _folders(child)]
+
+
+def _approx(expected: Dict[str, Any]) -> Dict[str, Any]:
+    """Compare the sums with a tolerance, as they are not added in the same order."""
+    return {k: _approx(v) if isinstance(v, dict) else pytest.approx(v) for k, v in expected.items()}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_asset_classes_equivalence(seed: int) -> None:
+    """The snapshot-based analyses match the recursive ones for each folder of the tree."""
+    portfolio = _build(seed)
+    snapshot = PortfolioSnapshot(portfolio)
+
+    for folder in _folders(portfolio):
+        expected = _recursive_classes(folder)
+        flat = {c: d["total"] for c, d in expected.items()}
+        assert AnalyzeAssetClasses(folder, snapshot).analyze() == _approx(expected)
+        assert AnalyzeAssetClasses(folder, snapshot).analyze_flat() == _approx(flat)
+        assert AnalyzeAssetClasses(folder).analyze_flat() == _approx(flat)
+        assert AnalyzeAssetSubclasses(folder, snapshot).analyze() == _approx(expected)
+
+        subclasses = AnalyzeAssetSubclasses(folder, snapshot).analyze_flat()
+        assert list(subclasses.items()) == list(_approx(_recursive_subclasses_flat(folder)).items())
+
+
+def test_asset_classes_refresh() -> None:
+    """A refreshed snapshot follows the amount and structure changes of the tree."""
+    portfolio = _build(0)
+    snapshot = PortfolioSnapshot(portfolio)
+
+    nested = portfolio.children[3]
+    assert isinstance(nested, Folder)
+    nested.children[0].amount = 123456  # type: ignore
+    nested.add_child(Line("New", asset_class=AssetClass.CRYPTO, asset_subclass=AssetSubclass.L1, amount=42))
+    portfolio.process()
+    snapshot.refresh()
+
+    assert AnalyzeAssetClasses(portfolio, snapshot).analyze() == _approx(_recursive_classes(portfolio))
+    subclasses = AnalyzeAssetSubclasses(nested, snapshot).analyze_flat()
+    assert list(subclasses.items()) == list(_approx(_recursive_subclasses_flat(nested)).items())
@@ -0,0 +1,137 @@
+import itertools
+import random
+from typing import List
+from typing import Tuple
+
+import pytest
+
+from finalynx.portfolio import Bucket
+from finalynx.portfolio import Folder
+from finalynx.portfolio import Line
+from finalynx.portfolio import Portfolio
+from finalynx.portfolio import SharedFolder
+from finalynx.profiler import profiler
+
+
+def _naive_index(amounts: List[float], target: float) -> Tuple[int, float]:
+    """Find the first line where the cumulative sum reaches the target by scanning all lines."""
+    cumulative = list(itertools.accumulate(amounts))
+    for i, total in enumerate(cumulative):
+        if total >= target:
+            return i, target - (cumulative[i - 1] if i != 0 else 0)
+    return -1, 0.0
+
+
+def _naive_slices(amounts: List[float], prev_used: float, used: float) -> List[Tuple[int, float]]:
+    """Naive allocation of the lines used between two cumulative amounts."""
+    index_prev, remainder_prev = _naive_index(amounts, prev_used)
+    index, remainder = _naive_index(amounts, used)
+    if index == index_prev:
+        return [(index, remainder - remainder_prev)]
+    first = (index_prev, amounts[index_prev] - remainder_prev)
+    return [first] + [(i, amounts[i]) for i in range(index_prev + 1, index)] + [(index, remainder)]
+
+
+def _naive_add(amounts: List[float], amount: float) -> List[float]:
+    """Naive version of `Bucket.add_amount`: add to the last line or remove from the last lines."""
+    amounts = list(amounts)
+    if amount > 0:
+        amounts[-1] += amount
+        return amounts
+    remaining = -amount
+    for i in reversed(range(len(amounts))):
+        removed = min(amounts[i], remaining)
+        amounts[i] -= removed
+        remaining -= removed
+    return amounts
+
+
+def _check_use(bucket: Bucket, amounts: List[float], used: float, amount: float) -> float:
+    """Use an amount from the bucket and compare the slices and line copies with the naive allocation."""
+    new_used = min(sum(amounts), used + amount)
+    expected = _naive_slices(amounts, used, new_used)
+
+    lines = bucket.use_amount(amount)
+    assert bucket.get_used_amount() == pytest.approx(new_used)
+    assert bucket.get_slices() == [(i, pytest.approx(a)) for i, a in expected]
+    assert [line.amount for line in lines] == [pytest.approx(a) for _, a in expected]
+    assert [line.name for line in lines] == [bucket.lines[i].name for i, _ in expected]
+    return new_used
+
+
+def test_bucket_exact_boundaries() -> None:
+    """Amounts landing exactly on a line edge stay in the line that ends there."""
+    bucket = Bucket("Bucket", [Line(f"Line {i}", amount=a) for i, a in enumerate([100, 200, 300])])
+    amounts, used = [100.0, 200.0, 300.0], 0.0
+
+    for amount in [100, 200, 0, 150, 150, 50]:
+        used = _check_use(bucket, amounts, used, amount)
+    assert bucket.get_slices() == [(2, 0.0)]  # Nothing left, the last line is used with 0
+
+    bucket.reset()
+    assert bucket.use_slices(300) == [(0, 100), (1, 200)]
+    assert bucket.use_slices(300) == [(1, 0), (2, 300)]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_bucket_random_sequences(seed: int) -> None:
+    """Random sequences of `use_amount` and `add_amount` match the naive allocation."""
+    rand = random.Random(seed)
+    amounts = [float(rand.choice([0, 50, 100, 250])) for _ in range(rand.randint(1, 6))]
+    amounts[-1] += 10  # Keep the bucket non-empty
+    bucket = Bucket("Bucket", [Line(f"Line {i}", amount=a) for i, a in enumerate(amounts)])
+    used = 0.0
+
+    for _ in range(30):
+        choice = rand.random()
+        if choice < 0.6:
+            # Use either a random amount or exactly what is needed to reach a line edge
+            edges = list(itertools.accumulate(amounts))
+            amount = rand.choice([rand.uniform(0, 200), max(rand.choice(edges) - used, 0.0), 0.0])
+            used = _check_use(bucket, amounts, used, amount)
+        elif choice < 0.9:
+            amount = rand.uniform(-sum(amounts), 200)
+            bucket.add_amount(amount)
+            amounts = _naive_add(amounts, amount)
+            assert [line.amount for line in bucket.lines] == [pytest.approx(a) for a in amounts]
+            assert bucket.get_max_amount() == pytest.approx(sum(amounts))
+        else:
+            bucket.reset()
+            used = 0.0
+
+
+def test_bucket_remove_too_much() -> None:
+    """Removing more than the bucket's total amount raises an error."""
+    bucket = Bucket("Bucket", [Line("Line 0", amount=100), Line("Line 1", amount=50)])
+    with pytest.raises(ValueError):
+        bucket.add_amount(-200)
+
+
+def test_bucket_prefix_sums_cache() -> None:
+    """The cumulative sums are only recomputed when a bucket line changes, not when shared folders use the bucket."""
+    bucket = Bucket("Bucket", [Line(f"Line {i}", amount=100) for i in range(5)])
+    shared_folders = [SharedFolder(f"Shared folder {i}", bucket, target_amount=120) for i in range(4)]
+    portfolio = Portfolio(children=[Folder("Folder", children=list(shared_folders)), Line("Other", amount=50)])
+
+    def _process() -> int:
+        """Process the portfolio from the start of the bucket and count the recomputations."""
+        profiler.enable()
+        try:
+            bucket.reset()
+            portfolio.process()
+        finally:
+            profiler.disable()
+        return profiler.counters.get("bucket prefix sums", 0)
+
+    assert _process() == 1
+    assert [f.get_amount() for f in shared_folders] == [120, 120, 120, 120]
+    assert _process() == 0
+
+    # Changes outside of the bucket or in the displayed copies don't invalidate the cumulative sums
+    portfolio.children[1].amount = 80  # type: ignore
+    shared_folders[0].children[0].amount = 10  # type: ignore
+    assert _process() == 0
+
+    bucket.lines[2].amount = 0
+    assert _process() == 1
+    assert [f.get_amount() for f in shared_folders] == [120, 120, 120, 40]
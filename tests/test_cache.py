@@ -0,0 +1,93 @@
+import datetime
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from finalynx.fetch.cache import CACHE_FORMATS
+from finalynx.fetch.cache import CACHE_VERSION
+from finalynx.fetch.cache import CacheFile
+from finalynx.fetch.cache import DATE_FORMAT
+
+PAYLOAD = {"line_items": [{"name": "Livret A", "amount": 1234.5, "currency": "€"}, {"name": "PEA", "amount": 0}]}
+
+
+@pytest.mark.parametrize("format", CACHE_FORMATS)
+def test_cache_round_trip(tmp_path: Path, format: str) -> None:
+    """A written payload is read back unchanged, and the header describes it."""
+    cache = CacheFile(str(tmp_path / "folder" / "source_cache.json"))
+    assert not cache.exists()
+    assert cache.read() is None and cache.read_header() is None and cache.get_age() is None
+
+    cache.write(PAYLOAD, format)
+    assert cache.exists()
+    assert cache.read() == PAYLOAD
+
+    header = cache.read_header()
+    assert header is not None
+    assert header["version"] == CACHE_VERSION
+    assert header["format"] == format
+    assert cache.get_age() == 0
+    assert list((tmp_path / "folder").iterdir()) == [tmp_path / "folder" / "source_cache.json"]  # No temporary files
+
+    cache.delete()
+    assert not cache.exists()
+
+
+def test_cache_age(tmp_path: Path) -> None:
+    """The age is read from the last update date saved in the header."""
+    cache = CacheFile(str(tmp_path / "source_cache.json"))
+    last_updated = datetime.datetime.now() - datetime.timedelta(hours=5, minutes=30)
+    cache.write(PAYLOAD, last_updated=last_updated.strftime(DATE_FORMAT))
+    assert cache.get_age() == 5
+
+
+def test_cache_invalid_format(tmp_path: Path) -> None:
+    """Unknown formats are rejected before writing anything."""
+    cache = CacheFile(str(tmp_path / "source_cache.json"))
+    with pytest.raises(ValueError):
+        cache.write(PAYLOAD, "xml")
+    assert not cache.exists()
+
+
+@pytest.mark.parametrize("format", CACHE_FORMATS)
+def test_cache_corrupted(tmp_path: Path, format: str) -> None:
+    """A payload that doesn't match its checksum is ignored, but the header can still be read."""
+    path = tmp_path / "source_cache.json"
+    cache = CacheFile(str(path))
+    cache.write(PAYLOAD, format)
+
+    content = path.read_bytes()
+    path.write_bytes(content[:-1] + bytes([content[-1] ^ 1]))
+    assert cache.read() is None
+    assert cache.read_header() is not None
+
+    path.write_bytes(content[: len(content) // 2])
+    assert cache.read() is None
+
+
+@pytest.mark.parametrize("content", [b"", b"\x00\xff garbage", b"[1, 2, 3]\n{}", b'{"version": 1}'])
+def test_cache_invalid_files(tmp_path: Path, content: bytes) -> None:
+    """Files that are not cache files are considered as missing."""
+    path = tmp_path / "source_cache.json"
+    path.write_bytes(content)
+    cache = CacheFile(str(path))
+    assert cache.read() is None
+
+
+@pytest.mark.parametrize("indent", [4, None])
+def test_cache_legacy_file(tmp_path: Path, indent: Any) -> None:
+    """Cache files written by previous versions (a single JSON object) are ignored."""
+    path = tmp_path / "source_cache.json"
+    legacy = {"last_updated": datetime.datetime.now().strftime(DATE_FORMAT), **PAYLOAD}
+    path.write_text(json.dumps(legacy, indent=indent))
+
+    cache = CacheFile(str(path))
+    assert cache.read_header() is None
+    assert cache.get_age() is None
+    assert cache.read() is None
+
+    # A new payload replaces the legacy file
+    cache.write(PAYLOAD)
+    assert cache.read() == PAYLOAD
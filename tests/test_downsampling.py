@@ -0,0 +1,38 @@
+from typing import Callable
+
+import numpy as np
+import pytest
+
+from finalynx.simulator.downsampling import lttb
+from finalynx.simulator.downsampling import METHODS
+from finalynx.simulator.downsampling import minmax
+
+
+@pytest.mark.parametrize("method", METHODS.values())
+@pytest.mark.parametrize("n", [1, 2, 5, 100, 1001])
+@pytest.mark.parametrize("max_points", [4, 5, 10, 99, 2000])
+def test_downsampling_indices(method: Callable[..., np.ndarray], n: int, max_points: int) -> None:
+    """Indices are sorted and unique, keep the first and last points, and are limited to `max_points`."""
+    rng = np.random.default_rng(n + max_points)
+    x, y = np.arange(n) * 30.0, np.cumsum(rng.normal(size=n))
+    indices = method(x, y, max_points)
+
+    assert len(indices) <= max_points if n > max_points else indices.tolist() == list(range(n))
+    assert np.all(np.diff(indices) > 0)
+    assert indices[0] == 0 and indices[-1] == n - 1
+
+
+@pytest.mark.parametrize("method", [lttb, minmax])
+def test_downsampling_spike(method: Callable[..., np.ndarray]) -> None:
+    """A single spike in a flat series is kept."""
+    x, y = np.arange(1000.0), np.zeros(1000)
+    y[637] = 100
+    assert 637 in method(x, y, 50)
+
+
+def test_downsampling_lttb_line() -> None:
+    """Points on a straight line are spread over the whole series."""
+    x = np.arange(1000.0)
+    indices = lttb(x, 2 * x, 10)
+    assert len(indices) == 10
+    assert np.all(np.diff(indices) < 250)
@@ -0,0 +1,99 @@
+import itertools
+from datetime import date
+from typing import List
+
+from finalynx.portfolio import Line
+from finalynx.simulator import AddLineAmount
+from finalynx.simulator import DeltaRecurrence
+from finalynx.simulator import Event
+from finalynx.simulator import EventQueue
+from finalynx.simulator import MonthlyRecurrence
+
+
+def _event(name: str, planned_date: date, recurrence: MonthlyRecurrence | None = None) -> Event:
+    """Create an event adding 1 to a dummy line."""
+    return Event(AddLineAmount(Line("Line"), 1), planned_date, recurrence, name)
+
+
+def _pop_all(queue: EventQueue) -> List[Event]:
+    """Pop all events, pushing the next occurrence of recurring events like the timelines do."""
+    events = []
+    while queue:
+        event = queue.pop()
+        events.append(event)
+        queue.extend(event.get_next_events())
+    return events
+
+
+def test_monthly_occurrences() -> None:
+    """Occurrences stop at the given date and at the recurrence's own end date, both included."""
+    recurrence = MonthlyRecurrence(15)
+    assert list(recurrence.occurrences(date(2024, 11, 20), date(2025, 2, 15))) == [
+        date(2024, 12, 15),
+        date(2025, 1, 15),
+        date(2025, 2, 15),
+    ]
+    assert list(recurrence.occurrences(date(2024, 11, 20), date(2024, 12, 14))) == []
+
+    recurrence = MonthlyRecurrence(1, n_months=3, until=date(2025, 6, 1))
+    assert list(recurrence.occurrences(date(2024, 12, 1), date(2030, 1, 1))) == [
+        date(2025, 3, 1),
+        date(2025, 6, 1),
+    ]
+
+
+def test_occurrences_are_lazy() -> None:
+    """Dates are computed when consumed, so a far end date doesn't expand the whole recurrence."""
+    recurrence = MonthlyRecurrence(1)
+    occurrences = recurrence.occurrences(date(2024, 1, 1), date(9999, 1, 1))
+    assert list(itertools.islice(occurrences, 3)) == [date(2024, 2, 1), date(2024, 3, 1), date(2024, 4, 1)]
+    assert next(occurrences) == date(2024, 5, 1)
+
+
+def test_occurrences_match_next() -> None:
+    """Expanding a recurrence gives the same dates as calling `next` repeatedly."""
+    recurrence = DeltaRecurrence(months=1)
+    dates, current = [], date(2024, 1, 31)
+    while (current := recurrence.next(current)) <= date(2026, 1, 1):  # type: ignore
+        dates.append(current)
+    assert list(recurrence.occurrences(date(2024, 1, 31), date(2026, 1, 1))) == dates
+
+
+def test_queue_same_day_order() -> None:
+    """Events planned on the same date are popped in the order they were added."""
+    day, other_day = date(2025, 1, 1), date(2024, 6, 1)
+    queue = EventQueue([_event("A", day), _event("B", day)])
+    queue.push(_event("C", other_day))
+    queue.extend([_event("D", day), _event("E", other_day)])
+
+    assert len(queue) == 5
+    assert queue.peek().name == "C"
+    assert [e.name for e in queue] == ["C", "E", "A", "B", "D"]
+    assert [e.name for e in _pop_all(queue)] == ["C", "E", "A", "B", "D"]
+    assert len(queue) == 0
+
+
+def test_queue_recurring_events() -> None:
+    """Recurring events are rescheduled after being popped, and removed once their recurrence ends."""
+    queue = EventQueue(
+        [
+            _event("Monthly", date(2025, 1, 1), MonthlyRecurrence(1, until=date(2025, 4, 1))),
+            _event("Quarterly", date(2025, 1, 1), MonthlyRecurrence(1, n_months=3, until=date(2025, 7, 1))),
+            _event("Once", date(2025, 2, 1)),
+        ]
+    )
+    events = _pop_all(queue)
+
+    assert [(e.planned_date.month, e.name) for e in events] == [
+        (1, "Monthly"),
+        (1, "Quarterly"),
+        (2, "Once"),
+        (2, "Monthly"),  # Rescheduled after "Once", which was added first
+        (3, "Monthly"),
+        (4, "Quarterly"),  # Rescheduled in January, before the last monthly event
+        (4, "Monthly"),
+        (7, "Quarterly"),
+    ]
+    assert [e.planned_date for e in events if e.name == "Monthly"] == [date(2025, 1, 1)] + list(
+        MonthlyRecurrence(1, until=date(2025, 4, 1)).occurrences(date(2025, 1, 1), date(2030, 1, 1))
+    )
@@ -0,0 +1,86 @@
+import csv
+from datetime import date
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from finalynx.simulator.metrics import MetricsStore
+
+START = date(2024, 1, 1)
+
+
+def _store() -> MetricsStore:
+    """Record more dates and columns than the initial capacity, some columns start later than others."""
+    store = MetricsStore(capacity=2)
+    for i in range(5):
+        store.record(START + timedelta(days=i), {f"lines/Line {j}": 10.0 * i + j for j in range(i * 3)})
+    return store
+
+
+def test_metrics_grow() -> None:
+    """The array grows with new dates and columns, values missing before a column is added are NaN."""
+    store = _store()
+    assert len(store) == 5
+    assert store.dates == [START + timedelta(days=i) for i in range(5)]
+    assert store.columns == [f"lines/Line {j}" for j in range(12)]  # In the order they were added
+    assert store._data.shape == (8, 16)
+
+    np.testing.assert_array_equal(store.get_column("lines/Line 0"), [np.nan, 10, 20, 30, 40])
+    np.testing.assert_array_equal(store.get_column("lines/Line 11"), [np.nan, np.nan, np.nan, np.nan, 51])
+    assert store.get_row(START + timedelta(days=4)) == 4
+    assert store.get_row(START - timedelta(days=1)) is None
+
+    with pytest.raises(ValueError):
+        store.get_column("lines/Line 0")[0] = 1  # Read-only view
+
+
+def test_metrics_same_date() -> None:
+    """Recording a date twice updates the existing row, the other columns are kept."""
+    store = MetricsStore()
+    store.record(START, {"a": 1, "b": 2})
+    store.record(START + timedelta(days=1), {"a": 3})
+    store.record(START, {"b": 4, "c": 5})
+
+    assert store.dates == [START, START + timedelta(days=1)]
+    assert store.columns == ["a", "b", "c"]
+    assert store.to_dict(fill_value=0) == {"a": [1, 3], "b": [4, 0], "c": [5, 0]}
+
+
+def test_metrics_from_columns() -> None:
+    """A store created from complete columns keeps their order, and can still record new values."""
+    dates = [START, START + timedelta(days=30), START + timedelta(days=60)]
+    store = MetricsStore.from_columns(dates, {"worth/P50": np.array([1.0, 2, 3]), "worth/P5": np.array([0.5, 1, 2])})
+    assert store.dates == dates
+    assert store.columns == ["worth/P50", "worth/P5"]
+    assert store.to_dict(prefix="worth/") == {"P50": [1, 2, 3], "P5": [0.5, 1, 2]}
+
+    store.record(START + timedelta(days=90), {"worth/P95": 4})
+    assert store.to_dict(prefix="worth/", fill_value=-1) == {
+        "P50": [1, 2, 3, -1],
+        "P5": [0.5, 1, 2, -1],
+        "P95": [-1, -1, -1, 4],
+    }
+
+
+def test_metrics_to_npz(tmp_path: Path) -> None:
+    """The exported arrays only contain the recorded dates and columns."""
+    store = _store()
+    store.to_npz(str(tmp_path / "metrics.npz"))
+
+    with np.load(tmp_path / "metrics.npz") as data:
+        assert data["dates"].astype(date).tolist() == store.dates
+        assert data["columns"].tolist() == store.columns
+        np.testing.assert_array_equal(data["values"], np.array(list(store.to_dict().values())).T)
+
+
+def test_metrics_to_csv(tmp_path: Path) -> None:
+    """The CSV file has one row per date, missing values are left empty."""
+    store = MetricsStore()
+    store.record(START, {"a": 1.5})
+    store.record(START + timedelta(days=1), {"b": 2})
+    store.to_csv(str(tmp_path / "metrics.csv"))
+
+    with open(tmp_path / "metrics.csv", newline="") as f:
+        assert list(csv.reader(f)) == [["date", "a", "b"], ["2024-01-01", "1.5", ""], ["2024-01-02", "", "2.0"]]
@@ -0,0 +1,66 @@
+from datetime import date
+from datetime import timedelta
+from typing import Optional
+
+import numpy as np
+
+from finalynx.bench import generate_portfolio
+from finalynx.bench import SyntheticConfig
+from finalynx.bench.generator import SyntheticPortfolio
+from finalynx.portfolio import LinePerf
+from finalynx.simulator.montecarlo import MonteCarloTimeline
+from finalynx.simulator.vectorized import VectorizedTimeline
+
+CONFIG = SyntheticConfig(depth=2, fanout=2, n_lines=12, n_buckets=1, bucket_lines=2, n_shared_folders=2, years=3)
+
+
+def _generate(n_paths: int = 1200, seed: Optional[int] = 42, workers: int = 1) -> SyntheticPortfolio:
+    """Generate a small synthetic portfolio with its Monte Carlo settings."""
+    synthetic = generate_portfolio(CONFIG)
+    synthetic.simulation.end_date = date.today() + timedelta(days=365 * CONFIG.years)
+    synthetic.simulation.monte_carlo_paths = n_paths
+    synthetic.simulation.monte_carlo_seed = seed
+    synthetic.simulation.monte_carlo_workers = workers
+    synthetic.portfolio.process()
+    return synthetic
+
+
+def _run(synthetic: SyntheticPortfolio) -> MonteCarloTimeline:
+    """Simulate all paths until the end date."""
+    timeline = MonteCarloTimeline(synthetic.simulation, synthetic.portfolio, synthetic.buckets)
+    timeline.run()
+    return timeline
+
+
+def test_montecarlo_same_seed() -> None:
+    """The same seed gives the same percentiles, in a single process or split over several processes."""
+    percentiles = _run(_generate()).get_percentiles()
+    assert _run(_generate()).get_percentiles() == percentiles
+    assert _run(_generate(workers=2)).get_percentiles() == percentiles
+    assert _run(_generate(seed=43)).get_percentiles() != percentiles
+
+
+def test_montecarlo_percentiles_order() -> None:
+    """Percentiles are sorted at each date and spread out once random returns are applied."""
+    synthetic = _generate()
+    worth = _run(synthetic).get_percentiles()
+    p5, p50, p95 = np.array(worth["P5"]), np.array(worth["P50"]), np.array(worth["P95"])
+    assert np.all(p5 <= p50) and np.all(p50 <= p95)
+    assert p5[0] == p95[0] == synthetic.portfolio.get_amount()
+    assert p5[-1] < p95[-1]
+
+
+def test_montecarlo_without_bounds() -> None:
+    """Lines without pessimistic and optimistic returns give the same worth as the deterministic engine."""
+    synthetic = _generate(n_paths=600)
+    for line in synthetic.get_lines() + [line for bucket in synthetic.buckets for line in bucket.lines]:
+        line.perf = LinePerf(line.get_perf().expected)
+
+    timeline = _run(synthetic)
+    vectorized = VectorizedTimeline(synthetic.simulation, synthetic.portfolio, synthetic.buckets)
+    vectorized.run()
+
+    assert timeline.metrics.dates == vectorized.metrics.dates
+    expected = np.sum(list(vectorized.get_metrics("asset_classes").values()), axis=0)
+    for values in timeline.get_percentiles().values():
+        np.testing.assert_allclose(values, expected, rtol=1e-9)
@@ -0,0 +1,97 @@
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import pytest
+
+from finalynx.budget import source_n26
+from finalynx.budget.source_n26 import SourceN26
+from finalynx.config import set_cache_dir
+from finalynx.fetch.cache import CacheFile
+
+# Several transactions share the same timestamps, so that pages overlap on their boundaries
+TIMESTAMPS = [1000, 2000, 2000, 3000, 4000, 4000, 4000, 5000, 6000, 7000]
+
+
+class FakeClient:
+    """Replaces the N26 `Api`, returns pages of transactions like N26 (most recent first, bounds included)."""
+
+    def __init__(self, timestamps: List[int]) -> None:
+        self.transactions: List[Dict[str, Any]] = []
+        self.calls: List[Tuple[Optional[int], Optional[int], int]] = []
+        self.add(timestamps)
+
+    def add(self, timestamps: List[int]) -> None:
+        """Add new transactions with unique ids and amounts."""
+        for timestamp in timestamps:
+            i = len(self.transactions)
+            self.transactions.append({"id": f"t{i}", "confirmed": timestamp, "amount": -i, "merchantName": f"M{i}"})
+
+    def get_balance(self) -> Dict[str, Any]:
+        return {"availableBalance": 100.0}
+
+    def get_transactions(
+        self, from_time: Optional[int] = None, to_time: Optional[int] = None, limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        self.calls.append((from_time, to_time, limit))
+        transactions = [
+            t
+            for t in self.transactions
+            if (from_time is None or t["confirmed"] >= from_time) and (to_time is None or t["confirmed"] <= to_time)
+        ]
+        return sorted(transactions, key=lambda t: -t["confirmed"])[:limit]
+
+
+def test_n26_transactions_since() -> None:
+    """Transactions after a timestamp are requested page by page, without duplicates."""
+    client = FakeClient(TIMESTAMPS)
+    source = SourceN26(fetch_limit=3)
+    transactions = source._get_transactions_since(client, 1000)  # type: ignore
+
+    # Each page ends at the oldest timestamp of the previous page, included, or just before if the page had a
+    # single timestamp
+    assert client.calls == [(1001, None, 3), (1001, 5000, 3), (1001, 4000, 3), (1001, 3999, 3), (1001, 2000, 3)]
+    assert sorted(t["id"] for t in transactions) == [f"t{i}" for i in range(1, len(TIMESTAMPS))]
+    assert [t["confirmed"] for t in transactions] == sorted(TIMESTAMPS[1:], reverse=True)
+
+    # Nothing new since the last transaction
+    assert source._get_transactions_since(client, 7000) == []  # type: ignore
+
+
+def test_n26_incremental_fetch(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """The new transactions are added to the cached expenses, most recent first and without duplicates."""
+    client = FakeClient(TIMESTAMPS[:5])
+    monkeypatch.setattr(source_n26, "Api", lambda conf: client)
+    monkeypatch.setattr(SourceN26, "_authenticate", lambda self: object())
+    set_cache_dir(str(tmp_path))
+
+    def _fetch() -> List[Tuple[int, float]]:
+        """Fetch with an outdated cache and return the cached timestamps and amounts."""
+        source = SourceN26(fetch_limit=2, cache_validity=0)
+        source.fetch(clear_cache=False)
+        data = CacheFile(source.cache_fullpath).read()
+        assert data is not None
+        cached = [(int(e["timestamp"]), float(e["amount"])) for e in data["expenses"]]
+        assert cached == [(e.timestamp, e.amount) for e in source.get_expenses()]
+        return cached
+
+    try:
+        # The first fetch only gets the last transactions
+        assert _fetch() == [(4000, -4), (3000, -3)]
+        assert client.calls == [(None, None, 2)]
+
+        # The next ones only request the transactions newer than the cached ones
+        client.add(TIMESTAMPS[5:])
+        client.calls.clear()
+        cached = _fetch()
+        assert client.calls[0] == (4001, None, 2)
+        assert cached == [(7000, -9), (6000, -8), (5000, -7), (4000, -4), (3000, -3)]
+
+        client.calls.clear()
+        assert _fetch() == cached
+        assert client.calls == [(7001, None, 2)]
+    finally:
+        set_cache_dir(None)
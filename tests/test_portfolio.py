@@ -0,0 +1,95 @@
+from typing import Tuple
+
+from finalynx.portfolio import Folder
+from finalynx.portfolio import Line
+from finalynx.portfolio import LinePerf
+from finalynx.portfolio import Portfolio
+from finalynx.portfolio import Target
+from finalynx.portfolio import TargetMax
+from finalynx.portfolio import TargetRange
+from finalynx.portfolio import TargetRatio
+
+
+def _build() -> Tuple[Portfolio, Folder, Folder, Line, Line]:
+    """Create a small portfolio with two folders, the first one has two lines."""
+    line_1 = Line("Line 1", amount=100, target=TargetRatio(50), perf=LinePerf(2))
+    line_2 = Line("Line 2", amount=300, target=TargetRatio(50), perf=LinePerf(6))
+    folder_1 = Folder("Folder 1", children=[line_1, line_2])
+    folder_2 = Folder("Folder 2", children=[Line("Line 3", amount=600)])
+    portfolio = Portfolio(children=[folder_1, folder_2])
+    return portfolio, folder_1, folder_2, line_1, line_2
+
+
+def test_cache_line_amount() -> None:
+    """Changing a line amount updates all cached aggregates of its parents."""
+    portfolio, folder_1, _, line_1, line_2 = _build()
+    assert portfolio.get_amount() == 1000
+    assert line_1.get_ideal() == 200
+    assert folder_1.get_perf(ideal=False).expected == 5
+
+    line_1.amount = 300
+    assert folder_1.get_amount() == 600
+    assert portfolio.get_amount() == 1200
+    assert line_2.get_ideal() == 300
+    assert folder_1.get_perf(ideal=False).expected == 4
+
+
+def test_cache_add_child() -> None:
+    """Adding a child updates the amounts of the folder and its parents."""
+    portfolio, _, folder_2, _, _ = _build()
+    assert portfolio.get_amount() == 1000
+
+    folder_2.add_child(Line("Line 4", amount=500))
+    assert folder_2.get_amount() == 1100
+    assert portfolio.get_amount() == 1500
+
+
+def test_cache_set_parent() -> None:
+    """Moving a node updates the amounts of both its previous and new parents."""
+    portfolio, folder_1, folder_2, line_1, _ = _build()
+    assert folder_1.get_amount() == 400 and folder_2.get_amount() == 600
+
+    folder_1.children = [c for c in folder_1.children if c is not line_1]
+    folder_2.add_child(line_1)
+    assert folder_1.get_amount() == 300
+    assert folder_2.get_amount() == 700
+    assert portfolio.get_amount() == 1000
+
+
+def test_cache_children_assignment() -> None:
+    """Replacing a folder's children updates the amounts of the folder and its parents."""
+    portfolio, folder_1, _, _, _ = _build()
+    assert portfolio.get_amount() == 1000
+
+    folder_1.children = [Line("Line 5", amount=50)]
+    assert folder_1.get_amount() == 50
+    assert portfolio.get_amount() == 650
+
+
+def test_cache_target_and_perf_assignment() -> None:
+    """Replacing a node's target or performance updates the cached ideals and performances."""
+    portfolio, folder_1, _, line_1, line_2 = _build()
+    assert line_1.get_ideal() == 200
+    assert folder_1.get_perf(ideal=False).expected == 5
+
+    line_1.target = TargetRatio(25)
+    assert line_1.get_ideal() == 100
+
+    line_2.perf = LinePerf(10)
+    assert folder_1.get_perf(ideal=False).expected == 8
+
+    folder_1.target = TargetRatio(10)
+    assert folder_1.get_ideal() == 100
+
+    folder_1.target = Target()
+    assert folder_1.get_ideal() == line_1.get_ideal() + line_2.get_ideal()
+
+
+def test_render_target_assignment() -> None:
+    """Replacing a node's target renders the new target's symbol and color."""
+    folder = Folder("Folder", target=TargetRange(0, 50), children=[Line("Line", amount=100)])
+    folder.render("[target_symbol] [target_color]")
+
+    folder.target = TargetMax(1000)
+    assert folder.render("[target_symbol]") == folder.target._render_target_symbol()
+    assert folder.render("[target_color]") == folder.target._render_target_color()
@@ -0,0 +1,44 @@
+from datetime import date
+from datetime import timedelta
+from typing import Any
+
+import numpy as np
+import pytest
+
+from finalynx.bench import generate_portfolio
+from finalynx.bench import SyntheticConfig
+from finalynx.simulator.timeline import Timeline
+from finalynx.simulator.vectorized import VectorizedTimeline
+
+GROUPS = ["investment_states", "envelopes", "asset_classes", "asset_subclasses", "lines"]
+
+
+def _run(engine: Any, config: SyntheticConfig) -> Timeline:
+    """Run a simulation on a new synthetic portfolio, the same one is generated on each call."""
+    synthetic = generate_portfolio(config)
+    synthetic.simulation.end_date = date.today() + timedelta(days=365 * config.years)
+    synthetic.portfolio.process()
+    timeline: Timeline = engine(synthetic.simulation, synthetic.portfolio, synthetic.buckets)
+    timeline.run()
+    return timeline
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        SyntheticConfig(depth=2, fanout=3, n_lines=30, n_events=3, years=5, seed=1),
+        SyntheticConfig(depth=2, fanout=2, n_lines=20, n_buckets=2, bucket_lines=4, n_shared_folders=4, seed=2),
+        SyntheticConfig(depth=1, fanout=3, n_lines=10, n_buckets=0, n_shared_folders=0, years=3, seed=3),
+    ],
+)
+def test_vectorized_timeline_metrics(config: SyntheticConfig) -> None:
+    """The vectorized engine must record the same metrics as the tree engine."""
+    timeline = _run(Timeline, config)
+    vectorized = _run(VectorizedTimeline, config)
+
+    assert vectorized.metrics.dates == timeline.metrics.dates
+    for group in GROUPS:
+        expected, result = timeline.get_metrics(group), vectorized.get_metrics(group)
+        assert sorted(result) == sorted(expected), group
+        for key, values in expected.items():
+            np.testing.assert_allclose(result[key], values, rtol=1e-9, atol=1e-6, err_msg=f"{group}/{key}")
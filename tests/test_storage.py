@@ -0,0 +1,82 @@
+from dataclasses import replace
+from pathlib import Path
+from typing import List
+
+from finalynx.budget.expense import Constraint
+from finalynx.budget.expense import Expense
+from finalynx.budget.expense import Period
+from finalynx.budget.expense import Status
+from finalynx.budget.storage import SQLiteStore
+
+
+def _expenses() -> List[Expense]:
+    """Create expenses with and without a review, in non-chronological order."""
+    return [
+        Expense(1706745600000, -42.5, "Bakery", "Food"),
+        Expense(1704067200000, -1200.0, "Landlord", "Rent", Status.DONE, 600.0, "Alice", Constraint.FIXED),
+        Expense(1709251200000, 2500.0, "Company", "Salary", Status.SKIP, period=Period.MONTHLY, comment="March"),
+        Expense(1706832000000, -15.99, "Streaming", "Leisure", Status.TODO, 0.0, constraint=Constraint.FUN),
+    ]
+
+
+def _connect(tmp_path: Path) -> SQLiteStore:
+    """Open a new database in a temporary folder."""
+    store = SQLiteStore(tmp_path / "data" / "expenses.db")
+    store.connect()
+    return store
+
+
+def test_sqlite_add_expenses(tmp_path: Path) -> None:
+    """Added expenses are read back with the same fields, in the order they were added."""
+    store = _connect(tmp_path)
+    expenses = _expenses()
+    store.add_expenses(expenses[:2])
+    store.add_expenses(expenses[2:])
+
+    assert [e.cell_number for e in expenses] == [1, 2, 3, 4]
+    assert store.get_expenses() == expenses
+    assert store.get_monthly_expenses(2, 2024) == [expenses[0], expenses[3]]
+    assert store.get_last_timestamp() == 1709251200000
+
+    # The data is saved in the database file
+    assert _connect(tmp_path).get_expenses() == expenses
+
+
+def test_sqlite_set_expenses(tmp_path: Path) -> None:
+    """Setting the expenses replaces all previous rows without modifying the given expenses."""
+    store = _connect(tmp_path)
+    store.add_expenses(_expenses())
+
+    expenses = [replace(e, comment="Synced", cell_number=10 + i) for i, e in enumerate(_expenses()[1:3])]
+    store.set_expenses(expenses)
+
+    assert [e.cell_number for e in expenses] == [10, 11]
+    assert store.get_expenses() == [replace(e, cell_number=i + 1) for i, e in enumerate(expenses)]
+
+    store.set_expenses([])
+    assert store.get_expenses() == []
+
+
+def test_sqlite_update_expense(tmp_path: Path) -> None:
+    """Updating an expense only changes its own row."""
+    store = _connect(tmp_path)
+    expenses = _expenses()
+    store.add_expenses(expenses)
+
+    expense = store.get_expenses()[0]
+    expense.status, expense.i_paid, expense.period = Status.DONE, 10.0, Period.YEARLY
+    expense.timestamp = 1711929600000  # Moved to April
+    store.update_expense(expense)
+
+    assert store.get_expenses() == [expense] + expenses[1:]
+    assert store.get_monthly_expenses(4, 2024) == [expense]
+    assert store.get_monthly_expenses(2, 2024) == [expenses[3]]
+    assert store.get_last_timestamp() == 1711929600000
+
+
+def test_sqlite_empty_store(tmp_path: Path) -> None:
+    """An empty store has no expenses and a last timestamp of 0."""
+    store = _connect(tmp_path)
+    assert store.get_expenses() == []
+    assert store.get_last_timestamp() == 0
+    assert store.get_monthly_expenses(1, 2024) == []